@@ -10,9 +10,13 @@ from agents.contracts import (
 )
 from agents.mesh import AgentMesh
 from agents.providers import (
+    AccumulatedStateProvider,
+    CachingStateProvider,
     EmbeddingVectorMemoryProvider,
+    HybridVectorMemoryProvider,
     NullVectorMemoryProvider,
     SQLiteGraphMemoryProvider,
+    StateCacheStats,
     StoreBackedStateProvider,
 )
 
@@ -30,5 +34,9 @@ __all__ = [
     "SQLiteGraphMemoryProvider",
     "EmbeddingVectorMemoryProvider",
     "NullVectorMemoryProvider",
+    "HybridVectorMemoryProvider",
     "StoreBackedStateProvider",
+    "AccumulatedStateProvider",
+    "CachingStateProvider",
+    "StateCacheStats",
 ]
@@ -2,8 +2,9 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Dict, List, Mapping, Protocol, Sequence, Tuple
+from typing import Any, Dict, List, Mapping, Optional, Protocol, Sequence, Tuple
 
+from embeddings.vector_store import VectorFilter
 from state.models import UserStateSnapshot
 from tools.registry import ToolCall, ToolResult
 
@@ -48,7 +49,7 @@ class GraphMemoryProvider(Protocol):
 
 
 class VectorMemoryProvider(Protocol):
-    def search(self, text: str, top_k: int = 5) -> List[Tuple[str, float]]:
+    def search(self, text: str, top_k: int = 5, *, where: Optional[VectorFilter] = None) -> List[Tuple[str, float]]:
         ...
 
 
@@ -1,8 +1,15 @@
 from __future__ import annotations
 
-from typing import Dict, List, Sequence, Tuple
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
 
+from agents.contracts import StateProvider
+from embeddings.hybrid import HybridRetriever
 from embeddings.indexer import EmbeddingIndexer
+from embeddings.vector_store import VectorFilter
+from state.accumulator import StateAccumulator
 from state.engine import DeterministicStateEngine
 from state.models import UserStateSnapshot
 from storage.sqlite_store import SQLiteStore
@@ -13,30 +20,34 @@ class SQLiteGraphMemoryProvider:
         self.store = store
 
     def get_relations(self, canonical_ids: Sequence[str]) -> List[Dict[str, object]]:
-        relations = self.store.fetch_relations()
         if not canonical_ids:
-            return relations
-        wanted = {canonical_id for canonical_id in canonical_ids}
-        return [
-            relation
-            for relation in relations
-            if str(relation.get("from_canonical_id")) in wanted
-            or str(relation.get("to_canonical_id")) in wanted
-        ]
+            return self.store.fetch_relations()
+        return self.store.fetch_relations_for(canonical_ids)
 
 
 class EmbeddingVectorMemoryProvider:
     def __init__(self, indexer: EmbeddingIndexer) -> None:
         self.indexer = indexer
 
-    def search(self, text: str, top_k: int = 5) -> List[Tuple[str, float]]:
-        return self.indexer.query(text, top_k=top_k)
+    def search(self, text: str, top_k: int = 5, *, where: Optional[VectorFilter] = None) -> List[Tuple[str, float]]:
+        return self.indexer.query(text, top_k=top_k, where=where)
+
+
+class HybridVectorMemoryProvider:
+    """Lexical + vector memory; serves BM25 results alone when no embedding model is loaded."""
+
+    def __init__(self, retriever: HybridRetriever) -> None:
+        self.retriever = retriever
+
+    def search(self, text: str, top_k: int = 5, *, where: Optional[VectorFilter] = None) -> List[Tuple[str, float]]:
+        return self.retriever.search(text, top_k=top_k, where=where)
 
 
 class NullVectorMemoryProvider:
-    def search(self, text: str, top_k: int = 5) -> List[Tuple[str, float]]:
+    def search(self, text: str, top_k: int = 5, *, where: Optional[VectorFilter] = None) -> List[Tuple[str, float]]:
         _ = text
         _ = top_k
+        _ = where
         return []
 
 
@@ -47,3 +58,93 @@ class StoreBackedStateProvider:
 
     def get_state(self) -> UserStateSnapshot:
         return self.engine.calculate_from_store(self.store)
+
+
+class AccumulatedStateProvider:
+    """State from a ``StateAccumulator``: O(1) per call while the store is unchanged.
+
+    If the store generation moved on without ``apply_changes`` (a write the accumulator
+    was not told about), the accumulator is rebuilt from the store's recent window.
+    """
+
+    def __init__(self, store: SQLiteStore, accumulator: StateAccumulator) -> None:
+        self.store = store
+        self.accumulator = accumulator
+
+    def get_state(self) -> UserStateSnapshot:
+        now = datetime.now(timezone.utc)
+        if self.store.generation() != self.accumulator.generation or now < self.accumulator.as_of:
+            self.accumulator = StateAccumulator.from_store(self.store, self.accumulator.config, now=now)
+        return self.accumulator.snapshot(now)
+
+
+@dataclass(frozen=True)
+class StateCacheStats:
+    hits: int
+    misses: int
+    invalidations: int
+
+
+class CachingStateProvider:
+    """Memoizes another provider's snapshot per (store generation, time bucket).
+
+    A cached snapshot is reused while ``SQLiteStore.generation()`` is unchanged, the
+    clock stays in the same ``bucket`` and the entry is younger than ``ttl``. A write
+    from any connection bumps the generation and forces a recompute. Each call costs one
+    generation read; hit/miss counters cover this instance only.
+    """
+
+    def __init__(
+        self,
+        store: SQLiteStore,
+        provider: StateProvider,
+        *,
+        bucket: timedelta = timedelta(minutes=1),
+        ttl: timedelta = timedelta(minutes=5),
+        clock: Optional[Callable[[], datetime]] = None,
+    ) -> None:
+        if bucket <= timedelta(0) or ttl <= timedelta(0):
+            raise ValueError("bucket and ttl must be positive")
+        self.store = store
+        self.provider = provider
+        self.bucket = bucket
+        self.ttl = ttl
+        self._clock = clock or (lambda: datetime.now(timezone.utc))
+        self._lock = threading.Lock()
+        self._key: Optional[Tuple[int, int]] = None
+        self._snapshot: Optional[UserStateSnapshot] = None
+        self._cached_at: Optional[datetime] = None
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    def get_state(self) -> UserStateSnapshot:
+        now = self._clock()
+        key = (self.store.generation(), int(now.timestamp() // self.bucket.total_seconds()))
+        with self._lock:
+            if (
+                self._snapshot is not None
+                and self._key == key
+                and self._cached_at is not None
+                and now - self._cached_at < self.ttl
+            ):
+                self._hits += 1
+                return self._snapshot
+            self._misses += 1
+            snapshot = self.provider.get_state()
+            self._key = key
+            self._snapshot = snapshot
+            self._cached_at = now
+            return snapshot
+
+    def invalidate(self) -> None:
+        with self._lock:
+            if self._snapshot is not None:
+                self._invalidations += 1
+            self._key = None
+            self._snapshot = None
+            self._cached_at = None
+
+    def stats(self) -> StateCacheStats:
+        with self._lock:
+            return StateCacheStats(hits=self._hits, misses=self._misses, invalidations=self._invalidations)
@@ -2,28 +2,30 @@ from __future__ import annotations
 
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from agents.builtin_agents import FollowUpPlannerAgent, MemoryContextAgent
 from agents.contracts import AgentEvent, AgentOutcome, VectorMemoryProvider
 from agents.mesh import AgentMesh
 from agents.providers import (
-    EmbeddingVectorMemoryProvider,
-    NullVectorMemoryProvider,
+    AccumulatedStateProvider,
+    CachingStateProvider,
+    HybridVectorMemoryProvider,
     SQLiteGraphMemoryProvider,
-    StoreBackedStateProvider,
 )
 from embeddings.faiss_store import LocalFaissStore
+from embeddings.hybrid import HybridRetriever
 from embeddings.indexer import EmbeddingIndexer
-from embeddings.models import SentenceTransformerEmbeddingModel
-from state.engine import DeterministicStateEngine
+from embeddings.registry import EmbeddingModelRegistry, default_model_registry
+from state.accumulator import StateAccumulator
 from storage.sqlite_store import SQLiteStore
+from storage.tenant_router import TenantRouter, open_store
 from tools.builtin_tools import build_local_tool_registry
 
 
 def run_agent_mesh_event(
     *,
-    db_path: str,
+    db_path: str = "",
     index_path: str,
     metadata_path: str,
     event_type: str,
@@ -31,27 +33,40 @@ def run_agent_mesh_event(
     model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
     local_files_only: bool = False,
     data_dir: str = "data",
+    model_registry: Optional[EmbeddingModelRegistry] = None,
+    router: Optional[TenantRouter] = None,
+    tenant_id: str = "",
+    store: Optional[SQLiteStore] = None,
 ) -> List[AgentOutcome]:
-    store = SQLiteStore(db_path)
-    state_engine = DeterministicStateEngine()
+    """Dispatch one event to the agent mesh.
+
+    The schema is not touched here: it is created and migrated by
+    ``SQLiteStore.initialize_schema``, which the pipeline and ``TenantRouter`` run. The
+    saved ``StateAccumulator`` is resumed in a read transaction; it is rebuilt and saved
+    only when the store changed since the last save. An open ``store`` is used as is.
+    """
+    if store is None:
+        store = open_store(db_path, router=router, tenant_id=tenant_id)
     tool_registry = build_local_tool_registry(data_dir)
 
-    vector_memory: VectorMemoryProvider = NullVectorMemoryProvider()
+    # Lexical (FTS5) retrieval always works; vectors are fused in when the index and model load.
+    embedding_indexer: Optional[EmbeddingIndexer] = None
     index_exists = Path(index_path).exists() and Path(metadata_path).exists()
     if index_exists:
         try:
-            model = SentenceTransformerEmbeddingModel(model_name=model_name, local_files_only=local_files_only)
+            registry = model_registry or default_model_registry()
+            model = registry.get(model_name, local_files_only=local_files_only)
             vector_store = LocalFaissStore(index_path=index_path, metadata_path=metadata_path)
             embedding_indexer = EmbeddingIndexer(model=model, vector_store=vector_store)
-            vector_memory = EmbeddingVectorMemoryProvider(embedding_indexer)
         except RuntimeError:
-            vector_memory = NullVectorMemoryProvider()
+            embedding_indexer = None
+    vector_memory: VectorMemoryProvider = HybridVectorMemoryProvider(HybridRetriever(store, embedding_indexer))
 
     mesh = AgentMesh(
         agents=[FollowUpPlannerAgent(), MemoryContextAgent()],
         graph_memory=SQLiteGraphMemoryProvider(store),
         vector_memory=vector_memory,
-        state_provider=StoreBackedStateProvider(store, state_engine),
+        state_provider=CachingStateProvider(store, AccumulatedStateProvider(store, StateAccumulator.open(store))),
         tool_registry=tool_registry,
     )
     event = AgentEvent(event_type=event_type, emitted_at=datetime.now(timezone.utc), payload=payload)
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from itertools import islice
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
@@ -9,6 +10,7 @@ from api.embeddings_runner import EmbeddingRunReport, rebuild_local_embeddings
 from api.pipeline_runner import PipelineRunReport, run_pipeline_from_files
 from api.state_runner import compute_user_state
 from core.telemetry import JsonlMetricsLogger, run_timed
+from embeddings.registry import EmbeddingModelRegistry, default_model_registry
 from storage.sqlite_store import SQLiteStore
 
 
@@ -38,68 +40,80 @@ def run_cognitive_cycle_from_files(
     rebuild_embeddings: bool = True,
     embeddings_model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
     local_files_only: bool = False,
+    model_registry: Optional[EmbeddingModelRegistry] = None,
 ) -> CognitiveCycleReport:
     for file_path in (notes_path, calendar_path, reminders_path):
         if not Path(file_path).exists():
             raise FileNotFoundError(f"Missing required export file: {file_path}")
 
     logger = JsonlMetricsLogger(metrics_path)
+    # The embedding rebuild and the agent mesh share one loaded model.
+    registry = model_registry or default_model_registry()
+    # Every stage runs on one store, so the cycle opens a single connection pool.
+    store = SQLiteStore(db_path)
+    try:
+        pipeline_report = run_timed(
+            logger,
+            layer="pipeline",
+            action="normalize_and_store",
+            fn=lambda: run_pipeline_from_files(
+                db_path=db_path,
+                notes_path=notes_path,
+                calendar_path=calendar_path,
+                reminders_path=reminders_path,
+                store=store,
+            ),
+        )
 
-    pipeline_report = run_timed(
-        logger,
-        layer="pipeline",
-        action="normalize_and_store",
-        fn=lambda: run_pipeline_from_files(
-            db_path=db_path,
-            notes_path=notes_path,
-            calendar_path=calendar_path,
-            reminders_path=reminders_path,
-        ),
-    )
-
-    embedding_report: Optional[EmbeddingRunReport] = None
-    embedding_error = ""
-    if rebuild_embeddings:
-        try:
-            embedding_report = run_timed(
-                logger,
-                layer="embeddings",
-                action="rebuild_local_index",
-                fn=lambda: rebuild_local_embeddings(
-                    db_path=db_path,
-                    index_path=index_path,
-                    metadata_path=metadata_path,
-                    model_name=embeddings_model_name,
-                    local_files_only=local_files_only,
-                ),
-            )
-        except RuntimeError as exc:
-            embedding_error = str(exc)
+        embedding_report: Optional[EmbeddingRunReport] = None
+        embedding_error = ""
+        if rebuild_embeddings:
+            try:
+                embedding_report = run_timed(
+                    logger,
+                    layer="embeddings",
+                    action="rebuild_local_index",
+                    fn=lambda: rebuild_local_embeddings(
+                        db_path=db_path,
+                        index_path=index_path,
+                        metadata_path=metadata_path,
+                        model_name=embeddings_model_name,
+                        local_files_only=local_files_only,
+                        cache_path=str(Path(index_path).parent / "embedding_cache.db"),
+                        model_registry=registry,
+                        store=store,
+                    ),
+                )
+            except RuntimeError as exc:
+                embedding_error = str(exc)
 
-    state_snapshot = run_timed(
-        logger,
-        layer="state",
-        action="compute_user_state",
-        fn=lambda: compute_user_state(db_path=db_path),
-    )
+        state_snapshot = run_timed(
+            logger,
+            layer="state",
+            action="compute_user_state",
+            fn=lambda: compute_user_state(db_path=db_path, store=store),
+        )
 
-    store = SQLiteStore(db_path)
-    canonical_ids = [obj.canonical_id for obj in store.fetch_canonical_objects()]
-    agent_outcomes = run_timed(
-        logger,
-        layer="agents",
-        action="dispatch_mesh_event",
-        fn=lambda: run_agent_mesh_event(
-            db_path=db_path,
-            index_path=index_path,
-            metadata_path=metadata_path,
-            event_type="RELATION_GRAPH_UPDATED",
-            payload={"canonical_ids": canonical_ids[:20], "query": "follow up priorities"},
-            model_name=embeddings_model_name,
-            local_files_only=local_files_only,
-            data_dir=str(Path(db_path).parent),
-        ),
-    )
+        canonical_ids = list(islice(store.iter_canonical_ids(), 20))
+        agent_outcomes = run_timed(
+            logger,
+            layer="agents",
+            action="dispatch_mesh_event",
+            fn=lambda: run_agent_mesh_event(
+                db_path=db_path,
+                index_path=index_path,
+                metadata_path=metadata_path,
+                event_type="RELATION_GRAPH_UPDATED",
+                payload={"canonical_ids": canonical_ids, "query": "follow up priorities"},
+                model_name=embeddings_model_name,
+                local_files_only=local_files_only,
+                data_dir=str(Path(db_path).parent),
+                model_registry=registry,
+                store=store,
+            ),
+        )
+    finally:
+        store.close()
 
     agent_notes: List[str] = []
     for outcome in agent_outcomes:
@@ -1,11 +1,16 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import Optional
 
-from embeddings.faiss_store import LocalFaissStore
+from embeddings.cache import EmbeddingCache
+from embeddings.encoder_pool import MultiProcessEmbeddingModel
+from embeddings.faiss_store import FaissIndexConfig, LocalFaissStore
 from embeddings.indexer import EmbeddingIndexer
-from embeddings.models import SentenceTransformerEmbeddingModel
+from embeddings.models import EmbeddingModel
+from embeddings.registry import EmbeddingModelRegistry, default_model_registry
 from storage.sqlite_store import SQLiteStore
+from storage.tenant_router import TenantRouter, open_store
 
 
 @dataclass(frozen=True)
@@ -14,27 +19,74 @@ class EmbeddingRunReport:
     vector_dimension: int
     index_path: str
     metadata_path: str
+    embedded_count: int = 0
+    deleted_count: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
 
 
 def rebuild_local_embeddings(
     *,
-    db_path: str,
+    db_path: str = "",
     index_path: str,
     metadata_path: str,
     model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
     local_files_only: bool = False,
+    incremental: bool = True,
+    cache_path: Optional[str] = None,
+    index_config: Optional[FaissIndexConfig] = None,
+    encoder_workers: int = 0,
+    model_registry: Optional[EmbeddingModelRegistry] = None,
+    router: Optional[TenantRouter] = None,
+    tenant_id: str = "",
+    store: Optional[SQLiteStore] = None,
 ) -> EmbeddingRunReport:
-    store = SQLiteStore(db_path)
-    model = SentenceTransformerEmbeddingModel(
+    if store is None:
+        store = open_store(db_path, router=router, tenant_id=tenant_id)
+    pool: Optional[MultiProcessEmbeddingModel] = None
+    model: EmbeddingModel
+    if encoder_workers > 0:
+        pool = MultiProcessEmbeddingModel(
+            model_name,
+            workers=encoder_workers,
+            local_files_only=local_files_only,
+        )
+        model = pool
+    else:
+        model = (model_registry or default_model_registry()).get(model_name, local_files_only=local_files_only)
+    vector_store = LocalFaissStore(
+        index_path=index_path,
+        metadata_path=metadata_path,
+        index_config=index_config,
         model_name=model_name,
-        local_files_only=local_files_only,
     )
-    vector_store = LocalFaissStore(index_path=index_path, metadata_path=metadata_path)
-    indexer = EmbeddingIndexer(model=model, vector_store=vector_store)
-    report = indexer.rebuild_from_store(store)
+    cache = EmbeddingCache(cache_path) if cache_path else None
+    indexer = EmbeddingIndexer(model=model, vector_store=vector_store, cache=cache, model_name=model_name)
+    try:
+        if not incremental:
+            report = indexer.rebuild_from_store(store)
+            indexed_count = report.indexed_count
+            embedded_count = report.indexed_count
+            deleted_count = 0
+        else:
+            update = indexer.upsert_from_store(store)
+            indexed_count = update.indexed_count
+            embedded_count = update.embedded_count
+            deleted_count = update.deleted_count
+        cache_stats = cache.stats() if cache is not None else None
+    finally:
+        if cache is not None:
+            cache.close()
+        if pool is not None:
+            pool.close()
+
     return EmbeddingRunReport(
-        indexed_count=report.indexed_count,
-        vector_dimension=report.vector_dimension,
+        indexed_count=indexed_count,
+        vector_dimension=vector_store.dimension(),
         index_path=index_path,
         metadata_path=metadata_path,
+        embedded_count=embedded_count,
+        deleted_count=deleted_count,
+        cache_hits=cache_stats.hits if cache_stats is not None else 0,
+        cache_misses=cache_stats.misses if cache_stats is not None else 0,
     )
@@ -2,15 +2,18 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Sequence
+from typing import Any, Dict, List, Optional, Sequence
 
 from core.canonical_schema import CanonicalObject
-from graph.relation_builder import rebuild_and_store_relations
+from graph.relation_builder import update_and_store_relations
 from ingestion.calendar_mapper import map_events
 from ingestion.export_loader import as_records, load_json_file
 from ingestion.notes_mapper import map_notes
 from ingestion.reminders_mapper import map_reminders
+from state.accumulator import StateAccumulator
+from state.engine import StateEngineConfig
 from storage.sqlite_store import SQLiteStore
+from storage.tenant_router import TenantRouter, open_store
 
 
 @dataclass(frozen=True)
@@ -24,10 +27,17 @@ class PipelineRunReport:
 
 
 class DeterministicNormalizationPipeline:
-    """Deterministic ingestion + storage + relation build orchestrator."""
+    """Deterministic ingestion + storage + relation build orchestrator.
 
-    def __init__(self, store: SQLiteStore) -> None:
+    A run never deletes stored objects: objects missing from the exports are kept, and
+    relations are updated only around the objects the run inserted or updated. Each
+    run also feeds its change set to the persisted ``StateAccumulator`` for
+    ``state_config``, so state readers resume from it instead of rescanning.
+    """
+
+    def __init__(self, store: SQLiteStore, *, state_config: Optional[StateEngineConfig] = None) -> None:
         self.store = store
+        self.state_config = state_config
 
     def run(
         self,
@@ -49,8 +59,11 @@ class DeterministicNormalizationPipeline:
         canonical_objects = self._dedupe_canonical_objects(
             [*mapped_notes, *mapped_events, *mapped_reminders]
         )
-        self.store.upsert_canonical_objects(canonical_objects)
-        relation_count = rebuild_and_store_relations(self.store, canonical_objects)
+        accumulator = StateAccumulator.open(self.store, self.state_config)
+        changes = self.store.upsert_canonical_objects(canonical_objects)
+        relation_count = update_and_store_relations(self.store, changes)
+        accumulator.apply_changes(self.store, changes.changed_ids)
+        accumulator.save(self.store)
 
         return PipelineRunReport(
             notes_count=len(mapped_notes),
@@ -72,16 +85,24 @@ class DeterministicNormalizationPipeline:
 
 def run_pipeline_from_files(
     *,
-    db_path: str,
+    db_path: str = "",
     notes_path: str,
     calendar_path: str,
     reminders_path: str,
+    router: Optional[TenantRouter] = None,
+    tenant_id: str = "",
+    store: Optional[SQLiteStore] = None,
 ) -> PipelineRunReport:
+    """Ingest the exports into ``db_path``, or into ``tenant_id``'s shard when ``router`` is given.
+
+    An open ``store`` is used as is, so callers running several stages share its pool.
+    """
     for path in (notes_path, calendar_path, reminders_path):
         if not Path(path).exists():
             raise FileNotFoundError(f"Export file not found: {path}")
 
-    store = SQLiteStore(db_path)
+    if store is None:
+        store = open_store(db_path, router=router, tenant_id=tenant_id)
     pipeline = DeterministicNormalizationPipeline(store)
     return pipeline.run(
         notes_payload=load_json_file(notes_path),
@@ -1,21 +1,57 @@
 from __future__ import annotations
 
+from datetime import datetime, timedelta
+from typing import Optional
+
 from state.engine import DeterministicStateEngine, StateEngineConfig
+from state.history import StateHistory, iter_timestamps
 from state.models import UserStateSnapshot
 from storage.sqlite_store import SQLiteStore
+from storage.tenant_router import TenantRouter, open_store
 
 
 def compute_user_state(
     *,
-    db_path: str,
+    db_path: str = "",
     recent_window_days: int = 7,
     follow_up_window_days: int = 7,
+    record_history: bool = False,
+    router: Optional[TenantRouter] = None,
+    tenant_id: str = "",
+    store: Optional[SQLiteStore] = None,
 ) -> UserStateSnapshot:
-    store = SQLiteStore(db_path)
-    engine = DeterministicStateEngine(
-        StateEngineConfig(
-            recent_window_days=recent_window_days,
-            follow_up_window_days=follow_up_window_days,
-        )
+    """The current snapshot; ``record_history=True`` also appends it to the state history."""
+    if store is None:
+        store = open_store(db_path, router=router, tenant_id=tenant_id)
+    config = StateEngineConfig(
+        recent_window_days=recent_window_days,
+        follow_up_window_days=follow_up_window_days,
     )
-    return engine.calculate_from_store(store)
+    snapshot = DeterministicStateEngine(config).calculate_from_store(store)
+    if record_history:
+        StateHistory(store, config).record([snapshot])
+    return snapshot
+
+
+def backfill_state_history(
+    *,
+    db_path: str = "",
+    start: datetime,
+    end: datetime,
+    step: timedelta = timedelta(hours=1),
+    recent_window_days: int = 7,
+    follow_up_window_days: int = 7,
+    history: Optional[StateHistory] = None,
+    router: Optional[TenantRouter] = None,
+    tenant_id: str = "",
+) -> int:
+    """Record snapshots every ``step`` in ``[start, end)``; returns the number recorded."""
+    if history is None:
+        history = StateHistory(
+            open_store(db_path, router=router, tenant_id=tenant_id),
+            StateEngineConfig(
+                recent_window_days=recent_window_days,
+                follow_up_window_days=follow_up_window_days,
+            ),
+        )
+    return history.backfill(iter_timestamps(start, end, step))
@@ -1,20 +1,39 @@
-from embeddings.faiss_store import LocalFaissStore
+from embeddings.cache import EmbeddingCache, EmbeddingCacheStats
+from embeddings.encoder_pool import MultiProcessEmbeddingModel
+from embeddings.faiss_store import FaissIndexConfig, LocalFaissStore
+from embeddings.hybrid import HybridRetriever, reciprocal_rank_fusion
 from embeddings.indexer import (
     EmbeddingIndexer,
     EmbeddingIndexReport,
+    EmbeddingUpdateReport,
     IndexedDocument,
     build_embedding_documents,
+    embedding_text_hash,
 )
 from embeddings.models import EmbeddingModel, SentenceTransformerEmbeddingModel
+from embeddings.registry import EmbeddingModelRegistry, default_model_registry
 from embeddings.structured_text import build_structured_embedding_text
+from embeddings.vector_store import VectorAttributes, VectorFilter
 
 __all__ = [
     "EmbeddingModel",
     "SentenceTransformerEmbeddingModel",
+    "MultiProcessEmbeddingModel",
+    "EmbeddingModelRegistry",
+    "default_model_registry",
     "LocalFaissStore",
+    "FaissIndexConfig",
+    "VectorAttributes",
+    "VectorFilter",
+    "EmbeddingCache",
+    "EmbeddingCacheStats",
     "EmbeddingIndexer",
     "EmbeddingIndexReport",
+    "EmbeddingUpdateReport",
     "IndexedDocument",
     "build_embedding_documents",
+    "embedding_text_hash",
     "build_structured_embedding_text",
+    "HybridRetriever",
+    "reciprocal_rank_fusion",
 ]
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, ContextManager, Dict, List, Optional, Sequence, Tuple
+
+from storage.connection_pool import SQLiteConnectionConfig, SQLiteConnectionPool
+
+# Keys per ``IN (...)`` lookup, well below SQLite's bound-parameter limit.
+_LOOKUP_CHUNK = 500
+
+
+def _encode_vector(vector: Any) -> bytes:
+    if getattr(vector, "dtype", None) == "float32":
+        # numpy float32 rows already have the array("f") memory layout.
+        return bytes(vector.tobytes())
+    return array("f", vector).tobytes()
+
+
+def _decode_vector(blob: bytes) -> List[float]:
+    values = array("f")
+    values.frombytes(blob)
+    return values.tolist()
+
+
+@dataclass(frozen=True)
+class EmbeddingCacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+
+
+class EmbeddingCache:
+    """On-disk float32 embedding cache keyed by (model_name, text_hash).
+
+    ``model_name`` must identify everything that changes the vectors (model, revision,
+    normalization). Entries are evicted least-recently-used first once the cache holds
+    more than ``max_entries`` rows. Hit/miss/eviction counters cover this instance only.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        *,
+        max_entries: int = 1_000_000,
+        connection_config: Optional[SQLiteConnectionConfig] = None,
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.db_path = db_path
+        self.max_entries = max_entries
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.pool = SQLiteConnectionPool(db_path, connection_config)
+        self._counter_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self.initialize_schema()
+
+    def _connect(self) -> ContextManager[sqlite3.Connection]:
+        return self.pool.connection()
+
+    def close(self) -> None:
+        self.pool.close()
+
+    def initialize_schema(self) -> None:
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS embedding_cache (
+                    model_name TEXT NOT NULL,
+                    text_hash TEXT NOT NULL,
+                    dimension INTEGER NOT NULL,
+                    vector BLOB NOT NULL,
+                    last_used_ns INTEGER NOT NULL,
+                    PRIMARY KEY (model_name, text_hash)
+                );
+
+                CREATE INDEX IF NOT EXISTS idx_embedding_cache_last_used
+                ON embedding_cache(last_used_ns);
+                """
+            )
+
+    def get_many(self, model_name: str, text_hashes: Sequence[str]) -> Dict[str, List[float]]:
+        """Return cached vectors for the hashes that are present and mark them recently used."""
+        return {text_hash: _decode_vector(blob) for text_hash, blob in self._lookup(model_name, text_hashes).items()}
+
+    def get_many_arrays(self, model_name: str, text_hashes: Sequence[str]) -> Dict[str, Any]:
+        """Like ``get_many`` but returns read-only float32 numpy views over the stored bytes."""
+        import numpy as np
+
+        return {
+            text_hash: np.frombuffer(blob, dtype=np.float32)
+            for text_hash, blob in self._lookup(model_name, text_hashes).items()
+        }
+
+    def _lookup(self, model_name: str, text_hashes: Sequence[str]) -> Dict[str, bytes]:
+        wanted = list(dict.fromkeys(text_hashes))
+        found: Dict[str, bytes] = {}
+        if not wanted:
+            return found
+
+        with self._connect() as conn:
+            for start in range(0, len(wanted), _LOOKUP_CHUNK):
+                chunk = wanted[start : start + _LOOKUP_CHUNK]
+                placeholders = ", ".join("?" for _ in chunk)
+                rows = conn.execute(
+                    f"""
+                    SELECT text_hash, vector FROM embedding_cache
+                    WHERE model_name = ? AND text_hash IN ({placeholders})
+                    """,
+                    [model_name, *chunk],
+                ).fetchall()
+                for row in rows:
+                    found[row["text_hash"]] = bytes(row["vector"])
+
+            if found:
+                now_ns = time.time_ns()
+                conn.executemany(
+                    "UPDATE embedding_cache SET last_used_ns = ? WHERE model_name = ? AND text_hash = ?",
+                    [(now_ns, model_name, text_hash) for text_hash in found],
+                )
+
+        with self._counter_lock:
+            self._hits += len(found)
+            self._misses += len(wanted) - len(found)
+        return found
+
+    def put_many(self, model_name: str, items: Sequence[Tuple[str, Any]]) -> None:
+        """Store vectors (float sequences or float32 numpy rows) by text hash."""
+        if not items:
+            return
+        now_ns = time.time_ns()
+        rows = [
+            (model_name, text_hash, len(vector), _encode_vector(vector), now_ns)
+            for text_hash, vector in items
+        ]
+        with self.pool.transaction() as conn:
+            conn.executemany(
+                """
+                INSERT INTO embedding_cache(model_name, text_hash, dimension, vector, last_used_ns)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(model_name, text_hash) DO UPDATE SET
+                    dimension=excluded.dimension,
+                    vector=excluded.vector,
+                    last_used_ns=excluded.last_used_ns
+                """,
+                rows,
+            )
+            excess = int(conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]) - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    """
+                    DELETE FROM embedding_cache WHERE rowid IN (
+                        SELECT rowid FROM embedding_cache ORDER BY last_used_ns ASC LIMIT ?
+                    )
+                    """,
+                    (excess,),
+                )
+                with self._counter_lock:
+                    self._evictions += excess
+
+    def count(self) -> int:
+        with self._connect() as conn:
+            return int(conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0])
+
+    def stats(self) -> EmbeddingCacheStats:
+        entries = self.count()
+        with self._counter_lock:
+            return EmbeddingCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=entries,
+            )
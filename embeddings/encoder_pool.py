@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import importlib.util
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable, List, Optional, Sequence, cast
+
+from embeddings.models import EmbeddingModel, SentenceTransformerEmbeddingModel, embed_float32
+
+ModelFactory = Callable[[], EmbeddingModel]
+
+# Set once per worker process by ``_init_worker``.
+_WORKER_MODEL: Optional[EmbeddingModel] = None
+
+
+def _init_worker(model_factory: ModelFactory, torch_threads: int) -> None:
+    global _WORKER_MODEL
+    if torch_threads > 0:
+        # Must be set before torch is imported to bound its OpenMP pool.
+        os.environ["OMP_NUM_THREADS"] = str(torch_threads)
+        os.environ["MKL_NUM_THREADS"] = str(torch_threads)
+        try:
+            import torch
+        except ImportError:
+            pass
+        else:
+            torch.set_num_threads(torch_threads)
+    _WORKER_MODEL = model_factory()
+
+
+def _worker_model() -> EmbeddingModel:
+    if _WORKER_MODEL is None:
+        raise RuntimeError("embedding worker was not initialized")
+    return _WORKER_MODEL
+
+
+def _plan_batches(texts: Sequence[str]) -> List[List[int]]:
+    # Models without their own batch plan see every text in one call, as they would in-process.
+    model = _worker_model()
+    plan = getattr(model, "plan_batches", None)
+    return plan(texts) if plan is not None else [list(range(len(texts)))]
+
+
+def _encode_batch(texts: Sequence[str]) -> Any:
+    model = _worker_model()
+    encode = getattr(model, "encode_batch", None)
+    return encode(texts) if encode is not None else embed_float32(model, texts)
+
+
+class MultiProcessEmbeddingModel:
+    """CPU embedding model that shards ``embed_texts`` across worker processes.
+
+    Each worker builds its model once (``SentenceTransformerEmbeddingModel`` unless a
+    picklable ``model_factory`` is given) and limits torch to ``torch_threads``
+    threads, so ``workers * torch_threads`` should not exceed the core count. One worker
+    plans the batches with the model's own ``plan_batches`` (the token-budget plan of
+    ``SentenceTransformerEmbeddingModel``), and every planned batch is then encoded by
+    some worker with ``encode_batch``. Batches are therefore padded exactly as the
+    single-process model pads them, and results are written back in input order.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        *,
+        workers: int = 0,
+        torch_threads: int = 1,
+        max_tokens_per_batch: int = 16_384,
+        max_batch_size: int = 256,
+        device: str = "cpu",
+        local_files_only: bool = False,
+        normalize_embeddings: bool = True,
+        model_factory: Optional[ModelFactory] = None,
+        start_method: str = "spawn",
+    ) -> None:
+        if model_factory is None:
+            if importlib.util.find_spec("sentence_transformers") is None:
+                raise RuntimeError(
+                    "sentence-transformers is required for local embedding generation. "
+                    "Install optional deps with: pip install .[embeddings]"
+                )
+            model_factory = partial(
+                SentenceTransformerEmbeddingModel,
+                model_name,
+                device=device,
+                local_files_only=local_files_only,
+                normalize_embeddings=normalize_embeddings,
+                max_tokens_per_batch=max_tokens_per_batch,
+                max_batch_size=max_batch_size,
+            )
+
+        self.model_name = model_name
+        self.workers = workers or max(1, (os.cpu_count() or 1) // max(torch_threads, 1))
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(start_method),
+            initializer=_init_worker,
+            initargs=(model_factory, torch_threads),
+        )
+
+    def embed_texts(self, texts: Sequence[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return cast(List[List[float]], self.embed_array(texts).tolist())
+
+    def embed_array(self, texts: Sequence[str]) -> Any:
+        import numpy as np
+
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        try:
+            batches: List[List[int]] = self._executor.submit(_plan_batches, list(texts)).result()
+            futures = [self._executor.submit(_encode_batch, [texts[idx] for idx in batch]) for batch in batches]
+            output: Any = None
+            for batch, future in zip(batches, futures):
+                vectors = future.result()
+                if len(vectors) != len(batch):
+                    raise ValueError("Embedding model returned vector count mismatch")
+                if output is None:
+                    output = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+                output[batch] = vectors
+        except BrokenProcessPool as exc:
+            raise RuntimeError(f"embedding worker process failed for model {self.model_name!r}") from exc
+        return output
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> "MultiProcessEmbeddingModel":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
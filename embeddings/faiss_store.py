@@ -1,8 +1,29 @@
 from __future__ import annotations
 
-import json
+import os
+import threading
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, List, Sequence, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from embeddings.id_table import IdTable, write_id_table
+from embeddings.vector_store import VectorAttributes, VectorBatch, VectorFilter
+
+FileGeneration = Tuple[int, ...]
+ID_TABLE_FORMAT = 2
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+# How non-PQ index types store each vector: FAISS storage codec per encoding.
+VECTOR_ENCODINGS = {"float32": "Flat", "fp16": "SQfp16", "int8": "SQ8"}
+# Positional IndexFlatIP written before vectors were keyed by label.
+_LEGACY_FACTORY = "Flat"
+# k-means wants at least this many training points per centroid.
+_MIN_POINTS_PER_CENTROID = 39
+# int8 ranges fitted on fewer vectors clip too much of what is added later.
+_MIN_INT8_TRAINING_POINTS = 1_000
+# Filters matching at most this many HNSW vectors are scored exactly: graph search
+# through a sparse selection misses most of the matches, and a scan this size is cheap.
+_EXACT_FILTER_LIMIT = 5_000
 
 
 def _ensure_2d_float32(vectors: Sequence[Sequence[float]]) -> Any:
@@ -25,14 +46,154 @@ def _normalize_rows(vectors: Any) -> Any:
     return vectors / norms
 
 
+def _write_atomic(path: Path, write: Any) -> None:
+    """Write through a sibling temp file and rename it over ``path``.
+
+    Readers that memory-mapped or opened the previous file keep a consistent copy.
+    """
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+@dataclass(frozen=True)
+class FaissIndexConfig:
+    """Index family and tuning knobs for ``LocalFaissStore``.
+
+    ``flat`` is exact search. ``ivf_flat`` and ``ivf_pq`` cluster vectors into ``nlist``
+    lists (``0`` picks about ``4 * sqrt(n)``) and scan ``nprobe`` of them per query;
+    ``ivf_pq`` also compresses vectors to ``pq_m`` codes of ``pq_bits`` bits. ``hnsw``
+    builds a graph with ``hnsw_m`` links per node and explores ``ef_search`` candidates
+    per query. Trained indexes fit on at most ``train_sample_size`` sampled vectors.
+    The build-time family is recorded in the metadata; ``nprobe`` and ``ef_search``
+    apply to whatever index is loaded.
+
+    ``vector_encoding`` sets how ``flat``, ``ivf_flat`` and ``hnsw`` store vectors:
+    ``float32`` (4 bytes per dimension), ``fp16`` (2 bytes) or ``int8`` (1 byte, a
+    per-dimension min/max scalar quantizer trained like an IVF index). The trained
+    quantizer ranges are saved inside the FAISS index file and are not refitted by
+    ``upsert``; values outside them are clipped until the next rebuild.
+    """
+
+    index_type: str = "flat"
+    nlist: int = 0
+    nprobe: int = 16
+    pq_m: int = 16
+    pq_bits: int = 8
+    hnsw_m: int = 32
+    ef_construction: int = 200
+    ef_search: int = 64
+    train_sample_size: int = 100_000
+    seed: int = 7
+    vector_encoding: str = "float32"
+
+    def __post_init__(self) -> None:
+        if self.index_type not in INDEX_TYPES:
+            raise ValueError(f"index_type must be one of {', '.join(INDEX_TYPES)}; got {self.index_type!r}")
+        if self.vector_encoding not in VECTOR_ENCODINGS:
+            raise ValueError(
+                f"vector_encoding must be one of {', '.join(VECTOR_ENCODINGS)}; got {self.vector_encoding!r}"
+            )
+        if self.index_type == "ivf_pq" and self.vector_encoding != "float32":
+            raise ValueError("ivf_pq already compresses vectors; vector_encoding must be float32")
+
+    @property
+    def needs_training_sample(self) -> bool:
+        """Whether builds must buffer vectors to train on before adding any."""
+        return self.index_type in ("ivf_flat", "ivf_pq") or self.vector_encoding == "int8"
+
+    def factory_string(self, dimension: int, vector_count: int) -> Tuple[str, str]:
+        """Return (effective index type, FAISS factory string) for a corpus of this size.
+
+        IVF variants fall back to ``flat`` and ``int8`` encoding to ``fp16`` when there
+        are too few vectors to train them.
+        """
+        index_type = self.index_type
+        training_count = min(vector_count, self.train_sample_size)
+        codec = VECTOR_ENCODINGS[self.vector_encoding]
+        if self.vector_encoding == "int8" and training_count < _MIN_INT8_TRAINING_POINTS:
+            codec = VECTOR_ENCODINGS["fp16"]
+        if index_type in ("ivf_flat", "ivf_pq"):
+            nlist = self.nlist or max(1, int(4 * vector_count**0.5))
+            nlist = min(nlist, training_count // _MIN_POINTS_PER_CENTROID)
+            if index_type == "ivf_pq":
+                if dimension % self.pq_m != 0:
+                    raise ValueError(f"pq_m={self.pq_m} must divide the vector dimension {dimension}")
+                if training_count < _MIN_POINTS_PER_CENTROID * (1 << self.pq_bits):
+                    nlist = 0
+            if nlist < 1:
+                return "flat", f"IDMap2,{codec}"
+            # IVF lists store labels themselves; IDMap2 would renumber them wrongly on removal.
+            if index_type == "ivf_flat":
+                return index_type, f"IVF{nlist},{codec}"
+            return index_type, f"IVF{nlist},PQ{self.pq_m}x{self.pq_bits}"
+        if index_type == "hnsw":
+            storage = "" if codec == "Flat" else f"_{codec}"
+            return index_type, f"IDMap2,HNSW{self.hnsw_m}{storage}"
+        return "flat", f"IDMap2,{codec}"
+
+
+@dataclass(frozen=True)
+class _IndexLayout:
+    dimension: int
+    index_type: str
+    index_factory: str
+    # The ``FaissIndexConfig`` family and encoding the index was built for; ``index_type``
+    # is what was actually built (IVF falls back to flat on small corpora).
+    configured_type: str = "flat"
+    vector_encoding: str = "float32"
+
+
+@dataclass(frozen=True)
+class _ResidentIndex:
+    index: Any
+    ids: IdTable
+    layout: _IndexLayout
+    generation: FileGeneration
+
+
 class LocalFaissStore:
-    """Persistent local FAISS index with canonical ID metadata."""
+    """Persistent local FAISS index with canonical ID metadata.
+
+    Vectors are keyed by stable int64 labels (an ``IndexIDMap2`` wrapper, or the IVF
+    lists themselves), so single documents can be replaced or removed without
+    rebuilding (HNSW graphs, which cannot delete in place, are rebuilt from their
+    stored vectors). ``index_config`` selects exact or approximate search; see
+    ``FaissIndexConfig``.
+
+    The metadata file is a memory-mapped binary ``IdTable`` mapping each label to its
+    canonical id and an optional caller-supplied fingerprint, with a header recording
+    dimension, index type, vector encoding and ``model_name``. JSON metadata written by earlier versions
+    is still readable and is rewritten in the binary format on the next write.
 
-    def __init__(self, index_path: str, metadata_path: str) -> None:
+    The index and its id table stay resident after the first load. Each call stats
+    both files and reloads only when their generation (inode, size, mtime) changes,
+    swapping the resident copy under a lock so concurrent searches always see a
+    matching index and id table. Writers never mutate the resident index in place,
+    and drop it before replacing the files so no mapping of them is left open.
+    ``memory_map`` defaults to off on Windows, where a mapped file cannot be replaced
+    while any search still holds it.
+    """
+
+    def __init__(
+        self,
+        index_path: str,
+        metadata_path: str,
+        *,
+        memory_map: Optional[bool] = None,
+        index_config: Optional[FaissIndexConfig] = None,
+        model_name: str = "",
+    ) -> None:
         self.index_path = Path(index_path)
         self.metadata_path = Path(metadata_path)
+        self.memory_map = os.name != "nt" if memory_map is None else memory_map
+        self.index_config = index_config or FaissIndexConfig()
+        self.model_name = model_name
         self.index_path.parent.mkdir(parents=True, exist_ok=True)
         self.metadata_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._resident: Optional[_ResidentIndex] = None
 
     def _load_faiss(self) -> Any:
         try:
@@ -43,59 +204,524 @@ class LocalFaissStore:
             ) from exc
         return faiss
 
-    def rebuild(self, canonical_ids: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+    def rebuild(
+        self,
+        canonical_ids: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+        *,
+        fingerprints: Optional[Sequence[str]] = None,
+        attributes: Optional[Sequence[VectorAttributes]] = None,
+    ) -> None:
         if len(canonical_ids) != len(vectors):
             raise ValueError("canonical_ids and vectors must have the same length")
+        if fingerprints is not None and len(fingerprints) != len(canonical_ids):
+            raise ValueError("fingerprints and canonical_ids must have the same length")
+        if attributes is not None and len(attributes) != len(canonical_ids):
+            raise ValueError("attributes and canonical_ids must have the same length")
         if not canonical_ids:
             raise ValueError("cannot build FAISS index with zero vectors")
 
-        vector_array = _ensure_2d_float32(vectors)
-        vector_array = _normalize_rows(vector_array)
-        dimension = int(vector_array.shape[1])
+        with self._write_lock:
+            self._rebuild_locked(
+                [
+                    VectorBatch(
+                        canonical_ids=canonical_ids,
+                        vectors=vectors,
+                        fingerprints=fingerprints,
+                        attributes=attributes,
+                    )
+                ],
+                len(canonical_ids),
+            )
 
-        faiss = self._load_faiss()
-        index = faiss.IndexFlatIP(dimension)
-        index.add(vector_array)
-        faiss.write_index(index, str(self.index_path))
-
-        metadata = {"dimension": dimension, "canonical_ids": list(canonical_ids)}
-        self.metadata_path.write_text(
-            json.dumps(metadata, ensure_ascii=True, separators=(",", ":"), indent=2),
-            encoding="utf-8",
+    def rebuild_from_batches(self, batches: Iterable[VectorBatch], *, expected_count: int = 0) -> int:
+        """Replace the index from streamed float32 batches, adding each as it arrives.
+
+        Only the current batch is held, except for trained layouts (IVF types and
+        ``int8`` encoding), which buffer up to ``train_sample_size`` vectors to train
+        on before adding. ``expected_count`` sizes the IVF list count when the stream
+        is longer than that buffer.
+        """
+        with self._write_lock:
+            return self._rebuild_locked(batches, expected_count)
+
+    def upsert(
+        self,
+        canonical_ids: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+        *,
+        fingerprints: Optional[Sequence[str]] = None,
+        attributes: Optional[Sequence[VectorAttributes]] = None,
+    ) -> None:
+        """Add or replace vectors by canonical id; other documents keep their vectors."""
+        if len(canonical_ids) != len(vectors):
+            raise ValueError("canonical_ids and vectors must have the same length")
+        if fingerprints is not None and len(fingerprints) != len(canonical_ids):
+            raise ValueError("fingerprints and canonical_ids must have the same length")
+        if attributes is not None and len(attributes) != len(canonical_ids):
+            raise ValueError("attributes and canonical_ids must have the same length")
+        if not canonical_ids:
+            return
+
+        import numpy as np
+
+        with self._write_lock:
+            resident = self._current()
+            if resident is None:
+                self._rebuild_locked(
+                    [
+                        VectorBatch(
+                            canonical_ids=canonical_ids,
+                            vectors=vectors,
+                            fingerprints=fingerprints,
+                            attributes=attributes,
+                        )
+                    ],
+                    len(canonical_ids),
+                )
+                return
+
+            vector_array = _normalize_rows(_ensure_2d_float32(vectors))
+            if vector_array.shape[1] != resident.layout.dimension:
+                raise ValueError(
+                    f"vector dimension mismatch: expected {resident.layout.dimension}, got {vector_array.shape[1]}"
+                )
+
+            # Later duplicates of the same id win.
+            row_by_id = {canonical_id: row for row, canonical_id in enumerate(canonical_ids)}
+            rows = sorted(row_by_id.values())
+            id_by_label = resident.ids.id_by_label()
+            label_by_id = {canonical_id: label for label, canonical_id in id_by_label.items()}
+            fingerprint_by_id = resident.ids.fingerprints()
+            attribute_by_id = resident.ids.attributes()
+
+            index, layout = self._writable_index(resident)
+            replaced = [label_by_id[canonical_ids[row]] for row in rows if canonical_ids[row] in label_by_id]
+            if replaced:
+                index = self._remove_labels(index, replaced, layout)
+
+            next_label = max(id_by_label, default=-1) + 1
+            labels: List[int] = []
+            for row in rows:
+                canonical_id = canonical_ids[row]
+                label = label_by_id.get(canonical_id)
+                if label is None:
+                    label = next_label
+                    next_label += 1
+                    id_by_label[label] = canonical_id
+                labels.append(label)
+                if fingerprints is not None:
+                    fingerprint_by_id[canonical_id] = fingerprints[row]
+                else:
+                    fingerprint_by_id.pop(canonical_id, None)
+                if attributes is not None:
+                    attribute_by_id[canonical_id] = attributes[row]
+                else:
+                    attribute_by_id.pop(canonical_id, None)
+
+            index.add_with_ids(vector_array[rows], np.asarray(labels, dtype=np.int64))
+            del resident
+            self._persist(index, id_by_label, fingerprint_by_id, attribute_by_id, layout)
+
+    def delete(self, canonical_ids: Iterable[str]) -> int:
+        """Remove vectors for ``canonical_ids``; returns how many were present."""
+        with self._write_lock:
+            resident = self._current()
+            if resident is None:
+                return 0
+            targets = set(canonical_ids)
+            current_ids = resident.ids.id_by_label()
+            removed = [label for label, canonical_id in current_ids.items() if canonical_id in targets]
+            if not removed:
+                return 0
+
+            index, layout = self._writable_index(resident)
+            index = self._remove_labels(index, removed, layout)
+            id_by_label = {
+                label: canonical_id
+                for label, canonical_id in current_ids.items()
+                if canonical_id not in targets
+            }
+            fingerprint_by_id = {
+                canonical_id: fingerprint
+                for canonical_id, fingerprint in resident.ids.fingerprints().items()
+                if canonical_id not in targets
+            }
+            attribute_by_id = {
+                canonical_id: item
+                for canonical_id, item in resident.ids.attributes().items()
+                if canonical_id not in targets
+            }
+            del resident
+            self._persist(index, id_by_label, fingerprint_by_id, attribute_by_id, layout)
+            return len(removed)
+
+    def fingerprints(self) -> Dict[str, str]:
+        """Fingerprints recorded for indexed documents, keyed by canonical id."""
+        resident = self._current()
+        return resident.ids.fingerprints() if resident is not None else {}
+
+    def matches_build(self, dimension: int = 0) -> bool:
+        """Whether the stored index was built for this ``model_name`` and ``index_config``.
+
+        Compares the id table header with the store's settings: model name, configured
+        index family, vector encoding and, when ``dimension`` is given, the vector
+        dimension. An empty store matches anything.
+        """
+        resident = self._current()
+        if resident is None:
+            return True
+        layout = resident.layout
+        return (
+            str(resident.ids.header.get("model_name", "")) == self.model_name
+            and dimension in (0, layout.dimension)
+            and layout.configured_type == self.index_config.index_type
+            and layout.vector_encoding == self.index_config.vector_encoding
         )
 
-    def search(self, query_vector: Sequence[float], top_k: int = 5) -> List[Tuple[str, float]]:
-        if top_k <= 0:
-            return []
-        if not self.index_path.exists() or not self.metadata_path.exists():
-            return []
+    def _rebuild_locked(self, batches: Iterable[VectorBatch], expected_count: int) -> int:
+        import numpy as np
 
         faiss = self._load_faiss()
-        metadata = json.loads(self.metadata_path.read_text(encoding="utf-8"))
-        canonical_ids = metadata["canonical_ids"]
-        dimension = int(metadata["dimension"])
+        buffer_for_training = self.index_config.needs_training_sample
+        pending: List[Tuple[VectorBatch, Any]] = []
+        pending_rows = 0
+        index: Any = None
+        layout: Optional[_IndexLayout] = None
+        canonical_ids: List[str] = []
+        fingerprint_by_id: Dict[str, str] = {}
+        attribute_by_id: Dict[str, VectorAttributes] = {}
 
-        query_array = _ensure_2d_float32([query_vector])
-        if query_array.shape[1] != dimension:
-            raise ValueError(
-                f"query vector dimension mismatch: expected {dimension}, got {query_array.shape[1]}"
+        def add(batch: VectorBatch, vector_array: Any) -> None:
+            first_label = len(canonical_ids)
+            labels = np.arange(first_label, first_label + len(vector_array), dtype=np.int64)
+            index.add_with_ids(vector_array, labels)
+            canonical_ids.extend(batch.canonical_ids)
+            if batch.fingerprints is not None:
+                fingerprint_by_id.update(zip(batch.canonical_ids, batch.fingerprints))
+            if batch.attributes is not None:
+                attribute_by_id.update(zip(batch.canonical_ids, batch.attributes))
+
+        def start(dimension: int, vector_count: int) -> Tuple[Any, _IndexLayout]:
+            index_type, index_factory = self.index_config.factory_string(dimension, vector_count)
+            new_index = faiss.index_factory(dimension, index_factory, faiss.METRIC_INNER_PRODUCT)
+            self._configure_build(faiss, new_index)
+            if not new_index.is_trained:
+                new_index.train(self._training_sample(np.concatenate([vectors for _, vectors in pending])))
+            return new_index, _IndexLayout(
+                dimension=dimension,
+                index_type=index_type,
+                index_factory=index_factory,
+                configured_type=self.index_config.index_type,
+                vector_encoding=self.index_config.vector_encoding,
             )
-        query_array = _normalize_rows(query_array)
 
-        index = faiss.read_index(str(self.index_path))
-        distances, indices = index.search(query_array, top_k)
+        dimension = 0
+        for batch in batches:
+            vector_array = _normalize_rows(_ensure_2d_float32(batch.vectors))
+            if len(batch.canonical_ids) != len(vector_array):
+                raise ValueError("canonical_ids and vectors must have the same length")
+            if batch.fingerprints is not None and len(batch.fingerprints) != len(batch.canonical_ids):
+                raise ValueError("fingerprints and canonical_ids must have the same length")
+            if batch.attributes is not None and len(batch.attributes) != len(batch.canonical_ids):
+                raise ValueError("attributes and canonical_ids must have the same length")
+            if len(vector_array) == 0:
+                continue
+            if dimension and vector_array.shape[1] != dimension:
+                raise ValueError(f"vector dimension mismatch: expected {dimension}, got {vector_array.shape[1]}")
+            dimension = int(vector_array.shape[1])
 
-        results: List[Tuple[str, float]] = []
-        for idx, score in zip(indices[0], distances[0]):
-            if idx < 0:
+            if index is not None:
+                add(batch, vector_array)
                 continue
-            if idx >= len(canonical_ids):
+            pending.append((batch, vector_array))
+            pending_rows += len(vector_array)
+            if buffer_for_training and pending_rows < self.index_config.train_sample_size:
                 continue
-            results.append((canonical_ids[idx], float(score)))
-        return results
+            index, layout = start(dimension, max(expected_count, pending_rows))
+            for pending_batch, pending_vectors in pending:
+                add(pending_batch, pending_vectors)
+            pending = []
+
+        if index is None:
+            if not pending:
+                raise ValueError("cannot build FAISS index with zero vectors")
+            index, layout = start(dimension, pending_rows)
+            for pending_batch, pending_vectors in pending:
+                add(pending_batch, pending_vectors)
+        assert layout is not None
+
+        self._persist(index, dict(enumerate(canonical_ids)), fingerprint_by_id, attribute_by_id, layout)
+        return len(canonical_ids)
+
+    def _training_sample(self, vector_array: Any) -> Any:
+        import numpy as np
+
+        sample_size = self.index_config.train_sample_size
+        if len(vector_array) <= sample_size:
+            return vector_array
+        rng = np.random.default_rng(self.index_config.seed)
+        rows = np.sort(rng.choice(len(vector_array), size=sample_size, replace=False))
+        return vector_array[rows]
+
+    def _configure_build(self, faiss: Any, index: Any) -> None:
+        sub_index = faiss.downcast_index(index.index) if hasattr(index, "id_map") else index
+        hnsw = getattr(sub_index, "hnsw", None)
+        if hnsw is not None:
+            hnsw.efConstruction = self.index_config.ef_construction
+
+    def _apply_search_params(self, faiss: Any, index: Any) -> None:
+        params = faiss.ParameterSpace()
+        for name, value in (("nprobe", self.index_config.nprobe), ("efSearch", self.index_config.ef_search)):
+            try:
+                params.set_index_parameter(index, name, value)
+            except RuntimeError:
+                # Parameter does not apply to this index family.
+                continue
+
+    @staticmethod
+    def _exact_search(index: Any, query_array: Any, top_k: int, labels: Any) -> Tuple[Any, Any]:
+        """Score ``labels`` exhaustively from their stored (decoded) vectors."""
+        import numpy as np
+
+        scores = query_array @ index.reconstruct_batch(labels).T
+        k = min(top_k, len(labels))
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top = np.take_along_axis(top, np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1), axis=1)
+        return np.take_along_axis(scores, top, axis=1), labels[top]
+
+    def _filter_params(self, resident: _ResidentIndex, labels: Any, top_k: int) -> Any:
+        """Search parameters restricting results to ``labels`` via an ``IDSelectorBitmap``.
+
+        IVF probes more lists as the selection shrinks (``nprobe`` divided by the matching
+        fraction), so a filtered query still sees about ``nprobe`` lists' worth of
+        matches; HNSW widens ``ef_search`` by the inverse square root of it.
+
+        FAISS holds raw pointers to the selector and bitmap, so the returned parameters
+        keep Python references to both.
+        """
+        import numpy as np
+
+        faiss = self._load_faiss()
+        bits = np.zeros(int(labels[-1]) + 1, dtype=bool)
+        bits[labels] = True
+        bitmap = np.packbits(bits, bitorder="little")
+        selector = faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap))
+        index_type = resident.layout.index_type
+        scale = len(resident.ids) / len(labels)
+        if index_type in ("ivf_flat", "ivf_pq"):
+            nprobe = min(int(resident.index.nlist), int(self.index_config.nprobe * scale + 0.5))
+            params = faiss.SearchParametersIVF(sel=selector, nprobe=nprobe)
+        elif index_type == "hnsw":
+            ef_search = int(max(self.index_config.ef_search, top_k) * scale**0.5 + 0.5)
+            params = faiss.SearchParametersHNSW(sel=selector, efSearch=ef_search)
+        else:
+            params = faiss.SearchParameters(sel=selector)
+        params.referenced_objects = [selector, bitmap]
+        return params
+
+    def _remove_labels(self, index: Any, labels: Sequence[int], layout: _IndexLayout) -> Any:
+        import numpy as np
+
+        label_array = np.asarray(labels, dtype=np.int64)
+        try:
+            index.remove_ids(label_array)
+            return index
+        except RuntimeError:
+            pass
+        # Graph indexes (HNSW) cannot delete in place; rebuild from their stored vectors.
+        faiss = self._load_faiss()
+        kept_labels = faiss.vector_to_array(index.id_map).astype(np.int64)
+        vectors = faiss.downcast_index(index.index).reconstruct_n(0, index.ntotal)
+        keep = ~np.isin(kept_labels, label_array)
+        rebuilt = faiss.index_factory(layout.dimension, layout.index_factory, faiss.METRIC_INNER_PRODUCT)
+        self._configure_build(faiss, rebuilt)
+        if not rebuilt.is_trained:
+            rebuilt.train(self._training_sample(vectors))
+        rebuilt.add_with_ids(vectors[keep], kept_labels[keep])
+        return rebuilt
+
+    def _writable_index(self, resident: _ResidentIndex) -> Tuple[Any, _IndexLayout]:
+        """Private in-memory copy of the on-disk index, converted to an id map if needed."""
+        import numpy as np
+
+        faiss = self._load_faiss()
+        index = faiss.read_index(str(self.index_path))
+        layout = resident.layout
+        if layout.index_factory != _LEGACY_FACTORY:
+            return index, layout
+        # Indexes written before id mapping used row positions as labels.
+        vectors = index.reconstruct_n(0, index.ntotal)
+        id_map = faiss.index_factory(layout.dimension, "IDMap2,Flat", faiss.METRIC_INNER_PRODUCT)
+        id_map.add_with_ids(vectors, np.asarray(sorted(resident.ids.id_by_label()), dtype=np.int64))
+        return id_map, _IndexLayout(dimension=layout.dimension, index_type="flat", index_factory="IDMap2,Flat")
+
+    def _persist(
+        self,
+        index: Any,
+        id_by_label: Dict[int, str],
+        fingerprint_by_id: Dict[str, str],
+        attribute_by_id: Dict[str, VectorAttributes],
+        layout: _IndexLayout,
+    ) -> None:
+        faiss = self._load_faiss()
+        labels = sorted(id_by_label)
+        canonical_ids = [id_by_label[label] for label in labels]
+        empty = VectorAttributes()
+        header = {
+            "format": ID_TABLE_FORMAT,
+            "dimension": layout.dimension,
+            "index_type": layout.index_type,
+            "index_factory": layout.index_factory,
+            "configured_index_type": layout.configured_type,
+            "vector_encoding": layout.vector_encoding,
+            "model_name": self.model_name,
+        }
+        self._apply_search_params(faiss, index)
+        with self._lock:
+            # Searches wait here rather than map the old files again: Windows cannot
+            # replace a file while a mapping of it is open.
+            self._resident = None
+            _write_atomic(self.index_path, lambda path: faiss.write_index(index, str(path)))
+            _write_atomic(
+                self.metadata_path,
+                lambda path: write_id_table(
+                    path,
+                    labels=labels,
+                    canonical_ids=canonical_ids,
+                    fingerprints=[fingerprint_by_id.get(canonical_id, "") for canonical_id in canonical_ids],
+                    attributes=[attribute_by_id.get(canonical_id, empty) for canonical_id in canonical_ids],
+                    header=header,
+                ),
+            )
+            generation = self._file_generation()
+            if generation is None:
+                return
+            ids = IdTable.open(self.metadata_path, memory_map=self.memory_map)
+            self._resident = _ResidentIndex(index=index, ids=ids, layout=layout, generation=generation)
+
+    def _file_generation(self) -> Optional[FileGeneration]:
+        try:
+            index_stat = os.stat(self.index_path)
+            metadata_stat = os.stat(self.metadata_path)
+        except FileNotFoundError:
+            return None
+        return (
+            index_stat.st_ino,
+            index_stat.st_size,
+            index_stat.st_mtime_ns,
+            metadata_stat.st_ino,
+            metadata_stat.st_size,
+            metadata_stat.st_mtime_ns,
+        )
+
+    def _read_index(self, faiss: Any) -> Any:
+        if self.memory_map:
+            try:
+                return faiss.read_index(
+                    str(self.index_path), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+                )
+            except (AttributeError, RuntimeError):
+                pass
+        return faiss.read_index(str(self.index_path))
+
+    def _current(self) -> Optional[_ResidentIndex]:
+        generation = self._file_generation()
+        if generation is None:
+            return None
+        resident = self._resident
+        if resident is not None and resident.generation == generation:
+            return resident
+
+        with self._lock:
+            resident = self._resident
+            if resident is not None and resident.generation == generation:
+                return resident
+            faiss = self._load_faiss()
+            ids = IdTable.open(self.metadata_path, memory_map=self.memory_map)
+            index = self._read_index(faiss)
+            if int(index.ntotal) != len(ids):
+                # A writer in another process replaced one file but not yet the other;
+                # keep serving the previous copy and retry on the next call.
+                return resident
+            self._apply_search_params(faiss, index)
+            loaded = _ResidentIndex(
+                index=index,
+                ids=ids,
+                layout=_IndexLayout(
+                    dimension=int(ids.header["dimension"]),
+                    index_type=str(ids.header.get("index_type", "flat")),
+                    index_factory=str(ids.header.get("index_factory", _LEGACY_FACTORY)),
+                    configured_type=str(
+                        ids.header.get("configured_index_type", ids.header.get("index_type", "flat"))
+                    ),
+                    vector_encoding=str(ids.header.get("vector_encoding", "float32")),
+                ),
+                generation=generation,
+            )
+            self._resident = loaded
+            return loaded
+
+    def search(
+        self, query_vector: Sequence[float], top_k: int = 5, *, where: Optional[VectorFilter] = None
+    ) -> List[Tuple[str, float]]:
+        return self.search_many([query_vector], top_k=top_k, where=where)[0]
+
+    def search_many(
+        self,
+        query_vectors: Sequence[Sequence[float]],
+        top_k: int = 5,
+        *,
+        where: Optional[VectorFilter] = None,
+    ) -> List[List[Tuple[str, float]]]:
+        """Search every row of ``query_vectors`` in one FAISS call.
+
+        ``where`` is evaluated over the id table's attribute columns and passed to FAISS
+        as a label bitmap, so the index only scores matching vectors and each query
+        still returns up to ``top_k`` matches. Small HNSW selections are scored exactly.
+        """
+        if len(query_vectors) == 0:
+            return []
+        if top_k <= 0:
+            return [[] for _ in range(len(query_vectors))]
+        resident = self._current()
+        if resident is None:
+            return [[] for _ in range(len(query_vectors))]
+
+        query_array = _ensure_2d_float32(query_vectors)
+        if query_array.shape[1] != resident.layout.dimension:
+            raise ValueError(
+                f"query vector dimension mismatch: expected {resident.layout.dimension}, got {query_array.shape[1]}"
+            )
+        query_array = _normalize_rows(query_array)
+
+        selected = resident.ids.select_labels(where) if where is not None else None
+        if selected is not None and len(selected) == 0:
+            return [[] for _ in range(len(query_vectors))]
+        if selected is None or len(selected) == len(resident.ids):
+            distances, indices = resident.index.search(query_array, top_k)
+        elif resident.layout.index_type == "hnsw" and len(selected) <= _EXACT_FILTER_LIMIT:
+            distances, indices = self._exact_search(resident.index, query_array, top_k, selected)
+        else:
+            params = self._filter_params(resident, selected, top_k)
+            distances, indices = resident.index.search(query_array, top_k, params=params)
+
+        ids = resident.ids
+        batches: List[List[Tuple[str, float]]] = []
+        for row_labels, row_distances in zip(indices, distances):
+            results: List[Tuple[str, float]] = []
+            for label, score in zip(row_labels, row_distances):
+                canonical_id = ids.canonical_id(int(label))
+                if canonical_id is None:
+                    continue
+                results.append((canonical_id, float(score)))
+            batches.append(results)
+        return batches
 
     def count(self) -> int:
-        if not self.metadata_path.exists():
-            return 0
-        metadata = json.loads(self.metadata_path.read_text(encoding="utf-8"))
-        return len(metadata.get("canonical_ids", []))
+        resident = self._current()
+        return len(resident.ids) if resident is not None else 0
+
+    def dimension(self) -> int:
+        resident = self._current()
+        return resident.layout.dimension if resident is not None else 0
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from embeddings.indexer import EmbeddingIndexer
+from embeddings.vector_store import VectorFilter
+from storage.sqlite_store import CanonicalQuery, SQLiteStore
+
+# Conventional RRF damping constant: ranks past a few dozen contribute little.
+DEFAULT_RRF_K = 60
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Tuple[str, float]]],
+    *,
+    k: int = DEFAULT_RRF_K,
+    top_k: Optional[int] = None,
+) -> List[Tuple[str, float]]:
+    """Fuse ranked ``(canonical_id, score)`` lists by summing ``1 / (k + rank)``.
+
+    Only ranks are used, so BM25 and cosine scores need no common scale. Ties are
+    broken by canonical id so results are deterministic.
+    """
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, (canonical_id, _) in enumerate(ranking, start=1):
+            fused[canonical_id] = fused.get(canonical_id, 0.0) + 1.0 / (k + rank)
+    ordered = sorted(fused.items(), key=lambda item: (-item[1], item[0]))
+    return ordered if top_k is None else ordered[:top_k]
+
+
+def _canonical_query(where: Optional[VectorFilter]) -> Optional[CanonicalQuery]:
+    if where is None:
+        return None
+    return CanonicalQuery(
+        anchor_from=where.anchor_from,
+        anchor_to=where.anchor_to,
+        domains=where.domains,
+        source_record_types=where.source_record_types,
+    )
+
+
+class HybridRetriever:
+    """BM25 (SQLite FTS5) and dense-vector retrieval fused with reciprocal rank fusion.
+
+    Each path contributes its best ``top_k * candidate_multiplier`` hits. Without an
+    ``indexer``, or when the embedding model cannot be loaded, only the lexical path
+    runs, which needs no model and answers in milliseconds. ``where`` filters both
+    paths with the same predicates.
+    """
+
+    def __init__(
+        self,
+        store: SQLiteStore,
+        indexer: Optional[EmbeddingIndexer] = None,
+        *,
+        rrf_k: int = DEFAULT_RRF_K,
+        candidate_multiplier: int = 4,
+    ) -> None:
+        if candidate_multiplier < 1:
+            raise ValueError("candidate_multiplier must be at least 1")
+        self.store = store
+        self.indexer = indexer
+        self.rrf_k = rrf_k
+        self.candidate_multiplier = candidate_multiplier
+
+    def search(self, text: str, top_k: int = 5, *, where: Optional[VectorFilter] = None) -> List[Tuple[str, float]]:
+        if top_k <= 0 or not text.strip():
+            return []
+        candidates = top_k * self.candidate_multiplier
+        rankings = [self.store.search_text(text, limit=candidates, query=_canonical_query(where))]
+        if self.indexer is not None:
+            try:
+                rankings.append(self.indexer.query(text, top_k=candidates, where=where))
+            except RuntimeError:
+                # Model or index unavailable (e.g. optional deps missing): lexical only.
+                pass
+        return reciprocal_rank_fusion(rankings, k=self.rrf_k, top_k=top_k)
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import json
+import struct
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+from embeddings.vector_store import VectorAttributes, VectorFilter
+
+MAGIC = b"CTIDTBL1"
+_HEADER_LENGTH = struct.Struct("<I")
+_ALIGNMENT = 8
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+# Anchor column value for vectors without an anchor time.
+NO_ANCHOR = -(2**63)
+
+
+def _load_numpy() -> Any:
+    try:
+        import numpy as np
+    except ImportError as exc:
+        raise RuntimeError("numpy is required for FAISS vector storage. Install with: pip install .[embeddings]") from exc
+    return np
+
+
+def _fixed_width(values: Sequence[str]) -> Any:
+    np = _load_numpy()
+    encoded = [value.encode("utf-8") for value in values]
+    width = max((len(value) for value in encoded), default=0)
+    return np.array(encoded, dtype=f"S{max(width, 1)}")
+
+
+def _normalize_domain(domain: str) -> str:
+    return domain.strip().lower()
+
+
+def _anchor_micros(value: Optional[datetime]) -> int:
+    if value is None:
+        return NO_ANCHOR
+    utc = value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+    return (utc - _EPOCH) // _MICROSECOND
+
+
+def _codes(values: Sequence[str]) -> Any:
+    """Encode strings as int32 codes into a vocabulary whose code 0 is ``""``."""
+    np = _load_numpy()
+    vocabulary = [""] + sorted(set(values) - {""})
+    code_by_value = {value: code for code, value in enumerate(vocabulary)}
+    return vocabulary, np.asarray([code_by_value[value] for value in values], dtype="<i4")
+
+
+def write_id_table(
+    path: Path,
+    *,
+    labels: Sequence[int],
+    canonical_ids: Sequence[str],
+    fingerprints: Sequence[str],
+    header: Mapping[str, Any],
+    attributes: Optional[Sequence[VectorAttributes]] = None,
+) -> None:
+    """Write the label -> canonical id table used by ``LocalFaissStore``.
+
+    Layout: ``MAGIC``, a little-endian uint32 header length, a JSON header, padding to
+    8 bytes, then columns of ``count`` rows sorted by label: int64 labels, int64 anchor
+    microseconds since the epoch (``NO_ANCHOR`` if unset), int32 domain and source
+    record type codes into vocabularies listed in the header, fixed-width UTF-8
+    canonical ids and fixed-width fingerprints. Domains are stored lowercased.
+    """
+    np = _load_numpy()
+    if not (len(labels) == len(canonical_ids) == len(fingerprints)):
+        raise ValueError("labels, canonical_ids and fingerprints must have the same length")
+    if attributes is None:
+        attributes = [VectorAttributes()] * len(labels)
+    elif len(attributes) != len(labels):
+        raise ValueError("attributes and labels must have the same length")
+
+    order = np.argsort(np.asarray(labels, dtype=np.int64), kind="stable")
+    label_column = np.asarray(labels, dtype="<i8")[order]
+    anchor_column = np.asarray([_anchor_micros(item.anchor_at) for item in attributes], dtype="<i8")[order]
+    domains, domain_column = _codes([_normalize_domain(item.domain) for item in attributes])
+    source_record_types, type_column = _codes([item.source_record_type for item in attributes])
+    id_column = _fixed_width(canonical_ids)[order]
+    fingerprint_column = _fixed_width(fingerprints)[order]
+
+    header_payload = dict(header)
+    header_payload.update(
+        count=len(label_column),
+        id_width=id_column.dtype.itemsize,
+        fingerprint_width=fingerprint_column.dtype.itemsize,
+        domains=domains,
+        source_record_types=source_record_types,
+    )
+    header_bytes = json.dumps(header_payload, ensure_ascii=True, sort_keys=True, separators=(",", ":")).encode("ascii")
+    prefix = len(MAGIC) + _HEADER_LENGTH.size + len(header_bytes)
+    padding = b"\0" * (-prefix % _ALIGNMENT)
+
+    with path.open("wb") as handle:
+        handle.write(MAGIC)
+        handle.write(_HEADER_LENGTH.pack(len(header_bytes)))
+        handle.write(header_bytes)
+        handle.write(padding)
+        for column in (
+            label_column,
+            anchor_column,
+            domain_column[order],
+            type_column[order],
+            id_column,
+            fingerprint_column,
+        ):
+            handle.write(column.tobytes())
+
+
+class IdTable:
+    """Columnar label -> canonical id table, memory-mapped from disk when possible.
+
+    Lookups by label are O(1) while labels are dense row numbers (the layout after a
+    rebuild) and a binary search otherwise; nothing is decoded until it is read.
+    Legacy JSON metadata (``{"dimension", "canonical_ids", ...}``) and tables written
+    before attribute columns existed are read into the same columns, with empty
+    attributes, so callers never branch on the format.
+    """
+
+    def __init__(
+        self,
+        header: Dict[str, Any],
+        labels: Any,
+        canonical_ids: Any,
+        fingerprints: Any,
+        attribute_columns: Optional[Sequence[Any]] = None,
+    ) -> None:
+        self.header = header
+        self._labels = labels
+        self._canonical_ids = canonical_ids
+        self._fingerprints = fingerprints
+        if attribute_columns is None:
+            np = _load_numpy()
+            count = len(labels)
+            attribute_columns = (
+                np.full(count, NO_ANCHOR, dtype="<i8"),
+                np.zeros(count, dtype="<i4"),
+                np.zeros(count, dtype="<i4"),
+            )
+        self._anchors, self._domain_codes, self._type_codes = attribute_columns
+        self._domains: List[str] = list(header.get("domains", [""]))
+        self._source_record_types: List[str] = list(header.get("source_record_types", [""]))
+        self._dense = bool(len(labels) == 0 or (labels[0] == 0 and labels[-1] == len(labels) - 1))
+
+    @classmethod
+    def open(cls, path: Path, *, memory_map: bool = True) -> "IdTable":
+        with path.open("rb") as handle:
+            prefix = handle.read(len(MAGIC) + _HEADER_LENGTH.size)
+            if not prefix.startswith(MAGIC):
+                return cls._from_json(path)
+            (header_length,) = _HEADER_LENGTH.unpack(prefix[len(MAGIC) :])
+            header = json.loads(handle.read(header_length).decode("ascii"))
+
+        np = _load_numpy()
+        count = int(header["count"])
+        offset = len(MAGIC) + _HEADER_LENGTH.size + header_length
+        offset += -offset % _ALIGNMENT
+        with_attributes = "domains" in header
+        dtypes = ["<i8", f"S{int(header['id_width'])}", f"S{int(header['fingerprint_width'])}"]
+        if with_attributes:
+            dtypes[1:1] = ["<i8", "<i4", "<i4"]
+        columns = []
+        for dtype in dtypes:
+            if count == 0:
+                columns.append(np.zeros(0, dtype=dtype))
+            elif memory_map:
+                columns.append(np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(count,)))
+            else:
+                columns.append(np.fromfile(path, dtype=dtype, count=count, offset=offset))
+            offset += count * np.dtype(dtype).itemsize
+        if with_attributes:
+            return cls(header, columns[0], columns[4], columns[5], columns[1:4])
+        return cls(header, columns[0], columns[1], columns[2])
+
+    @classmethod
+    def _from_json(cls, path: Path) -> "IdTable":
+        np = _load_numpy()
+        metadata = json.loads(path.read_text(encoding="utf-8"))
+        canonical_ids: List[str] = list(metadata["canonical_ids"])
+        labels = metadata.get("labels", list(range(len(canonical_ids))))
+        fingerprints = metadata.get("fingerprints", [""] * len(canonical_ids))
+        order = np.argsort(np.asarray(labels, dtype=np.int64), kind="stable")
+        header = {
+            key: metadata[key] for key in ("dimension", "index_type", "index_factory", "model_name") if key in metadata
+        }
+        header["count"] = len(canonical_ids)
+        return cls(
+            header,
+            np.asarray(labels, dtype="<i8")[order],
+            _fixed_width(canonical_ids)[order],
+            _fixed_width(fingerprints)[order],
+        )
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def _row(self, label: int) -> Optional[int]:
+        count = len(self._labels)
+        if self._dense:
+            return label if 0 <= label < count else None
+        np = _load_numpy()
+        row = int(np.searchsorted(self._labels, label))
+        return row if row < count and int(self._labels[row]) == label else None
+
+    def canonical_id(self, label: int) -> Optional[str]:
+        row = self._row(label)
+        return self._canonical_ids[row].decode("utf-8") if row is not None else None
+
+    def canonical_ids(self) -> List[str]:
+        """All canonical ids in label order."""
+        return [value.decode("utf-8") for value in self._canonical_ids]
+
+    def id_by_label(self) -> Dict[int, str]:
+        return {int(label): value.decode("utf-8") for label, value in zip(self._labels, self._canonical_ids)}
+
+    def fingerprints(self) -> Dict[str, str]:
+        return {
+            canonical_id.decode("utf-8"): fingerprint.decode("utf-8")
+            for canonical_id, fingerprint in zip(self._canonical_ids, self._fingerprints)
+            if fingerprint
+        }
+
+    def attributes(self) -> Dict[str, VectorAttributes]:
+        """Stored attributes keyed by canonical id, for rows that have any."""
+        attributes: Dict[str, VectorAttributes] = {}
+        for canonical_id, anchor, domain_code, type_code in zip(
+            self._canonical_ids, self._anchors, self._domain_codes, self._type_codes
+        ):
+            if anchor == NO_ANCHOR and domain_code == 0 and type_code == 0:
+                continue
+            attributes[canonical_id.decode("utf-8")] = VectorAttributes(
+                domain=self._domains[domain_code],
+                source_record_type=self._source_record_types[type_code],
+                anchor_at=None if anchor == NO_ANCHOR else _EPOCH + int(anchor) * _MICROSECOND,
+            )
+        return attributes
+
+    def select_labels(self, where: VectorFilter) -> Any:
+        """Sorted int64 labels of the rows matching ``where``, computed column-wise."""
+        np = _load_numpy()
+        mask = np.ones(len(self._labels), dtype=bool)
+        if where.domains:
+            wanted = {_normalize_domain(domain) for domain in where.domains}
+            mask &= np.asarray([domain in wanted for domain in self._domains])[self._domain_codes]
+        if where.source_record_types:
+            wanted = set(where.source_record_types)
+            mask &= np.asarray([value in wanted for value in self._source_record_types])[self._type_codes]
+        if where.anchor_from is not None:
+            mask &= self._anchors >= _anchor_micros(where.anchor_from)
+        if where.anchor_to is not None:
+            mask &= (self._anchors < _anchor_micros(where.anchor_to)) & (self._anchors != NO_ANCHOR)
+        return np.asarray(self._labels[mask], dtype=np.int64)
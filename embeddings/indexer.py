@@ -1,19 +1,28 @@
 from __future__ import annotations
 
+import hashlib
 from dataclasses import dataclass
-from typing import List, Sequence, Tuple
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
 
 from core.canonical_schema import CanonicalObject
-from embeddings.models import EmbeddingModel
+from embeddings.cache import EmbeddingCache
+from embeddings.models import EmbeddingModel, embed_float32
 from embeddings.structured_text import build_structured_embedding_text
-from embeddings.vector_store import VectorStore
+from embeddings.vector_store import VectorAttributes, VectorBatch, VectorFilter, VectorStore
+from storage.canonical_record import CanonicalRecord
 from storage.sqlite_store import SQLiteStore
 
+# Columns needed to build structured embedding text and filter attributes from stored rows.
+_TEXT_COLUMNS = ("title", "content", "people_json", "domain")
+_ATTRIBUTE_COLUMNS = ("source_record_type", "start_at", "due_at", "updated_at", "created_at", "end_at")
+
 
 @dataclass(frozen=True)
 class IndexedDocument:
     canonical_id: str
     text: str
+    attributes: VectorAttributes = VectorAttributes()
 
 
 @dataclass(frozen=True)
@@ -22,23 +31,83 @@ class EmbeddingIndexReport:
     vector_dimension: int
 
 
+@dataclass(frozen=True)
+class EmbeddingUpdateReport:
+    indexed_count: int
+    embedded_count: int
+    unchanged_count: int
+    deleted_count: int
+
+
+def embedding_text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def document_fingerprint(doc: IndexedDocument) -> str:
+    """Fingerprint of everything stored for a document: its text and filter attributes."""
+    anchor = doc.attributes.anchor_at.isoformat() if doc.attributes.anchor_at is not None else ""
+    payload = "\x1f".join(
+        [embedding_text_hash(doc.text), doc.attributes.domain, doc.attributes.source_record_type, anchor]
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def vector_attributes(obj: Union[CanonicalObject, CanonicalRecord]) -> VectorAttributes:
+    # Same anchor precedence as state.engine._anchor_datetime.
+    anchor = obj.start_at or obj.due_at or obj.updated_at or obj.created_at or obj.end_at
+    return VectorAttributes(domain=obj.domain, source_record_type=obj.source_record_type, anchor_at=anchor)
+
+
+def _document(obj: Union[CanonicalObject, CanonicalRecord]) -> IndexedDocument:
+    return IndexedDocument(
+        canonical_id=obj.canonical_id,
+        text=build_structured_embedding_text(obj),
+        attributes=vector_attributes(obj),
+    )
+
+
 def build_embedding_documents(objects: Sequence[CanonicalObject]) -> List[IndexedDocument]:
-    documents = [
-        IndexedDocument(
-            canonical_id=obj.canonical_id,
-            text=build_structured_embedding_text(obj),
-        )
-        for obj in objects
-    ]
-    return sorted(documents, key=lambda doc: doc.canonical_id)
+    return sorted((_document(obj) for obj in objects), key=lambda doc: doc.canonical_id)
+
+
+def iter_store_documents(store: SQLiteStore, *, batch_size: int = 1000) -> Iterator[List[IndexedDocument]]:
+    """Yield structured-text documents from the store ``batch_size`` rows at a time."""
+    records = store.iter_canonical_objects(batch_size=batch_size, columns=_TEXT_COLUMNS + _ATTRIBUTE_COLUMNS)
+    while True:
+        batch = [_document(record) for record in islice(records, batch_size)]
+        if not batch:
+            return
+        yield batch
 
 
 class EmbeddingIndexer:
-    """Embeds canonical memory and persists vectors to local store."""
+    """Embeds canonical memory and persists vectors to local store.
+
+    Vectors stay float32 numpy arrays from the model to the index. The ``*_from_store``
+    methods stream the store in batches, so memory is bounded by the batch size rather
+    than the corpus. With a ``cache``, vectors are looked up by (``model_name``, text
+    hash) first and the model only encodes texts the cache has not seen.
+
+    Each vector is stored with its domain, source record type and anchor time so
+    ``query(..., where=VectorFilter(...))`` can filter inside the index. Stored
+    fingerprints cover those attributes too, so ``upsert`` refreshes a document whose
+    time or type changed even when its text did not.
+    """
 
-    def __init__(self, model: EmbeddingModel, vector_store: VectorStore) -> None:
+    def __init__(
+        self,
+        model: EmbeddingModel,
+        vector_store: VectorStore,
+        *,
+        cache: Optional[EmbeddingCache] = None,
+        model_name: str = "",
+    ) -> None:
+        if cache is not None and not model_name:
+            raise ValueError("model_name is required when an embedding cache is configured")
         self.model = model
         self.vector_store = vector_store
+        self.cache = cache
+        self.model_name = model_name
 
     def rebuild(self, objects: Sequence[CanonicalObject]) -> EmbeddingIndexReport:
         documents = build_embedding_documents(objects)
@@ -47,20 +116,202 @@ class EmbeddingIndexer:
 
         texts = [doc.text for doc in documents]
         canonical_ids = [doc.canonical_id for doc in documents]
-        vectors = self.model.embed_texts(texts)
-        if len(vectors) != len(canonical_ids):
-            raise ValueError("Embedding model returned vector count mismatch")
-        if not vectors or not vectors[0]:
+        vectors = self._embed(texts)
+
+        self.vector_store.rebuild(
+            canonical_ids,
+            vectors,
+            fingerprints=[document_fingerprint(doc) for doc in documents],
+            attributes=[doc.attributes for doc in documents],
+        )
+        return EmbeddingIndexReport(indexed_count=len(canonical_ids), vector_dimension=int(vectors.shape[1]))
+
+    def rebuild_from_store(self, store: SQLiteStore, *, batch_size: int = 1000) -> EmbeddingIndexReport:
+        if next(store.iter_canonical_ids(batch_size=1), None) is None:
+            raise ValueError("No canonical objects available to index")
+
+        dimension = 0
+
+        def batches() -> Iterator[VectorBatch]:
+            nonlocal dimension
+            for documents in iter_store_documents(store, batch_size=batch_size):
+                texts = [doc.text for doc in documents]
+                vectors = self._embed(texts)
+                dimension = int(vectors.shape[1])
+                yield VectorBatch(
+                    canonical_ids=[doc.canonical_id for doc in documents],
+                    vectors=vectors,
+                    fingerprints=[document_fingerprint(doc) for doc in documents],
+                    attributes=[doc.attributes for doc in documents],
+                )
+
+        indexed_count = self.vector_store.rebuild_from_batches(batches())
+        return EmbeddingIndexReport(indexed_count=indexed_count, vector_dimension=dimension)
+
+    def upsert(
+        self, objects: Sequence[CanonicalObject], *, prune_missing: bool = False
+    ) -> EmbeddingUpdateReport:
+        """Re-embed only objects whose structured text changed since they were indexed.
+
+        With ``prune_missing=True`` the given objects are treated as the full corpus and
+        indexed ids absent from it are deleted; an index built for another model or
+        index config (see ``upsert_from_store``) is then rebuilt from them. Without it
+        such an index raises ``ValueError``, since the objects cannot replace it.
+        """
+        known = self.vector_store.fingerprints()
+        if self.vector_store.matches_build():
+            report = self._upsert_documents(
+                [build_embedding_documents(objects)], known, prune_missing=prune_missing
+            )
+            if report is not None:
+                return report
+        if not prune_missing:
+            raise ValueError(
+                "Vector index was built for another model or index config; "
+                "rebuild it or upsert with prune_missing=True"
+            )
+        self.rebuild(objects)
+        return self._rebuilt_report(known)
+
+    def upsert_from_store(self, store: SQLiteStore, *, batch_size: int = 1000) -> EmbeddingUpdateReport:
+        """Bring the index in line with the store, pruning vectors for deleted objects.
+
+        Fingerprints only cover document content, so an index whose header records
+        another model name, index type or vector encoding, or whose vectors have another
+        dimension than the first re-embedded batch, is rebuilt with the streaming
+        ``rebuild_from_store`` instead, as is an empty index.
+        """
+        known = self.vector_store.fingerprints()
+        if known and self.vector_store.matches_build():
+            documents = iter_store_documents(store, batch_size=batch_size)
+            report = self._upsert_documents(documents, known, prune_missing=True)
+            if report is not None:
+                return report
+        if next(store.iter_canonical_ids(batch_size=1), None) is None:
+            deleted_count = self.vector_store.delete(list(known)) if known else 0
+            return EmbeddingUpdateReport(
+                indexed_count=0, embedded_count=0, unchanged_count=0, deleted_count=deleted_count
+            )
+        self.rebuild_from_store(store, batch_size=batch_size)
+        return self._rebuilt_report(known)
+
+    def delete(self, canonical_ids: Sequence[str]) -> int:
+        return self.vector_store.delete(canonical_ids)
+
+    def _upsert_documents(
+        self,
+        document_batches: Iterable[Sequence[IndexedDocument]],
+        known: Dict[str, str],
+        *,
+        prune_missing: bool,
+    ) -> Optional[EmbeddingUpdateReport]:
+        """Embed and store changed documents; ``None`` if the model's vectors do not fit the index.
+
+        The dimension is checked on the first embedded batch, before anything is written.
+        """
+        seen: Set[str] = set()
+        changed_ids: List[str] = []
+        changed_hashes: List[str] = []
+        changed_attributes: List[VectorAttributes] = []
+        changed_vectors: List[Any] = []
+
+        for documents in document_batches:
+            # Later duplicates of the same id win.
+            latest = {doc.canonical_id: doc for doc in documents}
+            seen.update(latest)
+            todo: List[Tuple[IndexedDocument, str]] = []
+            for doc in latest.values():
+                fingerprint = document_fingerprint(doc)
+                if known.get(doc.canonical_id) != fingerprint:
+                    todo.append((doc, fingerprint))
+            if not todo:
+                continue
+            vectors = self._embed([doc.text for doc, _ in todo])
+            if not changed_vectors and not self.vector_store.matches_build(int(vectors.shape[1])):
+                return None
+            changed_vectors.append(vectors)
+            changed_ids.extend(doc.canonical_id for doc, _ in todo)
+            changed_hashes.extend(fingerprint for _, fingerprint in todo)
+            changed_attributes.extend(doc.attributes for doc, _ in todo)
+
+        if changed_ids:
+            import numpy as np
+
+            stacked: Any = np.concatenate(changed_vectors)
+            self.vector_store.upsert(
+                changed_ids, stacked, fingerprints=changed_hashes, attributes=changed_attributes
+            )
+
+        deleted_count = 0
+        if prune_missing:
+            stale = sorted(set(known) - seen)
+            if stale:
+                deleted_count = self.vector_store.delete(stale)
+
+        embedded_count = len(set(changed_ids))
+        return EmbeddingUpdateReport(
+            indexed_count=len(seen),
+            embedded_count=embedded_count,
+            unchanged_count=len(seen) - embedded_count,
+            deleted_count=deleted_count,
+        )
+
+    def _rebuilt_report(self, previous: Dict[str, str]) -> EmbeddingUpdateReport:
+        indexed = self.vector_store.fingerprints()
+        return EmbeddingUpdateReport(
+            indexed_count=len(indexed),
+            embedded_count=len(indexed),
+            unchanged_count=0,
+            deleted_count=len(set(previous) - set(indexed)),
+        )
+
+    def _embed(self, texts: Sequence[str]) -> Any:
+        if self.cache is None:
+            vectors = self._encode(texts)
+        else:
+            vectors = self._embed_cached(self.cache, texts)
+        if vectors.ndim != 2 or vectors.shape[0] == 0 or vectors.shape[1] == 0:
             raise ValueError("Embedding model returned empty vectors")
+        return vectors
 
-        self.vector_store.rebuild(canonical_ids, vectors)
-        return EmbeddingIndexReport(indexed_count=len(canonical_ids), vector_dimension=len(vectors[0]))
+    def _encode(self, texts: Sequence[str]) -> Any:
+        vectors = embed_float32(self.model, texts)
+        if vectors.shape[0] != len(texts):
+            raise ValueError("Embedding model returned vector count mismatch")
+        return vectors
+
+    def _embed_cached(self, cache: EmbeddingCache, texts: Sequence[str]) -> Any:
+        import numpy as np
+
+        hashes = [embedding_text_hash(text) for text in texts]
+        by_hash = cache.get_many_arrays(self.model_name, hashes)
 
-    def rebuild_from_store(self, store: SQLiteStore) -> EmbeddingIndexReport:
-        return self.rebuild(store.fetch_canonical_objects())
+        missing: Dict[str, str] = {}
+        for text, text_hash in zip(texts, hashes):
+            if text_hash not in by_hash:
+                missing.setdefault(text_hash, text)
+        if missing:
+            encoded = self._encode(list(missing.values()))
+            fresh = list(zip(missing.keys(), encoded))
+            cache.put_many(self.model_name, fresh)
+            by_hash.update(fresh)
+        return np.stack([by_hash[text_hash] for text_hash in hashes])
 
-    def query(self, text: str, top_k: int = 5) -> List[Tuple[str, float]]:
-        vectors = self.model.embed_texts([text])
-        if not vectors:
+    def query(
+        self, text: str, top_k: int = 5, *, where: Optional[VectorFilter] = None
+    ) -> List[Tuple[str, float]]:
+        vectors = embed_float32(self.model, [text])
+        if len(vectors) == 0:
             return []
-        return self.vector_store.search(vectors[0], top_k=top_k)
+        return self.vector_store.search(vectors[0], top_k=top_k, where=where)
+
+    def query_many(
+        self, texts: Sequence[str], top_k: int = 5, *, where: Optional[VectorFilter] = None
+    ) -> List[List[Tuple[str, float]]]:
+        """Embed all texts in one model call and search them in one index call."""
+        if not texts:
+            return []
+        vectors = embed_float32(self.model, texts)
+        if len(vectors) != len(texts):
+            raise ValueError("Embedding model returned vector count mismatch")
+        return self.vector_store.search_many(vectors, top_k=top_k, where=where)
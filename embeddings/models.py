@@ -1,6 +1,9 @@
 from __future__ import annotations
 
-from typing import List, Protocol, Sequence, cast
+from typing import Any, List, Optional, Protocol, Sequence, cast, runtime_checkable
+
+# Rough characters per token for English text, used when no tokenizer is available.
+_CHARS_PER_TOKEN = 4
 
 
 class EmbeddingModel(Protocol):
@@ -8,8 +11,72 @@ class EmbeddingModel(Protocol):
         """Return one embedding vector per input text."""
 
 
+@runtime_checkable
+class ArrayEmbeddingModel(Protocol):
+    def embed_texts(self, texts: Sequence[str]) -> List[List[float]]:
+        """Return one embedding vector per input text."""
+
+    def embed_array(self, texts: Sequence[str]) -> Any:
+        """Return a float32 numpy array of shape ``(len(texts), dimension)``."""
+
+
+def embed_float32(model: EmbeddingModel, texts: Sequence[str]) -> Any:
+    """Encode ``texts`` to a 2D float32 array, skipping list conversion when the model can."""
+    try:
+        import numpy as np
+    except ImportError as exc:
+        raise RuntimeError("numpy is required for FAISS vector storage. Install with: pip install .[embeddings]") from exc
+
+    if isinstance(model, ArrayEmbeddingModel):
+        vectors = model.embed_array(texts)
+    else:
+        vectors = model.embed_texts(texts)
+    array = np.asarray(vectors, dtype=np.float32)
+    if len(texts) == 0:
+        return array.reshape(0, 0)
+    if array.ndim != 2:
+        raise ValueError("Embedding model must return one vector per text")
+    return array
+
+
+def plan_token_batches(
+    token_lengths: Sequence[int],
+    *,
+    max_tokens_per_batch: int,
+    max_batch_size: int,
+) -> List[List[int]]:
+    """Group text positions into batches whose padded size fits a token budget.
+
+    Positions are visited longest first, so each batch pads to its first member and
+    ``len(batch) * token_lengths[batch[0]]`` stays within ``max_tokens_per_batch``.
+    Short texts therefore share large batches while long ones run in small batches.
+    A text longer than the budget gets a batch of its own.
+    """
+    if max_tokens_per_batch < 1 or max_batch_size < 1:
+        raise ValueError("max_tokens_per_batch and max_batch_size must be at least 1")
+    order = sorted(range(len(token_lengths)), key=lambda idx: token_lengths[idx], reverse=True)
+    batches: List[List[int]] = []
+    current: List[int] = []
+    padded_length = 0
+    for idx in order:
+        if current and (len(current) >= max_batch_size or (len(current) + 1) * padded_length > max_tokens_per_batch):
+            batches.append(current)
+            current = []
+        if not current:
+            padded_length = max(int(token_lengths[idx]), 1)
+        current.append(idx)
+    if current:
+        batches.append(current)
+    return batches
+
+
 class SentenceTransformerEmbeddingModel:
-    """Local sentence-transformer embedder (no cloud calls)."""
+    """Local sentence-transformer embedder (no cloud calls).
+
+    Texts are bucketed by token length and encoded in batches of at most
+    ``max_tokens_per_batch`` padded tokens (and ``max_batch_size`` texts), so a few long
+    notes do not pad a batch of short reminders. Output rows follow input order.
+    """
 
     def __init__(
         self,
@@ -18,7 +85,11 @@ class SentenceTransformerEmbeddingModel:
         device: str = "cpu",
         local_files_only: bool = False,
         normalize_embeddings: bool = True,
+        max_tokens_per_batch: int = 16_384,
+        max_batch_size: int = 256,
     ) -> None:
+        if max_tokens_per_batch < 1 or max_batch_size < 1:
+            raise ValueError("max_tokens_per_batch and max_batch_size must be at least 1")
         try:
             from sentence_transformers import SentenceTransformer
         except ImportError as exc:
@@ -28,6 +99,8 @@ class SentenceTransformerEmbeddingModel:
             ) from exc
 
         self._normalize_embeddings = normalize_embeddings
+        self.max_tokens_per_batch = max_tokens_per_batch
+        self.max_batch_size = max_batch_size
         self._model = SentenceTransformer(
             model_name,
             device=device,
@@ -37,9 +110,56 @@ class SentenceTransformerEmbeddingModel:
     def embed_texts(self, texts: Sequence[str]) -> List[List[float]]:
         if not texts:
             return []
+        return cast(List[List[float]], self.embed_array(texts).tolist())
+
+    def embed_array(self, texts: Sequence[str]) -> Any:
+        import numpy as np
+
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        output: Any = None
+        for batch in self.plan_batches(texts):
+            vectors = self.encode_batch([texts[idx] for idx in batch])
+            if output is None:
+                output = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            output[batch] = vectors
+        return output
+
+    def plan_batches(self, texts: Sequence[str]) -> List[List[int]]:
+        """Positions of ``texts`` grouped into the batches ``embed_array`` encodes."""
+        return plan_token_batches(
+            self.token_lengths(texts),
+            max_tokens_per_batch=self.max_tokens_per_batch,
+            max_batch_size=self.max_batch_size,
+        )
+
+    def encode_batch(self, texts: Sequence[str]) -> Any:
+        """Encode ``texts`` as one padded batch, in order, to a float32 array."""
+        import numpy as np
+
         encoded = self._model.encode(
             list(texts),
+            batch_size=len(texts),
             convert_to_numpy=True,
             normalize_embeddings=self._normalize_embeddings,
         )
-        return cast(List[List[float]], encoded.tolist())
+        return np.asarray(encoded, dtype=np.float32)
+
+    def token_lengths(self, texts: Sequence[str]) -> List[int]:
+        """Token count per text after truncation to the model's maximum sequence length."""
+        max_length: Optional[int] = getattr(self._model, "max_seq_length", None)
+        tokenizer = getattr(self._model, "tokenizer", None)
+        if tokenizer is not None:
+            try:
+                encoded = tokenizer(
+                    list(texts),
+                    add_special_tokens=True,
+                    truncation=max_length is not None,
+                    max_length=max_length,
+                )
+                return [len(ids) for ids in encoded["input_ids"]]
+            except (TypeError, KeyError):
+                pass
+        lengths = [len(text) // _CHARS_PER_TOKEN + 2 for text in texts]
+        return [min(length, max_length) for length in lengths] if max_length else lengths
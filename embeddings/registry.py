@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from embeddings.models import SentenceTransformerEmbeddingModel
+
+ModelKey = Tuple[str, str, bool]
+ModelLoader = Callable[..., SentenceTransformerEmbeddingModel]
+
+
+class EmbeddingModelRegistry:
+    """Process-wide cache of loaded sentence-transformer models.
+
+    Models are keyed by ``(model_name, device, local_files_only)`` and loaded lazily on
+    the first ``get``; later calls return the same instance until ``unload``. Loads of
+    different keys run concurrently, while concurrent ``get`` calls for one key wait for
+    a single load. A load that raises is not cached, so the next ``get`` retries.
+    """
+
+    def __init__(self, loader: Optional[ModelLoader] = None) -> None:
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._models: Dict[ModelKey, SentenceTransformerEmbeddingModel] = {}
+        self._key_locks: Dict[ModelKey, threading.Lock] = {}
+
+    def get(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        *,
+        device: str = "cpu",
+        local_files_only: bool = False,
+    ) -> SentenceTransformerEmbeddingModel:
+        key = (model_name, device, local_files_only)
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                return model
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                model = self._models.get(key)
+            if model is None:
+                loader = self._loader or SentenceTransformerEmbeddingModel
+                model = loader(model_name, device=device, local_files_only=local_files_only)
+                with self._lock:
+                    self._models[key] = model
+            return model
+
+    def unload(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        *,
+        device: str = "cpu",
+        local_files_only: bool = False,
+    ) -> bool:
+        """Drop one model so its memory can be reclaimed; returns whether it was loaded."""
+        with self._lock:
+            return self._models.pop((model_name, device, local_files_only), None) is not None
+
+    def unload_all(self) -> None:
+        with self._lock:
+            self._models.clear()
+
+    def loaded(self) -> List[ModelKey]:
+        with self._lock:
+            return sorted(self._models)
+
+
+_DEFAULT_REGISTRY = EmbeddingModelRegistry()
+
+
+def default_model_registry() -> EmbeddingModelRegistry:
+    """The registry shared by the API runners in this process."""
+    return _DEFAULT_REGISTRY
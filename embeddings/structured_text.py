@@ -1,8 +1,26 @@
 from __future__ import annotations
 
-from typing import Iterable, List
+from typing import Iterable, List, Protocol
 
-from core.canonical_schema import CanonicalObject
+
+class EmbeddableObject(Protocol):
+    """Fields read by ``build_structured_embedding_text``.
+
+    Satisfied by ``CanonicalObject`` and by ``storage.CanonicalRecord`` rows that
+    selected these columns.
+    """
+
+    @property
+    def title(self) -> str: ...
+
+    @property
+    def content(self) -> str: ...
+
+    @property
+    def people(self) -> List[str]: ...
+
+    @property
+    def domain(self) -> str: ...
 
 
 def _normalize_people(people: Iterable[str]) -> List[str]:
@@ -20,7 +38,7 @@ def _normalize_people(people: Iterable[str]) -> List[str]:
     return sorted(normalized, key=str.lower)
 
 
-def build_structured_embedding_text(obj: CanonicalObject) -> str:
+def build_structured_embedding_text(obj: EmbeddableObject) -> str:
     """Build the only allowed embedding input: title+content+people+domain."""
     people = _normalize_people(obj.people)
     people_blob = ", ".join(people) if people else ""
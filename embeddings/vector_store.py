@@ -1,11 +1,87 @@
 from __future__ import annotations
 
-from typing import List, Protocol, Sequence, Tuple
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Protocol, Sequence, Tuple
+
+
+@dataclass(frozen=True)
+class VectorAttributes:
+    """Filterable fields stored next to a vector (see ``VectorFilter``)."""
+
+    domain: str = ""
+    source_record_type: str = ""
+    anchor_at: Optional[datetime] = None
+
+
+@dataclass(frozen=True)
+class VectorFilter:
+    """Predicates applied inside a vector search, before top-k is taken.
+
+    Mirrors ``storage.CanonicalQuery``: the anchor window is half-open,
+    ``anchor_from <= anchor < anchor_to``, and excludes vectors without an anchor;
+    domain matches are case-insensitive; each non-empty sequence is an any-of filter.
+    """
+
+    anchor_from: Optional[datetime] = None
+    anchor_to: Optional[datetime] = None
+    domains: Sequence[str] = ()
+    source_record_types: Sequence[str] = ()
+
+
+@dataclass(frozen=True)
+class VectorBatch:
+    """One chunk of a streamed rebuild: ids, a float32 ``(n, dimension)`` array, fingerprints."""
+
+    canonical_ids: Sequence[str]
+    vectors: Any
+    fingerprints: Optional[Sequence[str]] = None
+    attributes: Optional[Sequence[VectorAttributes]] = None
 
 
 class VectorStore(Protocol):
-    def rebuild(self, canonical_ids: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+    def rebuild(
+        self,
+        canonical_ids: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+        *,
+        fingerprints: Optional[Sequence[str]] = None,
+        attributes: Optional[Sequence[VectorAttributes]] = None,
+    ) -> None:
         """Replace vector index with the provided canonical objects."""
 
-    def search(self, query_vector: Sequence[float], top_k: int = 5) -> List[Tuple[str, float]]:
-        """Return (canonical_id, similarity_score) tuples."""
+    def rebuild_from_batches(self, batches: Iterable[VectorBatch], *, expected_count: int = 0) -> int:
+        """Replace the index from streamed batches and return how many vectors it holds."""
+
+    def upsert(
+        self,
+        canonical_ids: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+        *,
+        fingerprints: Optional[Sequence[str]] = None,
+        attributes: Optional[Sequence[VectorAttributes]] = None,
+    ) -> None:
+        """Add or replace vectors for the given canonical objects only."""
+
+    def delete(self, canonical_ids: Iterable[str]) -> int:
+        """Remove vectors by canonical id and return how many were removed."""
+
+    def fingerprints(self) -> Dict[str, str]:
+        """Return the fingerprint stored with each indexed canonical id."""
+
+    def matches_build(self, dimension: int = 0) -> bool:
+        """Whether stored vectors fit this model and index settings (and ``dimension``, if set)."""
+
+    def search(
+        self, query_vector: Sequence[float], top_k: int = 5, *, where: Optional[VectorFilter] = None
+    ) -> List[Tuple[str, float]]:
+        """Return (canonical_id, similarity_score) tuples, restricted to ``where`` if given."""
+
+    def search_many(
+        self,
+        query_vectors: Sequence[Sequence[float]],
+        top_k: int = 5,
+        *,
+        where: Optional[VectorFilter] = None,
+    ) -> List[List[Tuple[str, float]]]:
+        """Return one result list per query row, searched in a single call."""
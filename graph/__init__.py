@@ -7,6 +7,7 @@ from graph.relation_builder import (
     build_relations,
     build_relations_from_store,
     rebuild_and_store_relations,
+    update_and_store_relations,
 )
 
 __all__ = [
@@ -18,4 +19,5 @@ __all__ = [
     "build_relations",
     "build_relations_from_store",
     "rebuild_and_store_relations",
+    "update_and_store_relations",
 ]
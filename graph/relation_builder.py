@@ -7,13 +7,16 @@ from datetime import datetime, timedelta, timezone
 from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
 from core.canonical_schema import CanonicalObject
-from storage.sqlite_store import SQLiteStore
+from graph.relation_engine import BlockingKeys, BlockingRelationEngine, CandidatePairs
+from storage.sqlite_store import SQLiteStore, UpsertResult
 
 SAME_DAY = "SAME_DAY"
 SAME_PERSON = "SAME_PERSON"
 SAME_DOMAIN = "SAME_DOMAIN"
 FOLLOW_UP = "FOLLOW_UP"
 
+FOLLOW_UP_WINDOW = timedelta(days=7)
+
 
 @dataclass(frozen=True)
 class Relation:
@@ -78,99 +81,168 @@ def _shared_people(obj_a: CanonicalObject, obj_b: CanonicalObject) -> Set[str]:
     return _people_set(obj_a).intersection(_people_set(obj_b))
 
 
+def _blocking_keys(obj: CanonicalObject) -> BlockingKeys:
+    anchor = _anchor_datetime(obj)
+    return BlockingKeys(
+        anchor=anchor,
+        day=anchor.date().isoformat() if anchor else None,
+        people=frozenset(_people_set(obj)),
+        domain=_domain_value(obj),
+    )
+
+
+def _undirected_relation(id_a: str, id_b: str, relation_type: str, reason: str) -> Relation:
+    from_id, to_id = _ordered_pair(id_a, id_b)
+    return Relation(
+        relation_id=_make_relation_id(from_id, to_id, relation_type, reason),
+        from_canonical_id=from_id,
+        to_canonical_id=to_id,
+        relation_type=relation_type,
+        reason=reason,
+    )
+
+
+def _follow_up_relation(
+    obj_a: CanonicalObject,
+    time_a: datetime,
+    obj_b: CanonicalObject,
+    time_b: datetime,
+) -> Optional[Relation]:
+    earlier_obj, earlier_time, later_obj, later_time = (
+        (obj_a, time_a, obj_b, time_b) if time_a <= time_b else (obj_b, time_b, obj_a, time_a)
+    )
+    delta = later_time - earlier_time
+    if not timedelta(0) < delta <= FOLLOW_UP_WINDOW:
+        return None
+    reason = f"delta_hours={delta.total_seconds() / 3600:.2f}"
+    return Relation(
+        relation_id=_make_relation_id(
+            earlier_obj.canonical_id, later_obj.canonical_id, FOLLOW_UP, reason
+        ),
+        from_canonical_id=earlier_obj.canonical_id,
+        to_canonical_id=later_obj.canonical_id,
+        relation_type=FOLLOW_UP,
+        reason=reason,
+    )
+
+
 def _build_pair_relations(obj_a: CanonicalObject, obj_b: CanonicalObject) -> List[Relation]:
+    """Reference pairwise definition of every relation type; the engine must agree with it."""
     relations: List[Relation] = []
 
     day_a = _anchor_day(obj_a)
     day_b = _anchor_day(obj_b)
     if day_a and day_b and day_a == day_b:
-        from_id, to_id = _ordered_pair(obj_a.canonical_id, obj_b.canonical_id)
-        reason = f"anchor_day={day_a}"
         relations.append(
-            Relation(
-                relation_id=_make_relation_id(from_id, to_id, SAME_DAY, reason),
-                from_canonical_id=from_id,
-                to_canonical_id=to_id,
-                relation_type=SAME_DAY,
-                reason=reason,
-            )
+            _undirected_relation(obj_a.canonical_id, obj_b.canonical_id, SAME_DAY, f"anchor_day={day_a}")
         )
 
     people_overlap = _shared_people(obj_a, obj_b)
     if people_overlap:
-        from_id, to_id = _ordered_pair(obj_a.canonical_id, obj_b.canonical_id)
         reason = f"people={','.join(sorted(people_overlap))}"
         relations.append(
-            Relation(
-                relation_id=_make_relation_id(from_id, to_id, SAME_PERSON, reason),
-                from_canonical_id=from_id,
-                to_canonical_id=to_id,
-                relation_type=SAME_PERSON,
-                reason=reason,
-            )
+            _undirected_relation(obj_a.canonical_id, obj_b.canonical_id, SAME_PERSON, reason)
         )
 
     domain_a = _domain_value(obj_a)
     domain_b = _domain_value(obj_b)
     if domain_a and domain_b and domain_a == domain_b:
-        from_id, to_id = _ordered_pair(obj_a.canonical_id, obj_b.canonical_id)
-        reason = f"domain={domain_a}"
         relations.append(
-            Relation(
-                relation_id=_make_relation_id(from_id, to_id, SAME_DOMAIN, reason),
-                from_canonical_id=from_id,
-                to_canonical_id=to_id,
-                relation_type=SAME_DOMAIN,
-                reason=reason,
-            )
+            _undirected_relation(obj_a.canonical_id, obj_b.canonical_id, SAME_DOMAIN, f"domain={domain_a}")
         )
 
     time_a = _anchor_datetime(obj_a)
     time_b = _anchor_datetime(obj_b)
     if time_a and time_b:
-        earlier_obj, earlier_time, later_obj, later_time = (
-            (obj_a, time_a, obj_b, time_b) if time_a <= time_b else (obj_b, time_b, obj_a, time_a)
-        )
-        delta = later_time - earlier_time
         shared_context = bool(_shared_people(obj_a, obj_b)) or (
             _domain_value(obj_a) and _domain_value(obj_a) == _domain_value(obj_b)
         )
-        if timedelta(0) < delta <= timedelta(days=7) and shared_context:
-            reason = f"delta_hours={delta.total_seconds() / 3600:.2f}"
-            relations.append(
-                Relation(
-                    relation_id=_make_relation_id(
-                        earlier_obj.canonical_id, later_obj.canonical_id, FOLLOW_UP, reason
-                    ),
-                    from_canonical_id=earlier_obj.canonical_id,
-                    to_canonical_id=later_obj.canonical_id,
-                    relation_type=FOLLOW_UP,
-                    reason=reason,
-                )
-            )
+        follow_up = _follow_up_relation(obj_a, time_a, obj_b, time_b) if shared_context else None
+        if follow_up is not None:
+            relations.append(follow_up)
 
     return relations
 
 
-def build_relations(objects: Sequence[CanonicalObject]) -> List[Relation]:
+def _relations_from_candidates(
+    objects: Sequence[CanonicalObject],
+    keys: Sequence[BlockingKeys],
+    candidates: CandidatePairs,
+) -> Dict[Tuple[str, str, str], Relation]:
+    # Pairs are visited in (i, j) order so duplicate keys keep the last pair, as the
+    # original all-pairs loop did.
     dedup: Dict[Tuple[str, str, str], Relation] = {}
-    object_count = len(objects)
-    for idx in range(object_count):
-        for jdx in range(idx + 1, object_count):
-            pair_relations = _build_pair_relations(objects[idx], objects[jdx])
-            for relation in pair_relations:
-                key = (
-                    relation.from_canonical_id,
-                    relation.to_canonical_id,
-                    relation.relation_type,
-                )
-                dedup[key] = relation
+
+    def keep(relation: Relation) -> None:
+        key = (relation.from_canonical_id, relation.to_canonical_id, relation.relation_type)
+        dedup[key] = relation
+
+    for idx, jdx in sorted(candidates.same_day):
+        keep(
+            _undirected_relation(
+                objects[idx].canonical_id,
+                objects[jdx].canonical_id,
+                SAME_DAY,
+                f"anchor_day={keys[idx].day}",
+            )
+        )
+    for idx, jdx in sorted(candidates.same_person):
+        overlap = keys[idx].people & keys[jdx].people
+        keep(
+            _undirected_relation(
+                objects[idx].canonical_id,
+                objects[jdx].canonical_id,
+                SAME_PERSON,
+                f"people={','.join(sorted(overlap))}",
+            )
+        )
+    for idx, jdx in sorted(candidates.same_domain):
+        keep(
+            _undirected_relation(
+                objects[idx].canonical_id,
+                objects[jdx].canonical_id,
+                SAME_DOMAIN,
+                f"domain={keys[idx].domain}",
+            )
+        )
+    for idx, jdx in sorted(candidates.follow_up):
+        time_a = keys[idx].anchor
+        time_b = keys[jdx].anchor
+        if time_a is None or time_b is None:
+            continue
+        follow_up = _follow_up_relation(objects[idx], time_a, objects[jdx], time_b)
+        if follow_up is not None:
+            keep(follow_up)
+    return dedup
+
+
+def _sorted_relations(relations: Iterable[Relation]) -> List[Relation]:
     return sorted(
-        dedup.values(),
+        relations,
         key=lambda rel: (rel.from_canonical_id, rel.to_canonical_id, rel.relation_type),
     )
 
 
+def build_relations(objects: Sequence[CanonicalObject]) -> List[Relation]:
+    keys = [_blocking_keys(obj) for obj in objects]
+    engine = BlockingRelationEngine(keys, follow_up_window=FOLLOW_UP_WINDOW)
+    return _sorted_relations(_relations_from_candidates(objects, keys, engine.candidate_pairs()).values())
+
+
+def build_relations_all_pairs(objects: Sequence[CanonicalObject]) -> List[Relation]:
+    """Reference implementation of ``build_relations`` that compares every pair.
+
+    Quadratic in the number of objects; tests and benchmarks use it to check the
+    blocking engine's output.
+    """
+    dedup: Dict[Tuple[str, str, str], Relation] = {}
+    for idx in range(len(objects)):
+        for jdx in range(idx + 1, len(objects)):
+            for relation in _build_pair_relations(objects[idx], objects[jdx]):
+                dedup[(relation.from_canonical_id, relation.to_canonical_id, relation.relation_type)] = relation
+    return _sorted_relations(dedup.values())
+
+
 def build_relations_from_store(store: SQLiteStore) -> List[Relation]:
     return build_relations(store.fetch_canonical_objects())
 
@@ -183,3 +255,32 @@ def rebuild_and_store_relations(store: SQLiteStore, objects: Optional[Iterable[C
     relations = build_relations(source_objects)
     store.replace_relations([relation.to_record() for relation in relations])
     return len(relations)
+
+
+def update_and_store_relations(
+    store: SQLiteStore,
+    changes: UpsertResult,
+    objects: Optional[Iterable[CanonicalObject]] = None,
+) -> int:
+    """Recompute only the edges touching changed objects and apply the diff.
+
+    ``objects`` must be the full current object set (defaults to the store contents);
+    edges between two unchanged objects cannot change, so they are not rebuilt. Every
+    stored edge is then stamped with the current time, so ``created_at`` matches what
+    ``rebuild_and_store_relations`` would have written. Returns the total number of
+    stored relations.
+    """
+    changed_ids = {*changes.inserted_ids, *changes.updated_ids}
+    with store.transaction():
+        if changed_ids or changes.deleted_ids:
+            source_objects = store.fetch_canonical_objects() if objects is None else list(objects)
+            keys = [_blocking_keys(obj) for obj in source_objects]
+            engine = BlockingRelationEngine(keys, follow_up_window=FOLLOW_UP_WINDOW)
+            focus = [idx for idx, obj in enumerate(source_objects) if obj.canonical_id in changed_ids]
+            relations = _relations_from_candidates(source_objects, keys, engine.candidate_pairs(focus))
+            store.replace_relations_for(
+                sorted(changed_ids.union(changes.deleted_ids)),
+                [relation.to_record() for relation in _sorted_relations(relations.values())],
+            )
+        store.touch_relations()
+        return store.count_relations()
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from itertools import combinations
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+
+IndexPair = Tuple[int, int]
+
+
+@dataclass(frozen=True)
+class BlockingKeys:
+    """Precomputed relation keys for one object (anchor, anchor day, people, domain)."""
+
+    anchor: Optional[datetime]
+    day: Optional[str]
+    people: FrozenSet[str]
+    domain: str
+
+
+@dataclass
+class CandidatePairs:
+    """Index pairs ``(i, j)`` with ``i < j`` that qualify for each relation type."""
+
+    same_day: Set[IndexPair] = field(default_factory=set)
+    same_person: Set[IndexPair] = field(default_factory=set)
+    same_domain: Set[IndexPair] = field(default_factory=set)
+    follow_up: Set[IndexPair] = field(default_factory=set)
+
+
+@dataclass(frozen=True)
+class _TimedBucket:
+    times: List[datetime]
+    members: List[int]
+
+
+def _ordered_index_pair(idx_a: int, idx_b: int) -> IndexPair:
+    return (idx_a, idx_b) if idx_a < idx_b else (idx_b, idx_a)
+
+
+def _build_timed_bucket(members: Iterable[int], keys: Sequence[BlockingKeys]) -> _TimedBucket:
+    timed: List[Tuple[datetime, int]] = []
+    for idx in members:
+        anchor = keys[idx].anchor
+        if anchor is not None:
+            timed.append((anchor, idx))
+    timed.sort()
+    return _TimedBucket(times=[item[0] for item in timed], members=[item[1] for item in timed])
+
+
+class BlockingRelationEngine:
+    """Finds relation candidates inside blocking buckets instead of over all object pairs.
+
+    Objects are bucketed by anchor day, by normalized person and by domain. SAME_DAY,
+    SAME_PERSON and SAME_DOMAIN pairs are exactly the pairs that share a bucket, and
+    FOLLOW_UP pairs come from a sorted time sweep over the person and domain buckets,
+    so the cost is O(n log n + emitted pairs) rather than O(n^2).
+    """
+
+    def __init__(
+        self,
+        keys: Sequence[BlockingKeys],
+        *,
+        follow_up_window: timedelta = timedelta(days=7),
+    ) -> None:
+        self.keys = list(keys)
+        self.follow_up_window = follow_up_window
+
+        self._day_buckets: Dict[str, List[int]] = {}
+        self._person_buckets: Dict[str, List[int]] = {}
+        self._domain_buckets: Dict[str, List[int]] = {}
+        for idx, key in enumerate(self.keys):
+            if key.day:
+                self._day_buckets.setdefault(key.day, []).append(idx)
+            for person in key.people:
+                self._person_buckets.setdefault(person, []).append(idx)
+            if key.domain:
+                self._domain_buckets.setdefault(key.domain, []).append(idx)
+
+        self._timed_person_buckets = {
+            person: _build_timed_bucket(members, self.keys)
+            for person, members in self._person_buckets.items()
+        }
+        self._timed_domain_buckets = {
+            domain: _build_timed_bucket(members, self.keys)
+            for domain, members in self._domain_buckets.items()
+        }
+
+    def candidate_pairs(self, focus: Optional[Iterable[int]] = None) -> CandidatePairs:
+        """Return qualifying pairs; with ``focus``, only pairs touching those indexes."""
+        if focus is None:
+            return self._all_pairs()
+        return self._focused_pairs(sorted(set(focus)))
+
+    def _all_pairs(self) -> CandidatePairs:
+        pairs = CandidatePairs()
+        for members in self._day_buckets.values():
+            pairs.same_day.update(combinations(members, 2))
+        for members in self._person_buckets.values():
+            pairs.same_person.update(combinations(members, 2))
+        for members in self._domain_buckets.values():
+            pairs.same_domain.update(combinations(members, 2))
+
+        window = self.follow_up_window
+        for bucket in self._context_buckets():
+            times = bucket.times
+            members = bucket.members
+            for pos in range(len(members)):
+                start_time = times[pos]
+                cursor = pos + 1
+                while cursor < len(members) and times[cursor] - start_time <= window:
+                    if times[cursor] > start_time:
+                        pairs.follow_up.add(_ordered_index_pair(members[pos], members[cursor]))
+                    cursor += 1
+        return pairs
+
+    def _focused_pairs(self, focus: Sequence[int]) -> CandidatePairs:
+        pairs = CandidatePairs()
+        window = self.follow_up_window
+        for idx in focus:
+            key = self.keys[idx]
+            if key.day:
+                pairs.same_day.update(
+                    _ordered_index_pair(idx, other)
+                    for other in self._day_buckets[key.day]
+                    if other != idx
+                )
+            for person in key.people:
+                pairs.same_person.update(
+                    _ordered_index_pair(idx, other)
+                    for other in self._person_buckets[person]
+                    if other != idx
+                )
+            if key.domain:
+                pairs.same_domain.update(
+                    _ordered_index_pair(idx, other)
+                    for other in self._domain_buckets[key.domain]
+                    if other != idx
+                )
+
+            anchor = key.anchor
+            if anchor is None:
+                continue
+            buckets = [self._timed_person_buckets[person] for person in key.people]
+            if key.domain:
+                buckets.append(self._timed_domain_buckets[key.domain])
+            for bucket in buckets:
+                lower = bisect_left(bucket.times, anchor - window)
+                upper = bisect_right(bucket.times, anchor + window)
+                for pos in range(lower, upper):
+                    if bucket.times[pos] != anchor:
+                        pairs.follow_up.add(_ordered_index_pair(idx, bucket.members[pos]))
+        return pairs
+
+    def _context_buckets(self) -> List[_TimedBucket]:
+        return [*self._timed_person_buckets.values(), *self._timed_domain_buckets.values()]
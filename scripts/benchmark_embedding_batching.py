@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+from embeddings.models import SentenceTransformerEmbeddingModel, plan_token_batches
+from embeddings.structured_text import build_structured_embedding_text
+
+WORDS = (
+    "project review budget launch follow up draft design meeting client invoice travel "
+    "plan notes summary decision risk owner deadline roadmap hiring feedback agenda"
+).split()
+
+
+@dataclass(frozen=True)
+class SyntheticObject:
+    title: str
+    content: str
+    people: List[str]
+    domain: str
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Embedding throughput of token-budget batching vs fixed-size batches on a mixed corpus."
+    )
+    parser.add_argument("--texts", type=int, default=5_000, help="Objects in the mixed corpus.")
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2", help="Sentence-transformer model.")
+    parser.add_argument("--local-files-only", action="store_true", help="Do not download the model.")
+    parser.add_argument("--batch-size", type=int, default=32, help="Fixed batch size of the baseline.")
+    parser.add_argument(
+        "--budgets",
+        default="4096,16384,65536",
+        help="Comma-separated max_tokens_per_batch values to benchmark.",
+    )
+    parser.add_argument("--seed", type=int, default=7, help="Corpus seed.")
+    return parser
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def mixed_corpus(count: int, seed: int) -> List[str]:
+    """Shuffled reminders (a few tokens), calendar events (tens) and notes (hundreds+)."""
+    rng = random.Random(seed)
+    objects: List[SyntheticObject] = []
+    for _ in range(count):
+        kind = rng.choices(("reminders", "calendar", "notes"), weights=(5, 3, 2))[0]
+        if kind == "reminders":
+            obj = SyntheticObject(_sentence(rng, 3), "", [], kind)
+        elif kind == "calendar":
+            obj = SyntheticObject(_sentence(rng, 4), _sentence(rng, rng.randint(10, 40)), ["Alex", "Sam"], kind)
+        else:
+            obj = SyntheticObject(_sentence(rng, 5), _sentence(rng, int(rng.paretovariate(1.2) * 80)), ["Alex"], kind)
+        objects.append(obj)
+    return [build_structured_embedding_text(obj) for obj in objects]
+
+
+def padded_tokens(token_lengths: Sequence[int], batches: Sequence[Sequence[int]]) -> int:
+    return sum(len(batch) * max(token_lengths[idx] for idx in batch) for batch in batches)
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    texts = mixed_corpus(args.texts, args.seed)
+    model = SentenceTransformerEmbeddingModel(args.model, local_files_only=args.local_files_only)
+    lengths = model.token_lengths(texts)
+    real_tokens = sum(lengths)
+    model.embed_array(texts[:64])
+
+    def report(row: Dict[str, object], batches: Sequence[Sequence[int]], seconds: float) -> None:
+        row.update(
+            texts=len(texts),
+            tokens=real_tokens,
+            batches=len(batches),
+            padding_ratio=round(padded_tokens(lengths, batches) / real_tokens, 3),
+            seconds=round(seconds, 3),
+            texts_per_second=round(len(texts) / seconds, 1) if seconds else None,
+        )
+        print(json.dumps(row, ensure_ascii=True))
+
+    # Input-order fixed batches: every batch pads to its longest member.
+    fixed = [list(range(start, min(start + args.batch_size, len(texts)))) for start in range(0, len(texts), args.batch_size)]
+    start = time.perf_counter()
+    for batch in fixed:
+        model._model.encode([texts[idx] for idx in batch], batch_size=len(batch), convert_to_numpy=True)
+    report({"strategy": "fixed_input_order", "batch_size": args.batch_size}, fixed, time.perf_counter() - start)
+
+    for budget in (int(value) for value in args.budgets.split(",") if value.strip()):
+        model.max_tokens_per_batch = budget
+        batches = plan_token_batches(lengths, max_tokens_per_batch=budget, max_batch_size=model.max_batch_size)
+        start = time.perf_counter()
+        model.embed_array(texts)
+        report({"strategy": "token_budget", "max_tokens_per_batch": budget}, batches, time.perf_counter() - start)
+
+if __name__ == "__main__":
+    main()
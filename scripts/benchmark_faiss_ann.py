@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Set, Tuple
+
+from embeddings.faiss_store import FaissIndexConfig, LocalFaissStore
+
+# (index type, search parameter swept, values)
+SWEEPS: Tuple[Tuple[str, str, Tuple[int, ...]], ...] = (
+    ("flat", "", (0,)),
+    ("ivf_flat", "nprobe", (1, 4, 16, 64)),
+    ("ivf_pq", "nprobe", (1, 4, 16, 64)),
+    ("hnsw", "ef_search", (16, 64, 256)),
+)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Recall@k and query latency of approximate LocalFaissStore index types vs flat search."
+    )
+    parser.add_argument("--vectors", type=int, default=100_000, help="Vectors in the index.")
+    parser.add_argument("--dimension", type=int, default=384, help="Vector dimension.")
+    parser.add_argument("--clusters", type=int, default=1_000, help="Gaussian clusters in the synthetic corpus.")
+    parser.add_argument("--queries", type=int, default=500, help="Sequential queries per setting.")
+    parser.add_argument("--top-k", type=int, default=10, help="Neighbours per query.")
+    parser.add_argument("--pq-m", type=int, default=48, help="PQ sub-quantizers for ivf_pq.")
+    parser.add_argument(
+        "--index-types",
+        default=",".join(sweep[0] for sweep in SWEEPS),
+        help="Comma-separated index types to benchmark (flat always runs as ground truth).",
+    )
+    parser.add_argument("--seed", type=int, default=7, help="Random vector seed.")
+    return parser
+
+
+def synthetic_corpus(args: argparse.Namespace) -> Tuple[Any, Any]:
+    """Clustered vectors, closer to sentence embeddings than isotropic noise."""
+    import numpy as np
+
+    rng = np.random.default_rng(args.seed)
+    centers = rng.standard_normal((args.clusters, args.dimension)).astype(np.float32)
+    total = args.vectors + args.queries
+    assignments = rng.integers(0, args.clusters, size=total)
+    points = centers[assignments] + 0.6 * rng.standard_normal((total, args.dimension)).astype(np.float32)
+    return points[: args.vectors], points[args.vectors :]
+
+
+def recall_at_k(results: Sequence[Sequence[Tuple[str, float]]], truth: Sequence[Set[str]]) -> float:
+    found = sum(len({canonical_id for canonical_id, _ in hits} & expected) for hits, expected in zip(results, truth))
+    wanted = sum(len(expected) for expected in truth)
+    return found / max(wanted, 1)
+
+
+def time_queries(store: LocalFaissStore, queries: Any, top_k: int) -> Tuple[List[List[Tuple[str, float]]], float]:
+    store.count()
+    results: List[List[Tuple[str, float]]] = []
+    start = time.perf_counter()
+    for query in queries:
+        results.append(store.search(query, top_k=top_k))
+    return results, time.perf_counter() - start
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    vectors, queries = synthetic_corpus(args)
+    canonical_ids = [f"co_{idx:08d}" for idx in range(args.vectors)]
+    wanted_types = {index_type.strip() for index_type in args.index_types.split(",") if index_type.strip()}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        truth: List[Set[str]] = []
+        flat_ms = 0.0
+        for index_type, parameter, values in SWEEPS:
+            if index_type != "flat" and index_type not in wanted_types:
+                continue
+            index_path = str(Path(tmp_dir) / f"{index_type}.faiss")
+            metadata_path = str(Path(tmp_dir) / f"{index_type}.meta.json")
+            config = FaissIndexConfig(index_type=index_type, pq_m=args.pq_m, seed=args.seed)
+
+            start = time.perf_counter()
+            LocalFaissStore(index_path, metadata_path, index_config=config).rebuild(canonical_ids, vectors)
+            build_seconds = time.perf_counter() - start
+
+            for value in values:
+                tuned = replace(config, **{parameter: value}) if parameter else config
+                store = LocalFaissStore(index_path, metadata_path, index_config=tuned)
+                results, seconds = time_queries(store, queries, args.top_k)
+                mean_ms = seconds * 1000 / max(len(queries), 1)
+                if index_type == "flat":
+                    truth = [{canonical_id for canonical_id, _ in hits} for hits in results]
+                    flat_ms = mean_ms
+
+                row: Dict[str, object] = {
+                    "index_type": index_type,
+                    "vectors": args.vectors,
+                    "dimension": args.dimension,
+                    "build_seconds": round(build_seconds, 3),
+                    "mean_query_ms": round(mean_ms, 3),
+                    "speedup_vs_flat": round(flat_ms / mean_ms, 2) if mean_ms else None,
+                    f"recall_at_{args.top_k}": round(recall_at_k(results, truth), 4),
+                }
+                if parameter:
+                    row[parameter] = value
+                print(json.dumps(row, ensure_ascii=True))
+
+
+if __name__ == "__main__":
+    main()
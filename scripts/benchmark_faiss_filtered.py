@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from embeddings.faiss_store import FaissIndexConfig, LocalFaissStore
+from embeddings.vector_store import VectorAttributes, VectorFilter
+from scripts.benchmark_faiss_ann import synthetic_corpus
+
+DOMAINS = ("work", "personal", "health", "finance", "travel")
+RECORD_TYPES = ("event", "note", "reminder")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Filtered LocalFaissStore search (ID selector) vs unfiltered search and over-fetch + post-filter."
+    )
+    parser.add_argument("--vectors", type=int, default=100_000, help="Vectors in the index.")
+    parser.add_argument("--dimension", type=int, default=384, help="Vector dimension.")
+    parser.add_argument("--clusters", type=int, default=1_000, help="Gaussian clusters in the synthetic corpus.")
+    parser.add_argument("--queries", type=int, default=200, help="Sequential queries per setting.")
+    parser.add_argument("--top-k", type=int, default=10, help="Neighbours per query.")
+    parser.add_argument("--days", type=int, default=365, help="Days spanned by anchor times.")
+    parser.add_argument("--overfetch", type=int, default=20, help="Over-fetch multiple for the post-filter baseline.")
+    parser.add_argument("--index-types", default="flat,hnsw", help="Comma-separated index types to benchmark.")
+    parser.add_argument("--seed", type=int, default=7, help="Random vector seed.")
+    return parser
+
+
+def synthetic_attributes(count: int, days: int, seed: int) -> List[VectorAttributes]:
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    domains = rng.integers(0, len(DOMAINS), size=count)
+    record_types = rng.integers(0, len(RECORD_TYPES), size=count)
+    hours = rng.integers(0, days * 24, size=count)
+    return [
+        VectorAttributes(
+            domain=DOMAINS[domains[idx]],
+            source_record_type=RECORD_TYPES[record_types[idx]],
+            anchor_at=start + timedelta(hours=int(hours[idx])),
+        )
+        for idx in range(count)
+    ]
+
+
+def matches(item: VectorAttributes, where: VectorFilter) -> bool:
+    """Reference predicate for the post-filter baseline (domains are already lowercase)."""
+    if where.domains and item.domain not in where.domains:
+        return False
+    if where.source_record_types and item.source_record_type not in where.source_record_types:
+        return False
+    if where.anchor_from is not None and (item.anchor_at is None or item.anchor_at < where.anchor_from):
+        return False
+    return where.anchor_to is None or (item.anchor_at is not None and item.anchor_at < where.anchor_to)
+
+
+def timed_queries(
+    store: LocalFaissStore,
+    queries: Any,
+    top_k: int,
+    where: Optional[VectorFilter],
+    *,
+    post_filter: Optional[Dict[str, VectorAttributes]] = None,
+    overfetch: int = 1,
+) -> Tuple[float, float]:
+    """Mean latency (ms) and mean hits per query; ``post_filter`` over-fetches unfiltered."""
+    hit_count = 0
+    start = time.perf_counter()
+    for query in queries:
+        if post_filter is None or where is None:
+            hits = store.search(query, top_k, where=where)
+        else:
+            candidates = store.search(query, top_k * overfetch)
+            hits = [hit for hit in candidates if matches(post_filter[hit[0]], where)][:top_k]
+        hit_count += len(hits)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    count = max(len(queries), 1)
+    return elapsed_ms / count, hit_count / count
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    vectors, queries = synthetic_corpus(args)
+    canonical_ids = [f"co_{idx:08d}" for idx in range(args.vectors)]
+    attributes = synthetic_attributes(args.vectors, args.days, args.seed)
+    attribute_by_id = dict(zip(canonical_ids, attributes))
+    window_start = datetime(2026, 1, 1, tzinfo=timezone.utc) + timedelta(days=args.days // 2)
+    filters = {
+        "domain": VectorFilter(domains=["work"]),
+        "domain_type_week": VectorFilter(
+            domains=["work"],
+            source_record_types=["event"],
+            anchor_from=window_start,
+            anchor_to=window_start + timedelta(days=7),
+        ),
+    }
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for index_type in (value.strip() for value in args.index_types.split(",") if value.strip()):
+            config = FaissIndexConfig(index_type=index_type, seed=args.seed)
+            index_path = str(Path(tmp_dir) / f"{index_type}.faiss")
+            metadata_path = str(Path(tmp_dir) / f"{index_type}.meta")
+            store = LocalFaissStore(index_path, metadata_path, index_config=config)
+            store.rebuild(canonical_ids, vectors, attributes=attributes)
+            store.count()
+
+            unfiltered_ms, _ = timed_queries(store, queries, args.top_k, None)
+            for name, where in filters.items():
+                filtered_ms, filtered_hits = timed_queries(store, queries, args.top_k, where)
+                post_ms, post_hits = timed_queries(
+                    store, queries, args.top_k, where, post_filter=attribute_by_id, overfetch=args.overfetch
+                )
+                print(
+                    json.dumps(
+                        {
+                            "index_type": index_type,
+                            "filter": name,
+                            "vectors": args.vectors,
+                            "matching_vectors": sum(1 for item in attributes if matches(item, where)),
+                            "unfiltered_ms": round(unfiltered_ms, 3),
+                            "filtered_ms": round(filtered_ms, 3),
+                            "post_filter_ms": round(post_ms, 3),
+                            "filtered_mean_hits": round(filtered_hits, 2),
+                            "post_filter_mean_hits": round(post_hits, 2),
+                        },
+                        ensure_ascii=True,
+                    )
+                )
+
+
+if __name__ == "__main__":
+    main()
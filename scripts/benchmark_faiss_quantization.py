@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Set
+
+from embeddings.faiss_store import VECTOR_ENCODINGS, FaissIndexConfig, LocalFaissStore
+from scripts.benchmark_faiss_ann import recall_at_k, synthetic_corpus, time_queries
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Index size, query latency and recall@k of fp16/int8 vector encodings vs float32."
+    )
+    parser.add_argument("--vectors", type=int, default=100_000, help="Vectors in the index.")
+    parser.add_argument("--dimension", type=int, default=384, help="Vector dimension.")
+    parser.add_argument("--clusters", type=int, default=1_000, help="Gaussian clusters in the synthetic corpus.")
+    parser.add_argument("--queries", type=int, default=500, help="Sequential queries per setting.")
+    parser.add_argument("--top-k", type=int, default=10, help="Neighbours per query.")
+    parser.add_argument("--index-types", default="flat,hnsw", help="Comma-separated index types to benchmark.")
+    parser.add_argument("--seed", type=int, default=7, help="Random vector seed.")
+    return parser
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    vectors, queries = synthetic_corpus(args)
+    canonical_ids = [f"co_{idx:08d}" for idx in range(args.vectors)]
+    index_types = [index_type.strip() for index_type in args.index_types.split(",") if index_type.strip()]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for index_type in index_types:
+            truth: List[Set[str]] = []
+            baseline_ms = 0.0
+            baseline_bytes = 0
+            # float32 first: it is the recall and size baseline for the other encodings.
+            for encoding in VECTOR_ENCODINGS:
+                config = FaissIndexConfig(index_type=index_type, vector_encoding=encoding, seed=args.seed)
+                index_path = Path(tmp_dir) / f"{index_type}_{encoding}.faiss"
+                metadata_path = Path(tmp_dir) / f"{index_type}_{encoding}.meta"
+
+                start = time.perf_counter()
+                LocalFaissStore(str(index_path), str(metadata_path), index_config=config).rebuild(
+                    canonical_ids, vectors
+                )
+                build_seconds = time.perf_counter() - start
+
+                store = LocalFaissStore(str(index_path), str(metadata_path), index_config=config)
+                results, seconds = time_queries(store, queries, args.top_k)
+                mean_ms = seconds * 1000 / max(len(queries), 1)
+                index_bytes = index_path.stat().st_size
+                if encoding == "float32":
+                    truth = [{canonical_id for canonical_id, _ in hits} for hits in results]
+                    baseline_ms = mean_ms
+                    baseline_bytes = index_bytes
+
+                print(
+                    json.dumps(
+                        {
+                            "index_type": index_type,
+                            "vector_encoding": encoding,
+                            "vectors": args.vectors,
+                            "dimension": args.dimension,
+                            "index_bytes": index_bytes,
+                            "bytes_per_vector": round(index_bytes / args.vectors, 1),
+                            "size_vs_float32": round(index_bytes / baseline_bytes, 3),
+                            "build_seconds": round(build_seconds, 3),
+                            "mean_query_ms": round(mean_ms, 3),
+                            "latency_vs_float32": round(mean_ms / baseline_ms, 3) if baseline_ms else None,
+                            f"recall_at_{args.top_k}": round(recall_at_k(results, truth), 4),
+                        },
+                        ensure_ascii=True,
+                    )
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+from embeddings.faiss_store import LocalFaissStore
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Compare per-query index reloads with a resident LocalFaissStore."
+    )
+    parser.add_argument("--vectors", type=int, default=100_000, help="Vectors in the index.")
+    parser.add_argument("--dimension", type=int, default=384, help="Vector dimension.")
+    parser.add_argument("--queries", type=int, default=1_000, help="Sequential queries per mode.")
+    parser.add_argument("--top-k", type=int, default=10, help="Neighbours per query.")
+    parser.add_argument("--seed", type=int, default=7, help="Random vector seed.")
+    return parser
+
+
+def time_queries(search: Callable[[Any], object], queries: Any) -> Dict[str, float]:
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    total = sum(latencies)
+    return {
+        "seconds": round(total, 4),
+        "mean_ms": round(total * 1000 / max(len(latencies), 1), 3),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 3),
+    }
+
+
+def main() -> None:
+    import numpy as np
+
+    args = build_parser().parse_args()
+    rng = np.random.default_rng(args.seed)
+    vectors = rng.standard_normal((args.vectors, args.dimension)).astype(np.float32)
+    queries = rng.standard_normal((args.queries, args.dimension)).astype(np.float32)
+    canonical_ids = [f"co_{idx:08d}" for idx in range(args.vectors)]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index_path = str(Path(tmp_dir) / "memory.faiss")
+        metadata_path = str(Path(tmp_dir) / "memory.meta.json")
+        LocalFaissStore(index_path, metadata_path).rebuild(canonical_ids, vectors)
+
+        def reload_per_query(query: Any) -> object:
+            return LocalFaissStore(index_path, metadata_path).search(query, top_k=args.top_k)
+
+        resident_store = LocalFaissStore(index_path, metadata_path)
+        resident_store.count()
+
+        def resident(query: Any) -> object:
+            return resident_store.search(query, top_k=args.top_k)
+
+        for mode, search in (("reload_per_query", reload_per_query), ("resident", resident)):
+            row: Dict[str, object] = {
+                "mode": mode,
+                "vectors": args.vectors,
+                "dimension": args.dimension,
+                "queries": args.queries,
+            }
+            row.update(time_queries(search, queries))
+            print(json.dumps(row, ensure_ascii=True))
+
+
+if __name__ == "__main__":
+    main()
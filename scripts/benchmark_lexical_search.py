@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import tempfile
+import time
+from itertools import accumulate
+from pathlib import Path
+from typing import List, Sequence
+
+from core.canonical_schema import CanonicalObject
+from embeddings.hybrid import HybridRetriever
+from storage.sqlite_store import SQLiteStore
+
+WORDS = (
+    "project review budget launch follow up draft design meeting client invoice travel "
+    "plan notes summary decision risk owner deadline roadmap hiring feedback agenda "
+    "dentist groceries flight hotel gym refactor release standup retro offsite"
+).split()
+# Real notes draw from a large vocabulary with Zipf-like frequencies; a handful of
+# common words alone would make every term match most rows.
+VOCABULARY = WORDS + [f"term{idx}" for idx in range(20_000)]
+ZIPF_WEIGHTS = [1.0 / rank for rank in range(1, len(VOCABULARY) + 1)]
+ZIPF_CUM_WEIGHTS = list(accumulate(ZIPF_WEIGHTS))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="FTS5 lexical search latency and the write cost of keeping the FTS index in sync."
+    )
+    parser.add_argument("--rows", type=int, default=100_000, help="Rows in canonical_objects.")
+    parser.add_argument("--queries", type=int, default=1_000, help="Lexical queries to time.")
+    parser.add_argument("--top-k", type=int, default=10, help="Hits per query.")
+    parser.add_argument("--seed", type=int, default=7, help="Corpus seed.")
+    return parser
+
+
+def sample_words(rng: random.Random, k: int) -> Sequence[str]:
+    return rng.choices(VOCABULARY, cum_weights=ZIPF_CUM_WEIGHTS, k=k)
+
+
+def synthetic_objects(rows: int, seed: int) -> List[CanonicalObject]:
+    rng = random.Random(seed)
+    return [
+        CanonicalObject(
+            canonical_id=f"co_{idx:08d}",
+            source_system="benchmark",
+            source_record_type=rng.choice(("note", "event", "reminder")),
+            title=" ".join(sample_words(rng, 3)),
+            content=" ".join(sample_words(rng, rng.randint(5, 120))),
+            people=[f"person{idx % 500}@example.com"],
+            domain=rng.choice(("work", "personal", "health")),
+        )
+        for idx in range(rows)
+    ]
+
+
+def time_upserts(store: SQLiteStore, objects: List[CanonicalObject]) -> float:
+    start = time.perf_counter()
+    for offset in range(0, len(objects), 5_000):
+        store.upsert_canonical_objects(objects[offset : offset + 5_000])
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    objects = synthetic_objects(args.rows, args.seed)
+    rng = random.Random(args.seed + 1)
+    # Queries use content words, not the Zipf head: a term found in most rows costs a
+    # full posting-list scan, since FTS5 scores every match before sorting.
+    queries = [" ".join(rng.choices(VOCABULARY, k=rng.randint(1, 3))) for _ in range(args.queries)]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        plain = SQLiteStore(str(Path(tmp_dir) / "plain.db"))
+        plain.initialize_schema()
+        with plain._connect() as conn:
+            conn.executescript(
+                "DROP TRIGGER canonical_objects_fts_insert; DROP TRIGGER canonical_objects_fts_delete; "
+                "DROP TRIGGER canonical_objects_fts_update; DROP TABLE canonical_objects_fts;"
+            )
+        plain_seconds = time_upserts(plain, objects)
+
+        store = SQLiteStore(str(Path(tmp_dir) / "fts.db"))
+        store.initialize_schema()
+        fts_seconds = time_upserts(store, objects)
+        print(
+            json.dumps(
+                {
+                    "mode": "upsert",
+                    "rows": args.rows,
+                    "without_fts_seconds": round(plain_seconds, 3),
+                    "with_fts_seconds": round(fts_seconds, 3),
+                    "overhead": round(fts_seconds / plain_seconds, 3),
+                },
+                ensure_ascii=True,
+            )
+        )
+
+        retriever = HybridRetriever(store)
+        for mode, search in (
+            ("search_text", lambda text: store.search_text(text, limit=args.top_k)),
+            ("hybrid_lexical_only", lambda text: retriever.search(text, top_k=args.top_k)),
+        ):
+            latencies: List[float] = []
+            for text in queries:
+                start = time.perf_counter()
+                search(text)
+                latencies.append((time.perf_counter() - start) * 1000)
+            latencies.sort()
+            print(
+                json.dumps(
+                    {
+                        "mode": mode,
+                        "rows": args.rows,
+                        "queries": len(queries),
+                        "mean_ms": round(sum(latencies) / len(latencies), 3),
+                        "p50_ms": round(latencies[len(latencies) // 2], 3),
+                        "p95_ms": round(latencies[int(len(latencies) * 0.95)], 3),
+                    },
+                    ensure_ascii=True,
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
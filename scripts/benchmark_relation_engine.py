@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Tuple
+
+from core.canonical_schema import CanonicalObject
+from graph.relation_builder import build_relations, build_relations_all_pairs
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the blocking-key relation engine against corpus size."
+    )
+    parser.add_argument(
+        "--sizes",
+        default="1000,10000,100000",
+        help="Comma-separated object counts to benchmark.",
+    )
+    parser.add_argument(
+        "--dense-sizes",
+        default="250,500,1000",
+        help="Comma-separated object counts for the dense same-day/same-person corpus.",
+    )
+    parser.add_argument(
+        "--pairwise-max",
+        type=int,
+        default=2000,
+        help="Also time the all-pairs reference for sizes up to this count.",
+    )
+    parser.add_argument("--seed", type=int, default=7, help="Synthetic corpus seed.")
+    return parser
+
+
+def synthetic_objects(count: int, seed: int) -> List[CanonicalObject]:
+    """Corpus whose bucket sizes stay constant as it grows, so the edge count is linear."""
+    rng = random.Random(seed)
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    span_hours = max(24, count // 10 * 24)
+    people_pool = max(1, count // 5)
+    domain_pool = max(1, count // 10)
+    record_types = ["note", "event", "reminder"]
+
+    objects: List[CanonicalObject] = []
+    for idx in range(count):
+        anchor = base + timedelta(hours=rng.randrange(span_hours))
+        record_type = record_types[idx % len(record_types)]
+        objects.append(
+            CanonicalObject(
+                canonical_id=f"co_{idx:08d}",
+                source_system="benchmark",
+                source_record_type=record_type,
+                title=f"Synthetic {record_type} {idx}",
+                start_at=anchor if record_type == "event" else None,
+                due_at=anchor if record_type == "reminder" else None,
+                created_at=anchor if record_type == "note" else None,
+                people=[f"person{rng.randrange(people_pool)}@example.com"],
+                domain=f"domain{rng.randrange(domain_pool)}",
+            )
+        )
+    return objects
+
+
+def dense_objects(count: int, seed: int) -> List[CanonicalObject]:
+    """Corpus packed into three days, two people and two domains.
+
+    Nearly every pair shares a day, a person or a domain, so the edge count grows
+    quadratically; this is the worst case for the blocking engine.
+    """
+    rng = random.Random(seed)
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    record_types = ["note", "event", "reminder"]
+
+    objects: List[CanonicalObject] = []
+    for idx in range(count):
+        anchor = base + timedelta(minutes=rng.randrange(3 * 24 * 60))
+        record_type = record_types[idx % len(record_types)]
+        objects.append(
+            CanonicalObject(
+                canonical_id=f"co_{idx:08d}",
+                source_system="benchmark",
+                source_record_type=record_type,
+                title=f"Dense {record_type} {idx}",
+                start_at=anchor if record_type == "event" else None,
+                due_at=anchor if record_type == "reminder" else None,
+                created_at=anchor if record_type == "note" else None,
+                people=[f"person{rng.randrange(2)}@example.com"],
+                domain=f"domain{rng.randrange(2)}",
+            )
+        )
+    return objects
+
+
+def parse_sizes(value: str) -> List[int]:
+    return [int(size) for size in value.split(",") if size.strip()]
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    corpora: List[Tuple[str, Callable[[int, int], List[CanonicalObject]], List[int]]] = [
+        ("sparse", synthetic_objects, parse_sizes(args.sizes)),
+        ("dense", dense_objects, parse_sizes(args.dense_sizes)),
+    ]
+
+    for corpus, make_objects, sizes in corpora:
+        for size in sizes:
+            objects = make_objects(size, args.seed)
+
+            start = time.perf_counter()
+            relations = build_relations(objects)
+            engine_seconds = time.perf_counter() - start
+
+            row: Dict[str, object] = {
+                "corpus": corpus,
+                "objects": size,
+                "relations": len(relations),
+                "engine_seconds": round(engine_seconds, 4),
+                "engine_us_per_object": round(engine_seconds * 1_000_000 / max(size, 1), 2),
+                "engine_us_per_relation": round(engine_seconds * 1_000_000 / max(len(relations), 1), 2),
+            }
+            if size <= args.pairwise_max:
+                start = time.perf_counter()
+                reference = build_relations_all_pairs(objects)
+                row["pairwise_seconds"] = round(time.perf_counter() - start, 4)
+                row["identical"] = reference == relations
+            print(json.dumps(row, ensure_ascii=True))
+
+
+if __name__ == "__main__":
+    main()
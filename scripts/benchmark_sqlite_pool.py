@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from core.canonical_schema import CanonicalObject
+from storage.sqlite_store import SQLiteStore
+
+# Primary-key lookup on (tenant_id, canonical_id); populate() writes the default tenant "".
+LOOKUP_SQL = (
+    "SELECT canonical_id, title, domain FROM canonical_objects WHERE tenant_id = '' AND canonical_id = ?"
+)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Compare per-call sqlite3.connect with pooled SQLiteStore connections."
+    )
+    parser.add_argument("--rows", type=int, default=100_000, help="Rows in canonical_objects.")
+    parser.add_argument("--lookups", type=int, default=5_000, help="Point lookups per mode.")
+    parser.add_argument("--db", default="", help="Database path (defaults to a temp file).")
+    return parser
+
+
+def populate(store: SQLiteStore, rows: int) -> List[str]:
+    store.initialize_schema()
+    canonical_ids = [f"co_{idx:08d}" for idx in range(rows)]
+    batch: List[CanonicalObject] = []
+    for idx, canonical_id in enumerate(canonical_ids):
+        batch.append(
+            CanonicalObject(
+                canonical_id=canonical_id,
+                source_system="benchmark",
+                source_record_type="note",
+                title=f"Synthetic note {idx}",
+                content="lorem ipsum " * 8,
+                people=[f"person{idx % 500}@example.com"],
+                domain=f"domain{idx % 20}",
+            )
+        )
+        if len(batch) == 5_000:
+            store.upsert_canonical_objects(batch)
+            batch = []
+    store.upsert_canonical_objects(batch)
+    return canonical_ids
+
+
+def per_call_lookup(db_path: str) -> Callable[[str], object]:
+    def lookup(canonical_id: str) -> object:
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        try:
+            return conn.execute(LOOKUP_SQL, (canonical_id,)).fetchone()
+        finally:
+            conn.close()
+
+    return lookup
+
+
+def pooled_lookup(store: SQLiteStore) -> Callable[[str], object]:
+    def lookup(canonical_id: str) -> object:
+        with store._connect() as conn:
+            return conn.execute(LOOKUP_SQL, (canonical_id,)).fetchone()
+
+    return lookup
+
+
+def time_lookups(lookup: Callable[[str], object], canonical_ids: List[str], count: int) -> float:
+    step = max(1, len(canonical_ids) // max(count, 1))
+    targets = [canonical_ids[(idx * step) % len(canonical_ids)] for idx in range(count)]
+    start = time.perf_counter()
+    for canonical_id in targets:
+        lookup(canonical_id)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = args.db or str(Path(tmp_dir) / "benchmark.db")
+        store = SQLiteStore(db_path)
+        canonical_ids = populate(store, args.rows)
+
+        for mode, lookup in (
+            ("per_call_connect", per_call_lookup(db_path)),
+            ("pooled", pooled_lookup(store)),
+        ):
+            seconds = time_lookups(lookup, canonical_ids, args.lookups)
+            print(
+                json.dumps(
+                    {
+                        "mode": mode,
+                        "rows": args.rows,
+                        "lookups": args.lookups,
+                        "seconds": round(seconds, 4),
+                        "us_per_lookup": round(seconds * 1_000_000 / max(args.lookups, 1), 2),
+                    },
+                    ensure_ascii=True,
+                )
+            )
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List
+
+from core.canonical_schema import CanonicalObject
+from state.accumulator import StateAccumulator
+from state.engine import DeterministicStateEngine
+from storage.sqlite_store import SQLiteStore
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Full recompute vs incremental StateAccumulator snapshots per agent dispatch."
+    )
+    parser.add_argument("--objects", type=int, default=100_000, help="Canonical objects in the store.")
+    parser.add_argument("--relations", type=int, default=100_000, help="FOLLOW_UP relations in the store.")
+    parser.add_argument("--days", type=int, default=30, help="Days the object anchors are spread over.")
+    parser.add_argument("--dispatches", type=int, default=50, help="get_state calls to time.")
+    parser.add_argument("--change-size", type=int, default=100, help="Objects in the timed change set.")
+    parser.add_argument("--seed", type=int, default=7, help="Corpus seed.")
+    return parser
+
+
+def synthetic_object(idx: int, rng: random.Random, base: datetime, minutes: int) -> CanonicalObject:
+    record_type = ("note", "event", "reminder")[idx % 3]
+    when = base + timedelta(minutes=rng.randrange(minutes))
+    return CanonicalObject(
+        canonical_id=f"co_{idx:08d}",
+        source_system="benchmark",
+        source_record_type=record_type,
+        title=f"Synthetic {record_type} {idx}",
+        start_at=when if record_type == "event" else None,
+        due_at=when if record_type == "reminder" else None,
+        created_at=when if record_type == "note" else None,
+        domain=rng.choice(("work", "personal", "health", "finance")),
+    )
+
+
+def mean_ms(samples: List[float]) -> float:
+    return round(sum(samples) / len(samples) * 1000, 3)
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    rng = random.Random(args.seed)
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    minutes = args.days * 24 * 60
+    now = base + timedelta(days=args.days - 3)
+    engine = DeterministicStateEngine()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = SQLiteStore(str(Path(tmp_dir) / "state.db"))
+        store.initialize_schema()
+        objects = [synthetic_object(idx, rng, base, minutes) for idx in range(args.objects)]
+        store.upsert_canonical_objects(objects)
+        relations: List[Dict[str, object]] = [
+            {
+                "relation_id": f"r_{idx:08d}",
+                "from_canonical_id": f"co_{rng.randrange(args.objects):08d}",
+                "to_canonical_id": f"co_{rng.randrange(args.objects):08d}",
+                "relation_type": "FOLLOW_UP",
+            }
+            for idx in range(args.relations)
+        ]
+        store.replace_relations(relations)
+
+        moments = [now + timedelta(seconds=idx) for idx in range(args.dispatches)]
+        full: List[float] = []
+        for moment in moments:
+            start = time.perf_counter()
+            expected = engine.calculate_from_store(store, now=moment)
+            full.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        accumulator = StateAccumulator.from_store(store, now=now)
+        build_seconds = time.perf_counter() - start
+        accumulator.save(store)
+        start = time.perf_counter()
+        accumulator = StateAccumulator.open(store, now=now)
+        resume_seconds = time.perf_counter() - start
+
+        incremental: List[float] = []
+        for moment in moments:
+            start = time.perf_counter()
+            actual = accumulator.snapshot(moment)
+            incremental.append(time.perf_counter() - start)
+
+        changed = [
+            synthetic_object(idx, rng, base, minutes) for idx in rng.sample(range(args.objects), args.change_size)
+        ]
+        changes = store.upsert_canonical_objects(changed)
+        start = time.perf_counter()
+        accumulator.apply_changes(store, changes.changed_ids, now=moments[-1])
+        apply_seconds = time.perf_counter() - start
+        identical = actual == expected and accumulator.snapshot(moments[-1]) == engine.calculate_from_store(
+            store, now=moments[-1]
+        )
+
+        print(
+            json.dumps(
+                {
+                    "objects": args.objects,
+                    "relations": args.relations,
+                    "dispatches": args.dispatches,
+                    "full_recompute_mean_ms": mean_ms(full),
+                    "accumulator_mean_ms": mean_ms(incremental),
+                    "accumulator_build_seconds": round(build_seconds, 3),
+                    "accumulator_resume_seconds": round(resume_seconds, 3),
+                    "apply_changes_ms": round(apply_seconds * 1000, 3),
+                    "change_size": len(changes.changed_ids),
+                    "identical": identical,
+                },
+                ensure_ascii=True,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Tuple
+
+from core.canonical_schema import CanonicalObject
+from state.columnar import StateColumns
+from state.engine import DeterministicStateEngine
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Object-walking vs columnar (NumPy) state engine latency on a synthetic corpus."
+    )
+    parser.add_argument("--objects", type=int, default=1_000_000, help="Canonical objects in the corpus.")
+    parser.add_argument("--relations", type=int, default=500_000, help="Relations (about half FOLLOW_UP).")
+    parser.add_argument("--days", type=int, default=60, help="Days the object anchors are spread over.")
+    parser.add_argument("--points", type=int, default=5, help="Distinct `now` values to evaluate.")
+    parser.add_argument("--seed", type=int, default=7, help="Corpus seed.")
+    return parser
+
+
+def synthetic_corpus(
+    objects: int, relations: int, days: int, seed: int
+) -> Tuple[List[CanonicalObject], List[Dict[str, object]], datetime]:
+    rng = random.Random(seed)
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    minutes = days * 24 * 60
+    record_types = ("note", "event", "reminder")
+    domains = ("work", "personal", "health", "finance", "")
+    corpus: List[CanonicalObject] = []
+    for idx in range(objects):
+        record_type = record_types[idx % 3]
+        when = base + timedelta(minutes=rng.randrange(minutes))
+        corpus.append(
+            CanonicalObject.model_construct(
+                canonical_id=f"co_{idx:08d}",
+                source_system="benchmark",
+                source_record_type=record_type,
+                title="",
+                content="",
+                start_at=when if record_type == "event" else None,
+                end_at=None,
+                due_at=when if record_type == "reminder" else None,
+                created_at=when if record_type == "note" else None,
+                updated_at=None,
+                people=[],
+                domain=rng.choice(domains),
+            )
+        )
+    edges: List[Dict[str, object]] = [
+        {
+            "from_canonical_id": f"co_{rng.randrange(objects):08d}",
+            "to_canonical_id": f"co_{rng.randrange(objects):08d}",
+            "relation_type": "FOLLOW_UP" if rng.random() < 0.5 else "SAME_PERSON",
+            "created_at": (base + timedelta(minutes=rng.randrange(minutes))).isoformat(),
+        }
+        for _ in range(relations)
+    ]
+    return corpus, edges, base + timedelta(days=days)
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    objects, relations, end = synthetic_corpus(args.objects, args.relations, args.days, args.seed)
+    step = timedelta(days=args.days) / (args.points + 1)
+    moments = [end - step * idx for idx in range(args.points)]
+    engine = DeterministicStateEngine()
+
+    start = time.perf_counter()
+    columns = StateColumns.build(objects, relations)
+    build_seconds = time.perf_counter() - start
+
+    object_ms: List[float] = []
+    columnar_ms: List[float] = []
+    identical = True
+    for now in moments:
+        start = time.perf_counter()
+        expected = engine.calculate(objects, relations, now=now)
+        object_ms.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        actual = engine.calculate_columnar(columns, now=now)
+        columnar_ms.append((time.perf_counter() - start) * 1000)
+        identical = identical and actual == expected
+
+    object_mean = sum(object_ms) / len(object_ms)
+    columnar_mean = sum(columnar_ms) / len(columnar_ms)
+    print(
+        json.dumps(
+            {
+                "objects": args.objects,
+                "relations": args.relations,
+                "points": len(moments),
+                "object_path_mean_ms": round(object_mean, 3),
+                "columnar_build_seconds": round(build_seconds, 3),
+                "columnar_mean_ms": round(columnar_mean, 3),
+                "speedup": round(object_mean / columnar_mean, 1),
+                "identical": identical,
+            },
+            ensure_ascii=True,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List
+
+from scripts.benchmark_state_accumulator import synthetic_object
+from state.engine import DeterministicStateEngine
+from state.history import StateHistory, iter_timestamps
+from storage.sqlite_store import SQLiteStore
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="State-history backfill: one accumulator sweep vs recomputing every point."
+    )
+    parser.add_argument("--objects", type=int, default=50_000, help="Canonical objects in the store.")
+    parser.add_argument("--relations", type=int, default=50_000, help="FOLLOW_UP relations in the store.")
+    parser.add_argument("--days", type=int, default=60, help="Days covered by objects and history.")
+    parser.add_argument("--step-minutes", type=int, default=60, help="History resolution.")
+    parser.add_argument("--naive-sample", type=int, default=10, help="Points recomputed from scratch.")
+    parser.add_argument("--seed", type=int, default=7, help="Corpus seed.")
+    return parser
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    rng = random.Random(args.seed)
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    minutes = args.days * 24 * 60
+    timestamps = list(iter_timestamps(base, base + timedelta(days=args.days), timedelta(minutes=args.step_minutes)))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = SQLiteStore(str(Path(tmp_dir) / "history.db"))
+        store.initialize_schema()
+        store.upsert_canonical_objects([synthetic_object(idx, rng, base, minutes) for idx in range(args.objects)])
+        relations: List[Dict[str, object]] = [
+            {
+                "relation_id": f"r_{idx:08d}",
+                "from_canonical_id": f"co_{rng.randrange(args.objects):08d}",
+                "to_canonical_id": f"co_{rng.randrange(args.objects):08d}",
+                "relation_type": "FOLLOW_UP",
+            }
+            for idx in range(args.relations)
+        ]
+        store.replace_relations(relations)
+        history = StateHistory(store)
+
+        start = time.perf_counter()
+        recorded = history.backfill(timestamps)
+        sweep_seconds = time.perf_counter() - start
+
+        engine = DeterministicStateEngine()
+        sample = rng.sample(timestamps, min(args.naive_sample, len(timestamps)))
+        by_time = {snapshot.computed_at: snapshot for snapshot in history.fetch_range()}
+        identical = True
+        start = time.perf_counter()
+        for moment in sample:
+            identical = identical and engine.calculate_from_store(store, now=moment) == by_time[moment]
+        naive_per_point = (time.perf_counter() - start) / len(sample)
+
+        query_start = base + timedelta(days=args.days // 3)
+        start = time.perf_counter()
+        week = history.fetch_range(query_start, query_start + timedelta(days=7))
+        range_ms = (time.perf_counter() - start) * 1000
+
+        print(
+            json.dumps(
+                {
+                    "objects": args.objects,
+                    "relations": args.relations,
+                    "points": recorded,
+                    "sweep_seconds": round(sweep_seconds, 3),
+                    "sweep_per_point_ms": round(sweep_seconds / recorded * 1000, 3),
+                    "naive_per_point_ms": round(naive_per_point * 1000, 3),
+                    "naive_estimated_seconds": round(naive_per_point * recorded, 1),
+                    "range_query_points": len(week),
+                    "range_query_ms": round(range_ms, 3),
+                    "identical": identical,
+                },
+                ensure_ascii=True,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
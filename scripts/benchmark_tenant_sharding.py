@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List
+
+from core.canonical_schema import CanonicalObject
+from scripts.benchmark_lexical_search import sample_words
+from storage.sqlite_store import CanonicalQuery, SQLiteStore
+from storage.tenant_router import TenantRouter
+
+BASE = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Ingest and query for many tenants: sharded TenantRouter vs one database file per tenant."
+    )
+    parser.add_argument("--tenants", type=int, default=10_000, help="Tenants on the host.")
+    parser.add_argument("--objects-per-tenant", type=int, default=20, help="Canonical objects per tenant.")
+    parser.add_argument("--shards", type=int, default=16, help="Shard database files.")
+    parser.add_argument("--batch-tenants", type=int, default=500, help="Tenants per upsert_many call.")
+    parser.add_argument("--baseline-tenants", type=int, default=200, help="Tenants ingested one file each.")
+    parser.add_argument("--queries", type=int, default=2_000, help="Tenant queries to time.")
+    parser.add_argument("--days", type=int, default=30, help="Days the object anchors are spread over.")
+    parser.add_argument("--seed", type=int, default=7, help="Corpus seed.")
+    return parser
+
+
+def tenant_objects(rng: random.Random, count: int, days: int) -> List[CanonicalObject]:
+    # Every tenant reuses the same canonical ids, as independent exports would.
+    return [
+        CanonicalObject(
+            canonical_id=f"co_{idx:08d}",
+            source_system="benchmark",
+            source_record_type="note",
+            title=" ".join(sample_words(rng, 3)),
+            content=" ".join(sample_words(rng, rng.randint(5, 40))),
+            created_at=BASE + timedelta(minutes=rng.randrange(days * 24 * 60)),
+            domain=rng.choice(("work", "personal", "health")),
+        )
+        for idx in range(count)
+    ]
+
+
+def percentile_ms(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000, 3)
+
+
+def directory_bytes(path: Path) -> int:
+    return sum(item.stat().st_size for item in path.rglob("*") if item.is_file())
+
+
+def tenant_query(store: SQLiteStore, rng: random.Random, days: int) -> None:
+    window = CanonicalQuery(anchor_from=BASE + timedelta(days=days - 7), anchor_to=BASE + timedelta(days=days))
+    list(store.query_canonical_objects(window, columns=("title", "domain")))
+    store.search_text(" ".join(sample_words(rng, 2)), limit=5)
+
+
+def time_queries(stores: Dict[str, SQLiteStore], rng: random.Random, queries: int, days: int) -> List[float]:
+    tenants = list(stores)
+    samples: List[float] = []
+    for _ in range(queries):
+        store = stores[rng.choice(tenants)]
+        start = time.perf_counter()
+        tenant_query(store, rng, days)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def time_cold_queries(paths: List[str], rng: random.Random, queries: int, days: int) -> List[float]:
+    # Thousands of tenant files cannot all stay open, so each request opens its own.
+    samples: List[float] = []
+    for _ in range(queries):
+        start = time.perf_counter()
+        store = SQLiteStore(rng.choice(paths))
+        tenant_query(store, rng, days)
+        store.close()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    rng = random.Random(args.seed)
+    tenants = [f"tenant-{idx:05d}" for idx in range(args.tenants)]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        router = TenantRouter(str(Path(tmp_dir) / "shards"), shard_count=args.shards)
+        sharded_seconds = 0.0
+        for offset in range(0, len(tenants), args.batch_tenants):
+            batch = {
+                tenant: tenant_objects(rng, args.objects_per_tenant, args.days)
+                for tenant in tenants[offset : offset + args.batch_tenants]
+            }
+            start = time.perf_counter()
+            router.upsert_many(batch)
+            sharded_seconds += time.perf_counter() - start
+
+        sharded_stores = {tenant: router.store_for(tenant) for tenant in tenants}
+        sharded_queries = time_queries(sharded_stores, rng, args.queries, args.days)
+        sample = rng.sample(tenants, min(200, len(tenants)))
+        isolated = all(
+            len(list(sharded_stores[tenant].iter_canonical_ids())) == args.objects_per_tenant for tenant in sample
+        )
+        router.close()
+        sharded_bytes = directory_bytes(Path(tmp_dir) / "shards")
+
+        baseline_dir = Path(tmp_dir) / "per_tenant"
+        baseline_stores: Dict[str, SQLiteStore] = {}
+        baseline_seconds = 0.0
+        for tenant in tenants[: args.baseline_tenants]:
+            objects = tenant_objects(rng, args.objects_per_tenant, args.days)
+            start = time.perf_counter()
+            store = SQLiteStore(str(baseline_dir / f"{tenant}.db"))
+            store.initialize_schema()
+            store.upsert_canonical_objects(objects)
+            baseline_seconds += time.perf_counter() - start
+            baseline_stores[tenant] = store
+        baseline_per_tenant = baseline_seconds / len(baseline_stores)
+        baseline_queries = time_queries(baseline_stores, rng, args.queries, args.days)
+        for store in baseline_stores.values():
+            store.close()
+        cold_queries = time_cold_queries(
+            [store.db_path for store in baseline_stores.values()], rng, args.queries, args.days
+        )
+        baseline_bytes_per_tenant = directory_bytes(baseline_dir) / len(baseline_stores)
+
+        print(
+            json.dumps(
+                {
+                    "tenants": args.tenants,
+                    "objects": args.tenants * args.objects_per_tenant,
+                    "shards": args.shards,
+                    "sharded_ingest_seconds": round(sharded_seconds, 3),
+                    "sharded_ingest_per_tenant_ms": round(sharded_seconds / args.tenants * 1000, 3),
+                    "per_file_ingest_per_tenant_ms": round(baseline_per_tenant * 1000, 3),
+                    "per_file_ingest_estimated_seconds": round(baseline_per_tenant * args.tenants, 1),
+                    "sharded_query_mean_ms": round(sum(sharded_queries) / len(sharded_queries) * 1000, 3),
+                    "sharded_query_p95_ms": percentile_ms(sharded_queries, 0.95),
+                    "per_file_open_query_mean_ms": round(sum(baseline_queries) / len(baseline_queries) * 1000, 3),
+                    "per_file_open_query_p95_ms": percentile_ms(baseline_queries, 0.95),
+                    "per_file_cold_query_mean_ms": round(sum(cold_queries) / len(cold_queries) * 1000, 3),
+                    "sharded_database_files": args.shards,
+                    "per_file_database_files": args.tenants,
+                    "sharded_mib": round(sharded_bytes / 2**20, 1),
+                    "per_file_estimated_mib": round(baseline_bytes_per_tenant * args.tenants / 2**20, 1),
+                    "isolated": isolated,
+                },
+                ensure_ascii=True,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,7 @@
+from state.accumulator import StateAccumulator
+from state.columnar import StateColumns
 from state.engine import DeterministicStateEngine, StateEngineConfig
+from state.history import StateHistory
 from state.models import StateFeatures, UserStateSnapshot
 
 __all__ = [
@@ -6,4 +9,7 @@ __all__ = [
     "UserStateSnapshot",
     "StateEngineConfig",
     "DeterministicStateEngine",
+    "StateColumns",
+    "StateAccumulator",
+    "StateHistory",
 ]
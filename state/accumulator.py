@@ -0,0 +1,359 @@
+from __future__ import annotations
+
+import heapq
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from state.engine import (
+    FOLLOW_UP,
+    DeterministicStateEngine,
+    StateEngineConfig,
+    _anchor_datetime,
+    _as_utc,
+    _relation_time_hint,
+)
+from state.models import StateFeatures, UserStateSnapshot
+from storage.canonical_record import CanonicalRecord
+from storage.sqlite_store import CanonicalQuery, SQLiteStore
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+_DAY_US = 86_400_000_000
+_UPCOMING_US = _DAY_US
+_RECORD_COLUMNS = (
+    "source_record_type",
+    "domain",
+    "start_at",
+    "end_at",
+    "due_at",
+    "created_at",
+    "updated_at",
+)
+_DOMAIN_PREFIX = "domain:"
+EdgeKey = Tuple[str, str]
+
+
+def _micros(value: datetime) -> int:
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def _optional_micros(value: Optional[datetime]) -> Optional[int]:
+    utc = _as_utc(value)
+    return None if utc is None else _micros(utc)
+
+
+def _from_micros(value: int) -> datetime:
+    return _EPOCH + value * _MICROSECOND
+
+
+@dataclass(frozen=True)
+class _LiveObject:
+    """State-relevant fields of an object whose recent window has not ended yet."""
+
+    anchor_us: int
+    due_us: Optional[int]
+    upcoming_us: Optional[int]
+    is_reminder: bool
+    domain: str
+
+
+@dataclass(frozen=True)
+class _LiveEdge:
+    created_us: Optional[int]
+    # Counted while ``now < end_us``; fixed when the edge is added.
+    end_us: int
+
+
+class StateAccumulator:
+    """Sliding-window state counters maintained from change sets instead of full scans.
+
+    Every feature of ``DeterministicStateEngine`` is a count of objects or FOLLOW_UP
+    edges that hold over a time interval (recent until ``anchor + recent_window``,
+    overdue from ``due``, upcoming from ``start - 24h``, ...). Each interval adds +1 to
+    a counter when it opens and -1 when it closes; deltas that lie in the future wait in
+    time-keyed buckets, and ``advance`` applies the buckets that have expired. Times are
+    integer microseconds, so snapshots equal ``calculate_from_store`` exactly.
+
+    Only objects whose recent window has not ended are kept, and the clock only moves
+    forward. ``apply_changes`` re-reads the given ids and the FOLLOW_UP edges of every
+    live object from the store. ``save`` persists the live set under the store's tenant,
+    in tables created by ``SQLiteStore.initialize_schema``, and ``open`` resumes from it
+    in a read transaction, without a scan. ``generation`` is the store generation the
+    counters reflect.
+    """
+
+    def __init__(self, config: Optional[StateEngineConfig] = None, *, now: Optional[datetime] = None) -> None:
+        self.config = config or StateEngineConfig()
+        current_time = _as_utc(now or datetime.now(timezone.utc))
+        assert current_time is not None
+        self.generation = 0
+        self._now_us = _micros(current_time)
+        self._recent_us = self.config.recent_window_days * _DAY_US
+        self._follow_up_us = self.config.follow_up_window_days * _DAY_US
+        self._counts: Dict[str, int] = {}
+        self._pending: Dict[int, Dict[str, int]] = {}
+        self._pending_times: List[int] = []
+        self._objects: Dict[str, _LiveObject] = {}
+        self._edges: Dict[EdgeKey, _LiveEdge] = {}
+        self._edges_by_id: Dict[str, Set[EdgeKey]] = {}
+
+    @property
+    def as_of(self) -> datetime:
+        return _from_micros(self._now_us)
+
+    @classmethod
+    def from_store(
+        cls,
+        store: SQLiteStore,
+        config: Optional[StateEngineConfig] = None,
+        *,
+        now: Optional[datetime] = None,
+    ) -> "StateAccumulator":
+        """Build from the store's recent window (the rows ``calculate_from_store`` reads)."""
+        accumulator = cls(config, now=now)
+        accumulator.generation = store.generation()
+        floor = accumulator.as_of - timedelta(days=accumulator.config.recent_window_days)
+        records = list(store.query_canonical_objects(CanonicalQuery(anchor_from=floor), columns=_RECORD_COLUMNS))
+        for record in records:
+            accumulator._add_object(record)
+        accumulator._add_edges(store.fetch_relations_for([r.canonical_id for r in records], types=[FOLLOW_UP]))
+        return accumulator
+
+    @classmethod
+    def open(
+        cls,
+        store: SQLiteStore,
+        config: Optional[StateEngineConfig] = None,
+        *,
+        now: Optional[datetime] = None,
+    ) -> "StateAccumulator":
+        """Resume the snapshot saved in ``store`` if it is current, else build and save one."""
+        accumulator = cls(config, now=now)
+        if accumulator._load(store):
+            return accumulator
+        accumulator = cls.from_store(store, config, now=now)
+        accumulator.save(store)
+        return accumulator
+
+    def advance(self, now: datetime) -> None:
+        """Move the clock to ``now``, applying every bucket of deltas that has come due."""
+        current_time = _as_utc(now)
+        assert current_time is not None
+        now_us = _micros(current_time)
+        if now_us < self._now_us:
+            raise ValueError("StateAccumulator cannot move back in time")
+        while self._pending_times and self._pending_times[0] <= now_us:
+            for key, delta in self._pending.pop(heapq.heappop(self._pending_times)).items():
+                self._counts[key] = self._counts.get(key, 0) + delta
+        self._now_us = now_us
+
+    def apply_changes(self, store: SQLiteStore, canonical_ids: Iterable[str], *, now: Optional[datetime] = None) -> None:
+        """Re-read ``canonical_ids`` and the FOLLOW_UP edges of every live object from ``store``.
+
+        Pass the ids of inserted, updated and deleted objects (``UpsertResult.changed_ids``)
+        after their relations have been rewritten. All live edges are re-read, not only
+        those touching ``canonical_ids``, because ``update_and_store_relations`` re-stamps
+        every edge's ``created_at``.
+        """
+        self.advance(now or datetime.now(timezone.utc))
+        # Read first: a write racing with the reads below then leaves the tag stale.
+        generation = store.generation()
+        ids = list(dict.fromkeys(canonical_ids))
+        for key in list(self._edges):
+            self._remove_edge(key)
+        for canonical_id in ids:
+            self._remove_object(canonical_id)
+        for record in store.fetch_canonical_records(ids, columns=_RECORD_COLUMNS):
+            self._add_object(record)
+        self._add_edges(store.fetch_relations_for(list(self._objects), types=[FOLLOW_UP]))
+        self.generation = generation
+
+    def features(self) -> Tuple[StateFeatures, str]:
+        """Features and dominant domain at ``as_of``; cost depends only on the domain count."""
+        totals: Dict[str, int] = {}
+        active_domain_count = 0
+        for key, count in self._counts.items():
+            if not key.startswith(_DOMAIN_PREFIX) or count <= 0:
+                continue
+            domain = key[len(_DOMAIN_PREFIX) :]
+            active_domain_count += 1 if domain else 0
+            label = domain or "general"
+            totals[label] = totals.get(label, 0) + count
+        domain_context = min(totals.items(), key=lambda item: (-item[1], item[0]))[0] if totals else "general"
+        features = StateFeatures(
+            recent_object_count=self._counts.get("recent", 0),
+            upcoming_24h_count=self._counts.get("upcoming", 0),
+            overdue_reminder_count=self._counts.get("overdue", 0),
+            follow_up_relation_count=self._counts.get("follow_up", 0),
+            active_domain_count=active_domain_count,
+        )
+        return features, domain_context
+
+    def snapshot(self, now: Optional[datetime] = None) -> UserStateSnapshot:
+        self.advance(now or datetime.now(timezone.utc))
+        features, domain_context = self.features()
+        return DeterministicStateEngine.score_features(features, domain_context, self.as_of)
+
+    def _schedule(self, at_us: int, key: str, delta: int) -> None:
+        bucket = self._pending.get(at_us)
+        if bucket is None:
+            bucket = self._pending[at_us] = {}
+            heapq.heappush(self._pending_times, at_us)
+        bucket[key] = bucket.get(key, 0) + delta
+
+    def _count(self, key: str, start_us: Optional[int], end_us: int, sign: int) -> None:
+        """Add ``sign`` to ``key`` over ``[start_us, end_us)``; -1 undoes an earlier +1."""
+        if end_us <= self._now_us or (start_us is not None and start_us >= end_us):
+            return
+        if start_us is None or start_us <= self._now_us:
+            self._counts[key] = self._counts.get(key, 0) + sign
+        else:
+            self._schedule(start_us, key, sign)
+        self._schedule(end_us, key, -sign)
+
+    def _object_intervals(self, live: _LiveObject) -> List[Tuple[str, Optional[int], int]]:
+        recent_end = live.anchor_us + self._recent_us + 1
+        intervals: List[Tuple[str, Optional[int], int]] = [
+            ("recent", None, recent_end),
+            (_DOMAIN_PREFIX + live.domain, None, recent_end),
+        ]
+        if live.is_reminder and live.due_us is not None:
+            intervals.append(("overdue", live.due_us + 1, recent_end))
+        if live.upcoming_us is not None:
+            intervals.append(("upcoming", live.upcoming_us - _UPCOMING_US, min(live.upcoming_us + 1, recent_end)))
+        return intervals
+
+    def _add_object(self, record: CanonicalRecord) -> None:
+        anchor = _anchor_datetime(record)
+        if anchor is None:
+            return
+        live = _LiveObject(
+            anchor_us=_micros(anchor),
+            due_us=_optional_micros(record.due_at),
+            upcoming_us=_optional_micros(record.start_at or record.due_at),
+            is_reminder=record.source_record_type == "reminder",
+            domain=record.domain.strip().lower(),
+        )
+        self._restore_object(record.canonical_id, live)
+
+    def _restore_object(self, canonical_id: str, live: _LiveObject) -> None:
+        if live.anchor_us + self._recent_us + 1 <= self._now_us:
+            return
+        self._objects[canonical_id] = live
+        for key, start_us, end_us in self._object_intervals(live):
+            self._count(key, start_us, end_us, 1)
+
+    def _remove_object(self, canonical_id: str) -> None:
+        live = self._objects.pop(canonical_id, None)
+        if live is not None:
+            for key, start_us, end_us in self._object_intervals(live):
+                self._count(key, start_us, end_us, -1)
+
+    def _add_edges(self, relations: Iterable[Dict[str, object]]) -> None:
+        for relation in relations:
+            if str(relation.get("relation_type") or "") != FOLLOW_UP:
+                continue
+            key = (str(relation.get("from_canonical_id") or ""), str(relation.get("to_canonical_id") or ""))
+            if key in self._edges:
+                continue
+            endpoint_ends = [
+                self._objects[canonical_id].anchor_us + self._recent_us + 1
+                for canonical_id in key
+                if canonical_id in self._objects
+            ]
+            if not endpoint_ends:
+                continue
+            created_us = _optional_micros(_relation_time_hint(relation))
+            end_us = max(endpoint_ends)
+            if created_us is not None:
+                end_us = min(end_us, created_us + self._follow_up_us + 1)
+            self._restore_edge(key, _LiveEdge(created_us=created_us, end_us=end_us))
+
+    def _restore_edge(self, key: EdgeKey, edge: _LiveEdge) -> None:
+        if edge.end_us <= self._now_us:
+            return
+        self._edges[key] = edge
+        for canonical_id in key:
+            self._edges_by_id.setdefault(canonical_id, set()).add(key)
+        self._count("follow_up", None, edge.end_us, 1)
+
+    def _remove_edge(self, key: EdgeKey) -> None:
+        edge = self._edges.pop(key)
+        for canonical_id in key:
+            keys = self._edges_by_id.get(canonical_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._edges_by_id[canonical_id]
+        self._count("follow_up", None, edge.end_us, -1)
+
+    def save(self, store: SQLiteStore) -> None:
+        """Persist the live objects and edges, dropping those whose window has ended."""
+        now_us = self._now_us
+        tenant_id = store.tenant_id
+        objects = [
+            (tenant_id, canonical_id, live.anchor_us, live.due_us, live.upcoming_us, int(live.is_reminder), live.domain)
+            for canonical_id, live in self._objects.items()
+            if live.anchor_us + self._recent_us + 1 > now_us
+        ]
+        edges = [(tenant_id, *key, edge.created_us, edge.end_us) for key, edge in self._edges.items() if edge.end_us > now_us]
+        with store.transaction() as conn:
+            conn.execute("DELETE FROM state_accumulator_objects WHERE tenant_id = ?", (tenant_id,))
+            conn.execute("DELETE FROM state_accumulator_edges WHERE tenant_id = ?", (tenant_id,))
+            conn.executemany("INSERT INTO state_accumulator_objects VALUES (?, ?, ?, ?, ?, ?, ?)", objects)
+            conn.executemany("INSERT INTO state_accumulator_edges VALUES (?, ?, ?, ?, ?)", edges)
+            conn.execute(
+                "INSERT OR REPLACE INTO state_accumulator VALUES (?, ?, ?, ?, ?)",
+                (tenant_id, now_us, self.generation, self.config.recent_window_days, self.config.follow_up_window_days),
+            )
+
+    def _load(self, store: SQLiteStore) -> bool:
+        """Restore a saved snapshot taken at or before ``as_of`` at the current store generation."""
+        with store.read_transaction() as conn:
+            generation = store.generation()
+            meta = conn.execute(
+                "SELECT as_of_us, store_generation, recent_window_days, follow_up_window_days "
+                "FROM state_accumulator WHERE tenant_id = ?",
+                (store.tenant_id,),
+            ).fetchone()
+            if meta is None or (
+                int(meta[1]),
+                int(meta[2]),
+                int(meta[3]),
+            ) != (generation, self.config.recent_window_days, self.config.follow_up_window_days):
+                return False
+            if int(meta[0]) > self._now_us:
+                return False
+            objects = conn.execute(
+                "SELECT canonical_id, anchor_us, due_us, upcoming_us, is_reminder, domain "
+                "FROM state_accumulator_objects WHERE tenant_id = ?",
+                (store.tenant_id,),
+            ).fetchall()
+            edges = conn.execute(
+                "SELECT from_canonical_id, to_canonical_id, created_us, end_us "
+                "FROM state_accumulator_edges WHERE tenant_id = ?",
+                (store.tenant_id,),
+            ).fetchall()
+
+        requested_us = self._now_us
+        self._now_us = int(meta[0])
+        self.generation = generation
+        for row in objects:
+            self._restore_object(
+                str(row[0]),
+                _LiveObject(
+                    anchor_us=int(row[1]),
+                    due_us=None if row[2] is None else int(row[2]),
+                    upcoming_us=None if row[3] is None else int(row[3]),
+                    is_reminder=bool(row[4]),
+                    domain=str(row[5]),
+                ),
+            )
+        for row in edges:
+            self._restore_edge(
+                (str(row[0]), str(row[1])),
+                _LiveEdge(created_us=None if row[2] is None else int(row[2]), end_us=int(row[3])),
+            )
+        self.advance(_from_micros(requested_us))
+        return True
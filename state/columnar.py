@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+from core.canonical_schema import CanonicalObject
+from state.engine import FOLLOW_UP, _anchor_datetime, _as_utc, _relation_time_hint
+from state.models import StateFeatures
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+# Column value for a missing timestamp; below every real time, so ``>=`` tests fail.
+NO_TIME = -(2**63)
+
+
+def _load_numpy() -> Any:
+    try:
+        import numpy as np
+    except ImportError as exc:
+        raise RuntimeError(
+            "numpy is required for the columnar state engine. Install with: pip install .[embeddings]"
+        ) from exc
+    return np
+
+
+def _micros(value: Optional[datetime]) -> int:
+    utc = _as_utc(value)
+    if utc is None:
+        return NO_TIME
+    return (utc - _EPOCH) // _MICROSECOND
+
+
+@dataclass(frozen=True)
+class StateColumns:
+    """Objects and FOLLOW_UP relations flattened into NumPy arrays for the state engine.
+
+    Timestamps are int64 UTC microseconds (``NO_TIME`` when unset), which compare
+    exactly like the datetimes they came from. Domains are stored as int32 codes into
+    ``domains`` (stripped and lowercased, code 0 is ``""``), and relation endpoints as
+    codes into the distinct object ids (-1 for ids not among the objects). Build once
+    with ``build`` and evaluate any ``now`` with ``features``.
+    """
+
+    anchor_us: Any
+    due_us: Any
+    upcoming_us: Any
+    is_reminder: Any
+    domain_codes: Any
+    domains: Tuple[str, ...]
+    id_codes: Any
+    id_count: int
+    follow_up_from: Any
+    follow_up_to: Any
+    follow_up_at_us: Any
+
+    @classmethod
+    def build(
+        cls,
+        objects: Sequence[CanonicalObject],
+        relations: Iterable[Dict[str, object]],
+    ) -> "StateColumns":
+        np = _load_numpy()
+        count = len(objects)
+        code_by_id: Dict[str, int] = {}
+        code_by_domain: Dict[str, int] = {"": 0}
+        id_codes = np.fromiter(
+            (code_by_id.setdefault(obj.canonical_id, len(code_by_id)) for obj in objects),
+            dtype=np.int64,
+            count=count,
+        )
+        domain_codes = np.fromiter(
+            (code_by_domain.setdefault(obj.domain.strip().lower(), len(code_by_domain)) for obj in objects),
+            dtype=np.int32,
+            count=count,
+        )
+        anchor_us = np.fromiter((_micros(_anchor_datetime(obj)) for obj in objects), dtype=np.int64, count=count)
+        due_us = np.fromiter((_micros(obj.due_at) for obj in objects), dtype=np.int64, count=count)
+        upcoming_us = np.fromiter((_micros(obj.start_at or obj.due_at) for obj in objects), dtype=np.int64, count=count)
+        is_reminder = np.fromiter((obj.source_record_type == "reminder" for obj in objects), dtype=bool, count=count)
+
+        follow_up_from = []
+        follow_up_to = []
+        follow_up_at_us = []
+        for relation in relations:
+            if str(relation.get("relation_type") or "") != FOLLOW_UP:
+                continue
+            follow_up_from.append(code_by_id.get(str(relation.get("from_canonical_id") or ""), -1))
+            follow_up_to.append(code_by_id.get(str(relation.get("to_canonical_id") or ""), -1))
+            follow_up_at_us.append(_micros(_relation_time_hint(relation)))
+
+        return cls(
+            anchor_us=anchor_us,
+            due_us=due_us,
+            upcoming_us=upcoming_us,
+            is_reminder=is_reminder,
+            domain_codes=domain_codes,
+            domains=tuple(code_by_domain),
+            id_codes=id_codes,
+            id_count=len(code_by_id),
+            follow_up_from=np.asarray(follow_up_from, dtype=np.int64),
+            follow_up_to=np.asarray(follow_up_to, dtype=np.int64),
+            follow_up_at_us=np.asarray(follow_up_at_us, dtype=np.int64),
+        )
+
+    def __len__(self) -> int:
+        return len(self.anchor_us)
+
+    def features(
+        self,
+        *,
+        now: datetime,
+        recent_floor: datetime,
+        follow_up_floor: datetime,
+    ) -> Tuple[StateFeatures, str]:
+        """State features and dominant domain at ``now``, with the engine's semantics."""
+        np = _load_numpy()
+        now_us = _micros(now)
+        recent = self.anchor_us >= _micros(recent_floor)
+        overdue = recent & self.is_reminder & (self.due_us != NO_TIME) & (self.due_us < now_us)
+        upcoming = (
+            recent & (self.upcoming_us >= now_us) & (self.upcoming_us <= _micros(now + timedelta(hours=24)))
+        )
+
+        domain_counts = np.bincount(self.domain_codes[recent], minlength=len(self.domains))
+        totals: Dict[str, int] = {}
+        for code in np.flatnonzero(domain_counts):
+            label = self.domains[code] or "general"
+            totals[label] = totals.get(label, 0) + int(domain_counts[code])
+        domain_context = min(totals.items(), key=lambda item: (-item[1], item[0]))[0] if totals else "general"
+
+        # Slot ``id_count`` stays False, so code -1 (an unknown endpoint) never matches.
+        recent_ids = np.zeros(self.id_count + 1, dtype=bool)
+        recent_ids[self.id_codes[recent]] = True
+        follow_ups = (recent_ids[self.follow_up_from] | recent_ids[self.follow_up_to]) & (
+            (self.follow_up_at_us == NO_TIME) | (self.follow_up_at_us >= _micros(follow_up_floor))
+        )
+
+        features = StateFeatures(
+            recent_object_count=int(np.count_nonzero(recent)),
+            upcoming_24h_count=int(np.count_nonzero(upcoming)),
+            overdue_reminder_count=int(np.count_nonzero(overdue)),
+            follow_up_relation_count=int(np.count_nonzero(follow_ups)),
+            active_domain_count=int(np.count_nonzero(domain_counts[1:])),
+        )
+        return features, domain_context
@@ -2,11 +2,15 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Dict, Iterable, Optional, Sequence, Set
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Sequence, Set, Union
 
 from core.canonical_schema import CanonicalObject
 from state.models import StateFeatures, UserStateSnapshot
-from storage.sqlite_store import SQLiteStore
+from storage.canonical_record import CanonicalRecord
+from storage.sqlite_store import CanonicalQuery, SQLiteStore
+
+if TYPE_CHECKING:
+    from state.columnar import StateColumns
 
 FOLLOW_UP = "FOLLOW_UP"
 
@@ -23,7 +27,8 @@ def _as_utc(dt: Optional[datetime]) -> Optional[datetime]:
     return dt.astimezone(timezone.utc)
 
 
-def _anchor_datetime(obj: CanonicalObject) -> Optional[datetime]:
+def _anchor_datetime(obj: Union[CanonicalObject, CanonicalRecord]) -> Optional[datetime]:
+    # Mirrored by the indexed canonical_objects.anchor_at column.
     return _as_utc(obj.start_at or obj.due_at or obj.updated_at or obj.created_at or obj.end_at)
 
 
@@ -84,12 +89,40 @@ class DeterministicStateEngine:
                 continue
             follow_up_relation_count += 1
 
-        recent_object_count = len(recent_objects)
+        return self.score_features(
+            StateFeatures(
+                recent_object_count=len(recent_objects),
+                upcoming_24h_count=upcoming_24h_count,
+                overdue_reminder_count=overdue_reminder_count,
+                follow_up_relation_count=follow_up_relation_count,
+                active_domain_count=active_domain_count,
+            ),
+            domain_context,
+            current_time,
+        )
+
+    def calculate_columnar(self, columns: StateColumns, *, now: Optional[datetime] = None) -> UserStateSnapshot:
+        """Same snapshot as ``calculate`` over pre-built arrays; see ``StateColumns``."""
+        current_time = _as_utc(now or datetime.now(timezone.utc))
+        assert current_time is not None
+        features, domain_context = columns.features(
+            now=current_time,
+            recent_floor=current_time - timedelta(days=self.config.recent_window_days),
+            follow_up_floor=current_time - timedelta(days=self.config.follow_up_window_days),
+        )
+        return self.score_features(features, domain_context, current_time)
+
+    @staticmethod
+    def score_features(features: StateFeatures, domain_context: str, current_time: datetime) -> UserStateSnapshot:
+        """Turn feature counts into the scored snapshot; shared by every evaluation path."""
+        recent_object_count = features.recent_object_count
+        overdue_reminder_count = features.overdue_reminder_count
+        upcoming_24h_count = features.upcoming_24h_count
         context_switch_ratio = (
-            float(active_domain_count) / float(recent_object_count) if recent_object_count else 0.0
+            float(features.active_domain_count) / float(recent_object_count) if recent_object_count else 0.0
         )
         follow_up_density = (
-            float(follow_up_relation_count) / float(recent_object_count) if recent_object_count else 0.0
+            float(features.follow_up_relation_count) / float(recent_object_count) if recent_object_count else 0.0
         )
 
         energy_level = _clamp(
@@ -126,13 +159,6 @@ class DeterministicStateEngine:
             1.0,
         )
 
-        features = StateFeatures(
-            recent_object_count=recent_object_count,
-            upcoming_24h_count=upcoming_24h_count,
-            overdue_reminder_count=overdue_reminder_count,
-            follow_up_relation_count=follow_up_relation_count,
-            active_domain_count=active_domain_count,
-        )
         diagnostics: Dict[str, float] = {
             "context_switch_ratio": context_switch_ratio,
             "follow_up_density": follow_up_density,
@@ -149,9 +175,20 @@ class DeterministicStateEngine:
         )
 
     def calculate_from_store(self, store: SQLiteStore, *, now: Optional[datetime] = None) -> UserStateSnapshot:
-        objects = store.fetch_canonical_objects()
-        relations = store.fetch_relations()
-        return self.calculate(objects, relations, now=now)
+        # Every feature is derived from objects inside the recent window, so only that
+        # anchor range is loaded; calculate() re-applies the same filter exactly.
+        current_time = _as_utc(now or datetime.now(timezone.utc))
+        assert current_time is not None
+        recent_floor = current_time - timedelta(days=self.config.recent_window_days)
+        objects = [
+            record.to_canonical_object()
+            for record in store.query_canonical_objects(CanonicalQuery(anchor_from=recent_floor))
+        ]
+        relations = store.fetch_relations_for(
+            [obj.canonical_id for obj in objects],
+            types=[FOLLOW_UP],
+        )
+        return self.calculate(objects, relations, now=current_time)
 
     @staticmethod
     def _is_recent(obj: CanonicalObject, recent_floor: datetime) -> bool:
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+from state.accumulator import StateAccumulator
+from state.engine import StateEngineConfig, _as_utc
+from state.models import StateFeatures, UserStateSnapshot
+from storage.sqlite_store import SQLiteStore
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+# Rows per executemany batch when recording history.
+_WRITE_BATCH = 1_000
+
+
+def _micros(value: datetime) -> int:
+    utc = _as_utc(value)
+    assert utc is not None
+    return (utc - _EPOCH) // _MICROSECOND
+
+
+def iter_timestamps(start: datetime, end: datetime, step: timedelta) -> Iterator[datetime]:
+    """``start, start + step, ...`` up to but excluding ``end``."""
+    if step <= timedelta(0):
+        raise ValueError("step must be positive")
+    current = start
+    while current < end:
+        yield current
+        current += step
+
+
+class StateHistory:
+    """Time series of state snapshots kept in the store's database.
+
+    Rows are keyed by the store's tenant, the engine windows and ``computed_at`` (UTC
+    microseconds), so histories for different tenants or ``StateEngineConfig`` values
+    do not mix and re-recording a timestamp replaces it. ``fetch_range`` reads rows
+    back through the primary key without touching canonical objects. The table is
+    created by ``SQLiteStore.initialize_schema``.
+
+    ``backfill`` computes many timestamps in one ascending sweep of a
+    ``StateAccumulator``: the recent window of the earliest timestamp is loaded once,
+    and each later point only applies the interval edges that fall between it and the
+    previous one.
+    """
+
+    def __init__(self, store: SQLiteStore, config: Optional[StateEngineConfig] = None) -> None:
+        self.store = store
+        self.config = config or StateEngineConfig()
+
+    def record(self, snapshots: Iterable[UserStateSnapshot]) -> int:
+        """Insert or replace snapshots by ``computed_at``; returns how many were written."""
+        key = (self.store.tenant_id, self.config.recent_window_days, self.config.follow_up_window_days)
+        written = 0
+        batch: List[Tuple[Any, ...]] = []
+        for snapshot in snapshots:
+            features = snapshot.features
+            batch.append(
+                (
+                    *key,
+                    _micros(snapshot.computed_at),
+                    snapshot.energy_level,
+                    snapshot.stress_probability,
+                    snapshot.focus_index,
+                    snapshot.execution_velocity,
+                    snapshot.domain_context,
+                    features.recent_object_count,
+                    features.upcoming_24h_count,
+                    features.overdue_reminder_count,
+                    features.follow_up_relation_count,
+                    features.active_domain_count,
+                    json.dumps(snapshot.diagnostics, sort_keys=True, separators=(",", ":")),
+                )
+            )
+            if len(batch) >= _WRITE_BATCH:
+                written += self._write(batch)
+                batch = []
+        return written + self._write(batch)
+
+    def _write(self, rows: List[Tuple[Any, ...]]) -> int:
+        if rows:
+            with self.store.transaction() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO state_history VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+        return len(rows)
+
+    def fetch_range(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        *,
+        limit: Optional[int] = None,
+    ) -> List[UserStateSnapshot]:
+        """Recorded snapshots with ``start <= computed_at < end``, oldest first."""
+        sql = (
+            "SELECT * FROM state_history "
+            "WHERE tenant_id = ? AND recent_window_days = ? AND follow_up_window_days = ?"
+        )
+        params: List[object] = [
+            self.store.tenant_id,
+            self.config.recent_window_days,
+            self.config.follow_up_window_days,
+        ]
+        if start is not None:
+            sql += " AND computed_at_us >= ?"
+            params.append(_micros(start))
+        if end is not None:
+            sql += " AND computed_at_us < ?"
+            params.append(_micros(end))
+        sql += " ORDER BY computed_at_us"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self.store.connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [
+            UserStateSnapshot(
+                energy_level=float(row["energy_level"]),
+                stress_probability=float(row["stress_probability"]),
+                focus_index=float(row["focus_index"]),
+                execution_velocity=float(row["execution_velocity"]),
+                domain_context=str(row["domain_context"]),
+                computed_at=_EPOCH + int(row["computed_at_us"]) * _MICROSECOND,
+                features=StateFeatures(
+                    recent_object_count=int(row["recent_object_count"]),
+                    upcoming_24h_count=int(row["upcoming_24h_count"]),
+                    overdue_reminder_count=int(row["overdue_reminder_count"]),
+                    follow_up_relation_count=int(row["follow_up_relation_count"]),
+                    active_domain_count=int(row["active_domain_count"]),
+                ),
+                diagnostics={key: float(value) for key, value in json.loads(row["diagnostics_json"]).items()},
+            )
+            for row in rows
+        ]
+
+    def compute(self, timestamps: Iterable[datetime]) -> Iterator[UserStateSnapshot]:
+        """Snapshots at ``timestamps`` (sorted, duplicates dropped) from one accumulator sweep."""
+        accumulator: Optional[StateAccumulator] = None
+        for moment in sorted({_micros(value) for value in timestamps}):
+            now = _EPOCH + moment * _MICROSECOND
+            if accumulator is None:
+                accumulator = StateAccumulator.from_store(self.store, self.config, now=now)
+            yield accumulator.snapshot(now)
+
+    def backfill(self, timestamps: Iterable[datetime]) -> int:
+        """Compute and record snapshots at ``timestamps``; returns the number recorded."""
+        return self.record(self.compute(timestamps))
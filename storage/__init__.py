@@ -1,3 +1,16 @@
-from storage.sqlite_store import SQLiteStore
+from storage.canonical_record import CanonicalRecord
+from storage.connection_pool import SQLiteConnectionConfig, SQLiteConnectionPool
+from storage.sqlite_store import CanonicalQuery, RelationDiff, SQLiteStore, UpsertResult
+from storage.tenant_router import TenantRouter, open_store
 
-__all__ = ["SQLiteStore"]
+__all__ = [
+    "SQLiteStore",
+    "UpsertResult",
+    "RelationDiff",
+    "CanonicalRecord",
+    "CanonicalQuery",
+    "SQLiteConnectionConfig",
+    "SQLiteConnectionPool",
+    "TenantRouter",
+    "open_store",
+]
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from datetime import datetime
+from functools import cached_property
+from typing import Any, List, Optional, Tuple
+
+from core.canonical_schema import CanonicalObject
+
+CANONICAL_COLUMNS: Tuple[str, ...] = (
+    "canonical_id",
+    "source_system",
+    "source_record_type",
+    "title",
+    "content",
+    "start_at",
+    "end_at",
+    "due_at",
+    "created_at",
+    "updated_at",
+    "people_json",
+    "labels_json",
+    "domain",
+)
+
+
+def _parse_iso(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+class CanonicalRecord:
+    """Read-only view of a ``canonical_objects`` row that decodes fields on first access.
+
+    Only the selected columns are available; JSON lists and timestamps are decoded the
+    first time they are read, and ``to_canonical_object`` hydrates the pydantic model
+    only when a caller actually needs it.
+    """
+
+    def __init__(self, row: sqlite3.Row) -> None:
+        self._row = row
+
+    def _column(self, name: str) -> Any:
+        try:
+            return self._row[name]
+        except IndexError as exc:
+            raise AttributeError(f"column {name!r} was not selected for this record") from exc
+
+    @property
+    def canonical_id(self) -> str:
+        return str(self._column("canonical_id"))
+
+    @property
+    def source_system(self) -> str:
+        return str(self._column("source_system"))
+
+    @property
+    def source_record_type(self) -> str:
+        return str(self._column("source_record_type"))
+
+    @property
+    def title(self) -> str:
+        return str(self._column("title"))
+
+    @property
+    def content(self) -> str:
+        return str(self._column("content"))
+
+    @property
+    def domain(self) -> str:
+        return str(self._column("domain"))
+
+    @cached_property
+    def start_at(self) -> Optional[datetime]:
+        return _parse_iso(self._column("start_at"))
+
+    @cached_property
+    def end_at(self) -> Optional[datetime]:
+        return _parse_iso(self._column("end_at"))
+
+    @cached_property
+    def due_at(self) -> Optional[datetime]:
+        return _parse_iso(self._column("due_at"))
+
+    @cached_property
+    def created_at(self) -> Optional[datetime]:
+        return _parse_iso(self._column("created_at"))
+
+    @cached_property
+    def updated_at(self) -> Optional[datetime]:
+        return _parse_iso(self._column("updated_at"))
+
+    @cached_property
+    def people(self) -> List[str]:
+        return list(json.loads(self._column("people_json")))
+
+    @cached_property
+    def labels(self) -> List[str]:
+        return list(json.loads(self._column("labels_json")))
+
+    def to_canonical_object(self) -> CanonicalObject:
+        row = self._row
+        return CanonicalObject(
+            canonical_id=row["canonical_id"],
+            source_system=row["source_system"],
+            source_record_type=row["source_record_type"],
+            title=row["title"],
+            content=row["content"],
+            start_at=row["start_at"],
+            end_at=row["end_at"],
+            due_at=row["due_at"],
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+            people=self.people,
+            labels=self.labels,
+            domain=row["domain"],
+        )
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, List, Optional
+
+
+@dataclass(frozen=True)
+class SQLiteConnectionConfig:
+    """Pool sizing and per-connection pragmas for long-lived SQLite connections."""
+
+    pool_size: int = 4
+    acquire_timeout_seconds: float = 30.0
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    mmap_size_bytes: int = 256 * 1024 * 1024
+    cache_size_kib: int = 64 * 1024
+    busy_timeout_ms: int = 5000
+    cached_statements: int = 256
+
+
+class SQLiteConnectionPool:
+    """Thread-aware pool of long-lived SQLite connections for one database file.
+
+    A thread holds at most one connection at a time: nested ``connection()`` or
+    ``transaction()`` blocks on the same thread reuse it, so store calls made inside
+    an explicit transaction join that transaction. Connections run in autocommit mode
+    and keep their prepared-statement cache for the lifetime of the pool.
+    """
+
+    def __init__(self, db_path: str, config: Optional[SQLiteConnectionConfig] = None) -> None:
+        self.db_path = db_path
+        self.config = config or SQLiteConnectionConfig()
+        if self.config.pool_size < 1:
+            raise ValueError("pool_size must be at least 1")
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.config.pool_size)
+        self._idle: List[sqlite3.Connection] = []
+        self._local = threading.local()
+        self._closed = False
+
+    def _open(self) -> sqlite3.Connection:
+        config = self.config
+        conn = sqlite3.connect(
+            self.db_path,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=config.cached_statements,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute(f"PRAGMA busy_timeout = {int(config.busy_timeout_ms)}")
+        conn.execute(f"PRAGMA journal_mode = {config.journal_mode}")
+        conn.execute(f"PRAGMA synchronous = {config.synchronous}")
+        conn.execute(f"PRAGMA mmap_size = {int(config.mmap_size_bytes)}")
+        conn.execute(f"PRAGMA cache_size = {-int(config.cache_size_kib)}")
+        return conn
+
+    def _checkout(self) -> sqlite3.Connection:
+        if not self._slots.acquire(timeout=self.config.acquire_timeout_seconds):
+            raise TimeoutError(f"no SQLite connection available for {self.db_path}")
+        try:
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("connection pool is closed")
+                if self._idle:
+                    return self._idle.pop()
+            return self._open()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _checkin(self, conn: sqlite3.Connection) -> None:
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            with self._lock:
+                if self._closed:
+                    conn.close()
+                else:
+                    self._idle.append(conn)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        current: Optional[sqlite3.Connection] = getattr(self._local, "conn", None)
+        if current is not None:
+            yield current
+            return
+
+        conn = self._checkout()
+        self._local.conn = conn
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self._checkin(conn)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run the block in one write transaction, or join the thread's open one."""
+        with self.connection() as conn:
+            if conn.in_transaction:
+                yield conn
+                return
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    @contextmanager
+    def read_transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run reads on one snapshot without the write lock, or join the thread's open one."""
+        with self.connection() as conn:
+            if conn.in_transaction:
+                yield conn
+                return
+            conn.execute("BEGIN DEFERRED")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
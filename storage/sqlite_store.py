@@ -1,88 +1,539 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import re
 import sqlite3
-from datetime import datetime
+from dataclasses import dataclass
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Sequence
+from typing import Any, ContextManager, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 from core.canonical_schema import CanonicalObject
+from storage.canonical_record import CANONICAL_COLUMNS, CanonicalRecord
+from storage.connection_pool import SQLiteConnectionConfig, SQLiteConnectionPool
+
+RelationKey = Tuple[str, str, str]
+# Above this many ids, lookups stage them in a temp table instead of bound parameters.
+_INLINE_ID_LIMIT = 500
+CanonicalRow = Tuple[Optional[str], ...]
+# Columns indexed by canonical_objects_fts, with their BM25 weights. ``tenant_id`` is
+# indexed only to narrow matches to one tenant and never contributes to the score.
+_FTS_COLUMNS = ("title", "content", "people_json", "domain", "tenant_id")
+_FTS_WEIGHTS = (4.0, 1.0, 2.0, 1.0, 0.0)
+_FTS_TOKEN = re.compile(r"\w+", re.UNICODE)
+# Tables whose row writes advance ``SQLiteStore.generation``.
+_GENERATION_TABLES = ("canonical_objects", "relations")
+# ``doc_id`` is an explicit INTEGER PRIMARY KEY (a rowid alias) so that VACUUM keeps it
+# stable: the FTS index and keyset pagination are keyed by it.
+_CANONICAL_OBJECTS_TABLE = """
+CREATE TABLE IF NOT EXISTS canonical_objects (
+    doc_id INTEGER PRIMARY KEY,
+    canonical_id TEXT NOT NULL,
+    source_system TEXT NOT NULL,
+    source_record_type TEXT NOT NULL,
+    title TEXT NOT NULL DEFAULT '',
+    content TEXT NOT NULL DEFAULT '',
+    start_at TEXT,
+    end_at TEXT,
+    due_at TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    people_json TEXT NOT NULL,
+    labels_json TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    content_hash TEXT,
+    anchor_at TEXT,
+    ingested_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    tenant_id TEXT NOT NULL DEFAULT '',
+    UNIQUE (tenant_id, canonical_id)
+)
+"""
+_RELATIONS_TABLE = """
+CREATE TABLE IF NOT EXISTS relations (
+    relation_id TEXT NOT NULL,
+    from_canonical_id TEXT NOT NULL,
+    to_canonical_id TEXT NOT NULL,
+    relation_type TEXT NOT NULL,
+    reason TEXT NOT NULL DEFAULT '',
+    confidence REAL NOT NULL DEFAULT 1.0,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    tenant_id TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (tenant_id, relation_id),
+    FOREIGN KEY(tenant_id, from_canonical_id)
+        REFERENCES canonical_objects(tenant_id, canonical_id) ON DELETE CASCADE,
+    FOREIGN KEY(tenant_id, to_canonical_id)
+        REFERENCES canonical_objects(tenant_id, canonical_id) ON DELETE CASCADE,
+    UNIQUE(tenant_id, from_canonical_id, to_canonical_id, relation_type)
+)
+"""
 
 
 def _to_iso(dt: Optional[datetime]) -> Optional[str]:
     return dt.isoformat() if dt is not None else None
 
 
+def _utc_sort_key(dt: datetime) -> str:
+    """Fixed-width UTC ISO text, so string order in SQLite matches chronological order."""
+    utc = dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+    return utc.isoformat(timespec="microseconds")
+
+
+def _anchor_at(obj: CanonicalObject) -> Optional[str]:
+    # Same precedence as state.engine._anchor_datetime.
+    candidate = obj.start_at or obj.due_at or obj.updated_at or obj.created_at or obj.end_at
+    return _utc_sort_key(candidate) if candidate is not None else None
+
+
+def _fts_match_expression(text: str, tenant_id: str = "") -> str:
+    """Quote each word so user text never parses as FTS5 syntax; any word may match.
+
+    Words only match the text columns. A ``tenant_id`` is ANDed in as a phrase on the
+    tenant column, so BM25 scores that tenant's rows instead of the whole database.
+    """
+    tokens = dict.fromkeys(token.lower() for token in _FTS_TOKEN.findall(text))
+    if not tokens:
+        return ""
+    terms = " OR ".join(f'"{token}"' for token in tokens)
+    expression = f"{{{' '.join(_FTS_COLUMNS[:-1])}}} : ({terms})"
+    if _FTS_TOKEN.search(tenant_id):
+        expression += ' AND tenant_id : "' + tenant_id.replace('"', '""') + '"'
+    return expression
+
+
+def _content_hash(row: CanonicalRow) -> str:
+    """Fingerprint every stored column of a canonical row (canonical_id included)."""
+    payload = json.dumps(list(row), ensure_ascii=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _relation_row(relation: Dict[str, Any]) -> Tuple[str, str, str, str, str, float]:
+    return (
+        relation["relation_id"],
+        relation["from_canonical_id"],
+        relation["to_canonical_id"],
+        relation["relation_type"],
+        relation.get("reason", ""),
+        float(relation.get("confidence", 1.0)),
+    )
+
+
+@dataclass(frozen=True)
+class UpsertResult:
+    """Canonical IDs touched by an upsert, split by what happened to each row."""
+
+    inserted_ids: Tuple[str, ...] = ()
+    updated_ids: Tuple[str, ...] = ()
+    unchanged_ids: Tuple[str, ...] = ()
+    deleted_ids: Tuple[str, ...] = ()
+
+    @property
+    def changed_ids(self) -> Tuple[str, ...]:
+        return tuple(sorted({*self.inserted_ids, *self.updated_ids, *self.deleted_ids}))
+
+
+@dataclass(frozen=True)
+class CanonicalQuery:
+    """Predicates for ``SQLiteStore.query_canonical_objects``.
+
+    The anchor window is half-open, ``anchor_from <= anchor < anchor_to``. Domain and
+    people matches are case-insensitive; each non-empty sequence is an any-of filter.
+    """
+
+    anchor_from: Optional[datetime] = None
+    anchor_to: Optional[datetime] = None
+    domains: Sequence[str] = ()
+    source_record_types: Sequence[str] = ()
+    people: Sequence[str] = ()
+
+
+def _compile_query(query: CanonicalQuery) -> Tuple[List[str], List[Any]]:
+    clauses: List[str] = []
+    params: List[Any] = []
+    if query.anchor_from is not None:
+        clauses.append("anchor_at >= ?")
+        params.append(_utc_sort_key(query.anchor_from))
+    if query.anchor_to is not None:
+        clauses.append("anchor_at < ?")
+        params.append(_utc_sort_key(query.anchor_to))
+    if query.domains:
+        clauses.append(f"lower(domain) IN ({', '.join('?' for _ in query.domains)})")
+        params.extend(domain.strip().lower() for domain in query.domains)
+    if query.source_record_types:
+        clauses.append(
+            f"source_record_type IN ({', '.join('?' for _ in query.source_record_types)})"
+        )
+        params.extend(query.source_record_types)
+    if query.people:
+        clauses.append(
+            "EXISTS (SELECT 1 FROM json_each(canonical_objects.people_json) "
+            f"WHERE lower(trim(json_each.value)) IN ({', '.join('?' for _ in query.people)}))"
+        )
+        params.extend(person.strip().lower() for person in query.people)
+    return clauses, params
+
+
+@dataclass(frozen=True)
+class RelationDiff:
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+
+
 class SQLiteStore:
-    """Local SQLite persistence for canonical objects and graph relations."""
+    """Local SQLite persistence for canonical objects and graph relations.
 
-    def __init__(self, db_path: str) -> None:
+    Every row carries a ``tenant_id`` and the store reads and writes only the rows of
+    its own tenant, so several tenants can share one database file (see
+    ``storage.tenant_router.TenantRouter``). A single-user database uses the default
+    tenant ``""``. Indexes lead with ``tenant_id``, so a tenant's lookups and range
+    scans never visit other tenants' rows.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        *,
+        connection_config: Optional[SQLiteConnectionConfig] = None,
+        pool: Optional[SQLiteConnectionPool] = None,
+        tenant_id: str = "",
+    ) -> None:
         self.db_path = db_path
+        self.tenant_id = tenant_id
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.pool = pool or SQLiteConnectionPool(db_path, connection_config)
+
+    def _connect(self) -> ContextManager[sqlite3.Connection]:
+        return self.pool.connection()
+
+    def transaction(self) -> ContextManager[sqlite3.Connection]:
+        """Group several store calls into one atomic write transaction."""
+        return self.pool.transaction()
+
+    def connection(self) -> ContextManager[sqlite3.Connection]:
+        """Pooled connection for reads, without taking the write lock.
 
-    def _connect(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        conn.execute("PRAGMA foreign_keys = ON")
-        return conn
+        Inside ``store.transaction()`` it is the transaction's connection.
+        """
+        return self._connect()
+
+    def read_transaction(self) -> ContextManager[sqlite3.Connection]:
+        """Like ``connection()``, but every read in the block sees the same snapshot."""
+        return self.pool.read_transaction()
+
+    def close(self) -> None:
+        self.pool.close()
 
     def initialize_schema(self) -> None:
+        """Create the schema, or migrate an older one, in a single write transaction.
+
+        Inside ``store.transaction()`` the migration joins the caller's transaction and
+        commits or rolls back with it.
+        """
+        with self.transaction() as conn:
+            for statement in (_CANONICAL_OBJECTS_TABLE, _RELATIONS_TABLE):
+                conn.execute(statement)
+            # Databases created before change detection lack the fingerprint column;
+            # NULL fingerprints make the next upsert report those rows as updated.
+            self._ensure_column(conn, "canonical_objects", "content_hash", "TEXT")
+            if self._ensure_column(conn, "canonical_objects", "anchor_at", "TEXT"):
+                self._backfill_anchor_at()
+            self._migrate_single_tenant(conn)
+            self._migrate_doc_id(conn)
+            for statement in (
+                "CREATE INDEX IF NOT EXISTS idx_canonical_objects_tenant "
+                "ON canonical_objects(tenant_id)",
+                "CREATE INDEX IF NOT EXISTS idx_canonical_objects_start_at "
+                "ON canonical_objects(tenant_id, start_at)",
+                "CREATE INDEX IF NOT EXISTS idx_canonical_objects_due_at "
+                "ON canonical_objects(tenant_id, due_at)",
+                "CREATE INDEX IF NOT EXISTS idx_canonical_objects_created_at "
+                "ON canonical_objects(tenant_id, created_at)",
+                "CREATE INDEX IF NOT EXISTS idx_canonical_objects_updated_at "
+                "ON canonical_objects(tenant_id, updated_at)",
+                "CREATE INDEX IF NOT EXISTS idx_canonical_objects_anchor_at "
+                "ON canonical_objects(tenant_id, anchor_at)",
+                "CREATE INDEX IF NOT EXISTS idx_canonical_objects_domain_anchor_at "
+                "ON canonical_objects(tenant_id, lower(domain), anchor_at)",
+                "CREATE INDEX IF NOT EXISTS idx_canonical_objects_type_anchor_at "
+                "ON canonical_objects(tenant_id, source_record_type, anchor_at)",
+                "CREATE INDEX IF NOT EXISTS idx_relations_created_at "
+                "ON relations(tenant_id, created_at)",
+                "CREATE INDEX IF NOT EXISTS idx_relations_type "
+                "ON relations(tenant_id, relation_type)",
+                "CREATE INDEX IF NOT EXISTS idx_relations_from_canonical_id "
+                "ON relations(tenant_id, from_canonical_id, relation_type)",
+                "CREATE INDEX IF NOT EXISTS idx_relations_to_canonical_id "
+                "ON relations(tenant_id, to_canonical_id, relation_type)",
+            ):
+                conn.execute(statement)
+            self._ensure_fts(conn)
+            self._ensure_generation(conn)
+            self._ensure_state_tables(conn)
+
+    @staticmethod
+    def _ensure_fts(conn: sqlite3.Connection) -> None:
+        """Create the FTS5 index over canonical_objects and the triggers that sync it.
+
+        It is an external-content table keyed by ``canonical_objects.doc_id``, so only the
+        inverted index is stored. Existing rows are indexed the first time it is created,
+        and an index keyed by the implicit rowid or built before the tenant column
+        existed is rebuilt.
+        """
+        existing = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'canonical_objects_fts'"
+        ).fetchone()
+        if existing is not None and "tenant_id" in existing[0] and "content_rowid='doc_id'" in existing[0]:
+            return
+        columns = ", ".join(_FTS_COLUMNS)
+        new_values = ", ".join(f"new.{column}" for column in _FTS_COLUMNS)
+        old_values = ", ".join(f"old.{column}" for column in _FTS_COLUMNS)
+        for statement in (
+            "DROP TRIGGER IF EXISTS canonical_objects_fts_insert",
+            "DROP TRIGGER IF EXISTS canonical_objects_fts_delete",
+            "DROP TRIGGER IF EXISTS canonical_objects_fts_update",
+            "DROP TABLE IF EXISTS canonical_objects_fts",
+            f"""
+            CREATE VIRTUAL TABLE canonical_objects_fts USING fts5(
+                {columns},
+                content='canonical_objects',
+                content_rowid='doc_id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+            """,
+            f"""
+            CREATE TRIGGER canonical_objects_fts_insert AFTER INSERT ON canonical_objects BEGIN
+                INSERT INTO canonical_objects_fts(rowid, {columns}) VALUES (new.doc_id, {new_values});
+            END
+            """,
+            f"""
+            CREATE TRIGGER canonical_objects_fts_delete AFTER DELETE ON canonical_objects BEGIN
+                INSERT INTO canonical_objects_fts(canonical_objects_fts, rowid, {columns})
+                VALUES ('delete', old.doc_id, {old_values});
+            END
+            """,
+            f"""
+            CREATE TRIGGER canonical_objects_fts_update AFTER UPDATE OF {columns} ON canonical_objects BEGIN
+                INSERT INTO canonical_objects_fts(canonical_objects_fts, rowid, {columns})
+                VALUES ('delete', old.doc_id, {old_values});
+                INSERT INTO canonical_objects_fts(rowid, {columns}) VALUES (new.doc_id, {new_values});
+            END
+            """,
+            "INSERT INTO canonical_objects_fts(canonical_objects_fts) VALUES ('rebuild')",
+        ):
+            conn.execute(statement)
+
+    @staticmethod
+    def _ensure_generation(conn: sqlite3.Connection) -> None:
+        """Create the per-tenant write counters behind ``generation`` and their triggers."""
+        statements = [
+            "CREATE TABLE IF NOT EXISTS tenant_generation ("
+            "tenant_id TEXT PRIMARY KEY, generation INTEGER NOT NULL)",
+        ]
+        for table in _GENERATION_TABLES:
+            for action, row in (("INSERT", "new"), ("UPDATE", "new"), ("DELETE", "old")):
+                statements.append(
+                    f"CREATE TRIGGER IF NOT EXISTS {table}_tenant_generation_{action.lower()} "
+                    f"AFTER {action} ON {table} BEGIN "
+                    f"INSERT INTO tenant_generation (tenant_id, generation) VALUES ({row}.tenant_id, 1) "
+                    "ON CONFLICT(tenant_id) DO UPDATE SET generation = generation + 1; END"
+                )
+        for statement in statements:
+            conn.execute(statement)
+
+    @staticmethod
+    def _ensure_state_tables(conn: sqlite3.Connection) -> None:
+        """Create the tables behind ``state.accumulator.StateAccumulator`` and ``StateHistory``."""
+        for statement in (
+            """
+            CREATE TABLE IF NOT EXISTS state_accumulator (
+                tenant_id TEXT PRIMARY KEY,
+                as_of_us INTEGER NOT NULL,
+                store_generation INTEGER NOT NULL,
+                recent_window_days INTEGER NOT NULL,
+                follow_up_window_days INTEGER NOT NULL
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS state_accumulator_objects (
+                tenant_id TEXT NOT NULL,
+                canonical_id TEXT NOT NULL,
+                anchor_us INTEGER NOT NULL,
+                due_us INTEGER,
+                upcoming_us INTEGER,
+                is_reminder INTEGER NOT NULL,
+                domain TEXT NOT NULL,
+                PRIMARY KEY (tenant_id, canonical_id)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS state_accumulator_edges (
+                tenant_id TEXT NOT NULL,
+                from_canonical_id TEXT NOT NULL,
+                to_canonical_id TEXT NOT NULL,
+                created_us INTEGER,
+                end_us INTEGER NOT NULL,
+                PRIMARY KEY (tenant_id, from_canonical_id, to_canonical_id)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS state_history (
+                tenant_id TEXT NOT NULL,
+                recent_window_days INTEGER NOT NULL,
+                follow_up_window_days INTEGER NOT NULL,
+                computed_at_us INTEGER NOT NULL,
+                energy_level REAL NOT NULL,
+                stress_probability REAL NOT NULL,
+                focus_index REAL NOT NULL,
+                execution_velocity REAL NOT NULL,
+                domain_context TEXT NOT NULL,
+                recent_object_count INTEGER NOT NULL,
+                upcoming_24h_count INTEGER NOT NULL,
+                overdue_reminder_count INTEGER NOT NULL,
+                follow_up_relation_count INTEGER NOT NULL,
+                active_domain_count INTEGER NOT NULL,
+                diagnostics_json TEXT NOT NULL,
+                PRIMARY KEY (tenant_id, recent_window_days, follow_up_window_days, computed_at_us)
+            ) WITHOUT ROWID
+            """,
+        ):
+            conn.execute(statement)
+
+    def generation(self) -> int:
+        """Counter bumped by every row of this tenant written to canonical_objects or relations.
+
+        Triggers maintain it, so writes from any connection or process are counted.
+        Derived state tagged with a generation is current while the value is unchanged;
+        writes by other tenants sharing the database file do not move it.
+        """
         with self._connect() as conn:
-            conn.executescript(
+            row = conn.execute(
+                "SELECT generation FROM tenant_generation WHERE tenant_id = ?", (self.tenant_id,)
+            ).fetchone()
+        return int(row[0]) if row is not None else 0
+
+    @staticmethod
+    def _ensure_column(conn: sqlite3.Connection, table: str, column: str, declaration: str) -> bool:
+        """Add ``column`` when missing; returns True if it had to be added."""
+        columns = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if column in columns:
+            return False
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+        return True
+
+    def _backfill_anchor_at(self) -> None:
+        """Fill ``anchor_at`` for rows written before the column existed.
+
+        The writes join the caller's transaction when ``initialize_schema`` runs inside one.
+        """
+        with self.transaction() as conn:
+            rows = conn.execute(
                 """
-                CREATE TABLE IF NOT EXISTS canonical_objects (
-                    canonical_id TEXT PRIMARY KEY,
-                    source_system TEXT NOT NULL,
-                    source_record_type TEXT NOT NULL,
-                    title TEXT NOT NULL DEFAULT '',
-                    content TEXT NOT NULL DEFAULT '',
-                    start_at TEXT,
-                    end_at TEXT,
-                    due_at TEXT,
-                    created_at TEXT,
-                    updated_at TEXT,
-                    people_json TEXT NOT NULL,
-                    labels_json TEXT NOT NULL,
-                    domain TEXT NOT NULL,
-                    ingested_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
-                );
-
-                CREATE TABLE IF NOT EXISTS relations (
-                    relation_id TEXT PRIMARY KEY,
-                    from_canonical_id TEXT NOT NULL,
-                    to_canonical_id TEXT NOT NULL,
-                    relation_type TEXT NOT NULL,
-                    reason TEXT NOT NULL DEFAULT '',
-                    confidence REAL NOT NULL DEFAULT 1.0,
-                    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY(from_canonical_id) REFERENCES canonical_objects(canonical_id) ON DELETE CASCADE,
-                    FOREIGN KEY(to_canonical_id) REFERENCES canonical_objects(canonical_id) ON DELETE CASCADE,
-                    UNIQUE(from_canonical_id, to_canonical_id, relation_type)
-                );
-
-                CREATE INDEX IF NOT EXISTS idx_canonical_objects_start_at
-                    ON canonical_objects(start_at);
-                CREATE INDEX IF NOT EXISTS idx_canonical_objects_due_at
-                    ON canonical_objects(due_at);
-                CREATE INDEX IF NOT EXISTS idx_canonical_objects_created_at
-                    ON canonical_objects(created_at);
-                CREATE INDEX IF NOT EXISTS idx_canonical_objects_updated_at
-                    ON canonical_objects(updated_at);
-                CREATE INDEX IF NOT EXISTS idx_relations_created_at
-                    ON relations(created_at);
-                CREATE INDEX IF NOT EXISTS idx_relations_type
-                    ON relations(relation_type);
+                SELECT canonical_id, COALESCE(start_at, due_at, updated_at, created_at, end_at) AS anchor
+                FROM canonical_objects
+                WHERE COALESCE(start_at, due_at, updated_at, created_at, end_at) IS NOT NULL
                 """
+            ).fetchall()
+            conn.executemany(
+                "UPDATE canonical_objects SET anchor_at = ? WHERE canonical_id = ?",
+                [(_utc_sort_key(datetime.fromisoformat(row["anchor"])), row["canonical_id"]) for row in rows],
             )
 
+    @classmethod
+    def _migrate_single_tenant(cls, conn: sqlite3.Connection) -> None:
+        """Move a database created before tenant support onto tenant-leading indexes.
+
+        Its tables keep their single-column keys, so it holds one tenant: the default
+        ``""``. Unique indexes give upserts the same conflict targets as new databases.
+        Nothing happens once canonical_objects has a ``tenant_id`` column. It runs in
+        the transaction of ``initialize_schema``.
+        """
+        if not cls._ensure_column(conn, "canonical_objects", "tenant_id", "TEXT NOT NULL DEFAULT ''"):
+            return
+        statements = [
+            f"DROP INDEX IF EXISTS {index}"
+            for index in (
+                "idx_canonical_objects_start_at",
+                "idx_canonical_objects_due_at",
+                "idx_canonical_objects_created_at",
+                "idx_canonical_objects_updated_at",
+                "idx_canonical_objects_anchor_at",
+                "idx_canonical_objects_domain_anchor_at",
+                "idx_canonical_objects_type_anchor_at",
+                "idx_relations_created_at",
+                "idx_relations_type",
+                "idx_relations_from_canonical_id",
+                "idx_relations_to_canonical_id",
+            )
+        ]
+        statements.append(
+            "CREATE UNIQUE INDEX idx_canonical_objects_tenant_key ON canonical_objects(tenant_id, canonical_id)"
+        )
+        if cls._ensure_column(conn, "relations", "tenant_id", "TEXT NOT NULL DEFAULT ''"):
+            statements.append(
+                "CREATE UNIQUE INDEX idx_relations_tenant_edge "
+                "ON relations(tenant_id, from_canonical_id, to_canonical_id, relation_type)"
+            )
+        for statement in statements:
+            conn.execute(statement)
+
+    @staticmethod
+    def _migrate_doc_id(conn: sqlite3.Connection) -> None:
+        """Rebuild a canonical_objects table created before ``doc_id`` around that key.
+
+        Each row keeps its old rowid as its ``doc_id``. relations references the table,
+        so its rows are copied aside and the table is recreated as well. Dropping the old
+        tables drops their indexes and triggers and the FTS index is dropped with them;
+        ``initialize_schema`` then recreates all three on the new key. Nothing happens
+        once canonical_objects has a ``doc_id`` column. It runs in the transaction of
+        ``initialize_schema``, after ``_migrate_single_tenant``.
+        """
+        object_columns = [row["name"] for row in conn.execute("PRAGMA table_info(canonical_objects)")]
+        if "doc_id" in object_columns:
+            return
+        objects = ", ".join(object_columns)
+        relations = ", ".join(row["name"] for row in conn.execute("PRAGMA table_info(relations)"))
+        for statement in (
+            f"CREATE TEMP TABLE relations_backup AS SELECT {relations} FROM relations",
+            "DROP TABLE relations",
+            "ALTER TABLE canonical_objects RENAME TO canonical_objects_old",
+            _CANONICAL_OBJECTS_TABLE,
+            f"INSERT INTO canonical_objects (doc_id, {objects}) SELECT rowid, {objects} FROM canonical_objects_old",
+            "DROP TABLE canonical_objects_old",
+            "DROP TABLE IF EXISTS canonical_objects_fts",
+            _RELATIONS_TABLE,
+            f"INSERT INTO relations ({relations}) SELECT {relations} FROM temp.relations_backup",
+            "DROP TABLE temp.relations_backup",
+        ):
+            conn.execute(statement)
+
+    @staticmethod
+    def _stage_ids(conn: sqlite3.Connection, canonical_ids: Iterable[str]) -> None:
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS scoped_ids (canonical_id TEXT PRIMARY KEY)")
+        conn.execute("DELETE FROM scoped_ids")
+        conn.executemany(
+            "INSERT OR IGNORE INTO scoped_ids (canonical_id) VALUES (?)",
+            ((canonical_id,) for canonical_id in canonical_ids),
+        )
+
     def upsert_canonical_object(self, obj: CanonicalObject) -> None:
         self.upsert_canonical_objects([obj])
 
-    def upsert_canonical_objects(self, objects: Sequence[CanonicalObject]) -> None:
-        if not objects:
-            return
+    def upsert_canonical_objects(
+        self,
+        objects: Sequence[CanonicalObject],
+        *,
+        prune_missing: bool = False,
+    ) -> UpsertResult:
+        """Insert or update objects; with ``prune_missing``, delete rows not in ``objects``.
+
+        Rows whose content fingerprint matches the stored one are not rewritten and are
+        reported as unchanged, so callers can limit downstream work to real changes.
+        """
+        if not objects and not prune_missing:
+            return UpsertResult()
 
-        rows = [
+        canonical_rows: List[CanonicalRow] = [
             (
                 obj.canonical_id,
                 obj.source_system,
@@ -101,7 +552,48 @@ class SQLiteStore:
             for obj in objects
         ]
 
-        with self._connect() as conn:
+        # Deterministic last-write-wins for repeated ids within one batch.
+        rows_by_id = {
+            obj.canonical_id: (*row, _anchor_at(obj), _content_hash(row), self.tenant_id)
+            for obj, row in zip(objects, canonical_rows)
+        }
+
+        with self.transaction() as conn:
+            self._stage_ids(conn, rows_by_id)
+            existing_hashes = {
+                row[0]: row[1]
+                for row in conn.execute(
+                    "SELECT canonical_id, content_hash FROM canonical_objects "
+                    "WHERE tenant_id = ? AND canonical_id IN (SELECT canonical_id FROM scoped_ids)",
+                    (self.tenant_id,),
+                )
+            }
+            inserted_ids = [cid for cid in rows_by_id if cid not in existing_hashes]
+            updated_ids = [
+                cid
+                for cid, row in rows_by_id.items()
+                if cid in existing_hashes and existing_hashes[cid] != row[-2]
+            ]
+            unchanged_ids = [
+                cid
+                for cid, row in rows_by_id.items()
+                if cid in existing_hashes and existing_hashes[cid] == row[-2]
+            ]
+            deleted_ids: List[str] = []
+            if prune_missing:
+                deleted_ids = [
+                    row[0]
+                    for row in conn.execute(
+                        "SELECT canonical_id FROM canonical_objects "
+                        "WHERE tenant_id = ? AND canonical_id NOT IN (SELECT canonical_id FROM scoped_ids)",
+                        (self.tenant_id,),
+                    )
+                ]
+                conn.execute(
+                    "DELETE FROM canonical_objects "
+                    "WHERE tenant_id = ? AND canonical_id NOT IN (SELECT canonical_id FROM scoped_ids)",
+                    (self.tenant_id,),
+                )
             conn.executemany(
                 """
                 INSERT INTO canonical_objects (
@@ -117,9 +609,12 @@ class SQLiteStore:
                     updated_at,
                     people_json,
                     labels_json,
-                    domain
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(canonical_id) DO UPDATE SET
+                    domain,
+                    anchor_at,
+                    content_hash,
+                    tenant_id
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(tenant_id, canonical_id) DO UPDATE SET
                     source_system = excluded.source_system,
                     source_record_type = excluded.source_record_type,
                     title = excluded.title,
@@ -131,67 +626,200 @@ class SQLiteStore:
                     updated_at = excluded.updated_at,
                     people_json = excluded.people_json,
                     labels_json = excluded.labels_json,
-                    domain = excluded.domain
+                    domain = excluded.domain,
+                    anchor_at = excluded.anchor_at,
+                    content_hash = excluded.content_hash
                 """,
-                rows,
+                [rows_by_id[cid] for cid in (*inserted_ids, *updated_ids)],
             )
 
-    def fetch_canonical_objects(self) -> List[CanonicalObject]:
-        with self._connect() as conn:
-            rows = conn.execute(
-                """
-                SELECT
-                    canonical_id,
-                    source_system,
-                    source_record_type,
-                    title,
-                    content,
-                    start_at,
-                    end_at,
-                    due_at,
-                    created_at,
-                    updated_at,
-                    people_json,
-                    labels_json,
-                    domain
-                FROM canonical_objects
-                """
-            ).fetchall()
+        return UpsertResult(
+            inserted_ids=tuple(sorted(inserted_ids)),
+            updated_ids=tuple(sorted(updated_ids)),
+            unchanged_ids=tuple(sorted(unchanged_ids)),
+            deleted_ids=tuple(sorted(deleted_ids)),
+        )
 
-        return [
-            CanonicalObject(
-                canonical_id=row["canonical_id"],
-                source_system=row["source_system"],
-                source_record_type=row["source_record_type"],
-                title=row["title"],
-                content=row["content"],
-                start_at=row["start_at"],
-                end_at=row["end_at"],
-                due_at=row["due_at"],
-                created_at=row["created_at"],
-                updated_at=row["updated_at"],
-                people=json.loads(row["people_json"]),
-                labels=json.loads(row["labels_json"]),
-                domain=row["domain"],
-            )
-            for row in rows
-        ]
+    @staticmethod
+    def _select_columns(columns: Optional[Sequence[str]]) -> List[str]:
+        selected = list(CANONICAL_COLUMNS) if columns is None else list(dict.fromkeys(columns))
+        unknown = [column for column in selected if column not in CANONICAL_COLUMNS]
+        if unknown:
+            raise ValueError(f"unknown canonical_objects columns: {', '.join(unknown)}")
+        if "canonical_id" not in selected:
+            selected.insert(0, "canonical_id")
+        return selected
 
-    def replace_relations(self, relations: Iterable[Dict[str, Any]]) -> None:
-        relation_rows = [
-            (
-                relation["relation_id"],
-                relation["from_canonical_id"],
-                relation["to_canonical_id"],
-                relation["relation_type"],
-                relation.get("reason", ""),
-                float(relation.get("confidence", 1.0)),
+    def iter_canonical_objects(
+        self,
+        *,
+        batch_size: int = 500,
+        columns: Optional[Sequence[str]] = None,
+    ) -> Iterator[CanonicalRecord]:
+        """Stream rows in storage order as lazily decoded records, ``batch_size`` at a time.
+
+        ``columns`` restricts the selected columns (``canonical_id`` is always included).
+        Each batch is read with a short keyset query on ``doc_id``, so no connection or
+        cursor is held between batches and memory stays flat regardless of table size.
+        """
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive")
+        query = (
+            f"SELECT doc_id, {', '.join(self._select_columns(columns))} FROM canonical_objects "
+            "WHERE tenant_id = ? AND doc_id > ? ORDER BY doc_id LIMIT ?"
+        )
+        return self._iter_keyset_batches(query, batch_size)
+
+    def _iter_keyset_batches(self, query: str, batch_size: int) -> Iterator[CanonicalRecord]:
+        last_doc_id = 0
+        while True:
+            with self._connect() as conn:
+                rows = conn.execute(query, (self.tenant_id, last_doc_id, batch_size)).fetchall()
+            if not rows:
+                return
+            last_doc_id = rows[-1]["doc_id"]
+            for row in rows:
+                yield CanonicalRecord(row)
+
+    def query_canonical_objects(
+        self,
+        query: CanonicalQuery,
+        *,
+        batch_size: int = 500,
+        columns: Optional[Sequence[str]] = None,
+    ) -> Iterator[CanonicalRecord]:
+        """Stream rows matching ``query`` as lazily decoded records.
+
+        Anchor, domain and record-type predicates are served by indexes. Rows come back
+        in anchor order when the query has an anchor bound, otherwise in storage order.
+        Each batch of ``batch_size`` rows is a keyset query resuming after the last
+        ``(anchor_at, doc_id)`` (or ``doc_id``) seen, so no connection is held between
+        batches and several iterators can be interleaved on one thread.
+        """
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive")
+        clauses, params = _compile_query(query)
+        by_anchor = query.anchor_from is not None or query.anchor_to is not None
+        # An anchor bound excludes NULL anchors, so '' sorts before every row's key.
+        if by_anchor:
+            clauses.append("(anchor_at, doc_id) > (?, ?)")
+            order = "anchor_at, doc_id"
+        else:
+            clauses.append("doc_id > ?")
+            order = "doc_id"
+        sql = (
+            f"SELECT doc_id, anchor_at AS keyset_anchor_at, {', '.join(self._select_columns(columns))} "
+            f"FROM canonical_objects WHERE tenant_id = ? AND {' AND '.join(clauses)} "
+            f"ORDER BY {order} LIMIT ?"
+        )
+        return self._stream_records(sql, [self.tenant_id, *params], by_anchor, batch_size)
+
+    def _stream_records(
+        self, sql: str, params: Sequence[Any], by_anchor: bool, batch_size: int
+    ) -> Iterator[CanonicalRecord]:
+        key: Tuple[Any, ...] = ("", 0) if by_anchor else (0,)
+        while True:
+            with self._connect() as conn:
+                rows = conn.execute(sql, (*params, *key, batch_size)).fetchall()
+            if not rows:
+                return
+            last = rows[-1]
+            key = (last["keyset_anchor_at"], last["doc_id"]) if by_anchor else (last["doc_id"],)
+            for row in rows:
+                yield CanonicalRecord(row)
+
+    def search_text(
+        self,
+        text: str,
+        *,
+        limit: int = 10,
+        query: Optional[CanonicalQuery] = None,
+    ) -> List[Tuple[str, float]]:
+        """Rank objects against ``text`` with FTS5 BM25 over title/content/people/domain.
+
+        Returns ``(canonical_id, score)`` pairs, best first, where ``score`` is the
+        negated BM25 rank (higher is better). Every word of ``text`` is an optional
+        term, and ``query`` restricts candidates with the usual ``CanonicalQuery``
+        predicates. Needs no embedding model.
+        """
+        match = _fts_match_expression(text, self.tenant_id)
+        if not match or limit <= 0:
+            return []
+        weights = ", ".join(str(weight) for weight in _FTS_WEIGHTS)
+        sql = (
+            f"SELECT c.canonical_id, -bm25(canonical_objects_fts, {weights}) AS score "
+            "FROM canonical_objects_fts JOIN canonical_objects AS c ON c.doc_id = canonical_objects_fts.rowid "
+            "WHERE canonical_objects_fts MATCH ? AND c.tenant_id = ?"
+        )
+        params: List[Any] = [match, self.tenant_id]
+        clauses, filter_params = _compile_query(query) if query is not None else ([], [])
+        if clauses:
+            sql += (
+                " AND c.doc_id IN (SELECT doc_id FROM canonical_objects "
+                f"WHERE tenant_id = ? AND {' AND '.join(clauses)})"
             )
-            for relation in relations
-        ]
+            params.extend([self.tenant_id, *filter_params])
+        sql += " ORDER BY score DESC, c.canonical_id LIMIT ?"
+        params.append(limit)
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [(str(row[0]), float(row[1])) for row in rows]
 
+    def iter_canonical_ids(self, *, batch_size: int = 1000) -> Iterator[str]:
+        """Stream canonical IDs in storage order without decoding any other column."""
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive")
+        last_doc_id = 0
+        while True:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT doc_id, canonical_id FROM canonical_objects "
+                    "WHERE tenant_id = ? AND doc_id > ? ORDER BY doc_id LIMIT ?",
+                    (self.tenant_id, last_doc_id, batch_size),
+                ).fetchall()
+            if not rows:
+                return
+            last_doc_id = rows[-1][0]
+            for row in rows:
+                yield str(row[1])
+
+    def fetch_canonical_records(
+        self,
+        canonical_ids: Iterable[str],
+        *,
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[CanonicalRecord]:
+        """Rows for the given ids (missing ids are skipped), in storage order."""
+        wanted_ids = list(dict.fromkeys(canonical_ids))
+        if not wanted_ids:
+            return []
+        selected = ", ".join(self._select_columns(columns))
         with self._connect() as conn:
-            conn.execute("DELETE FROM relations")
+            if len(wanted_ids) <= _INLINE_ID_LIMIT:
+                rows = conn.execute(
+                    f"SELECT {selected} FROM canonical_objects "
+                    f"WHERE tenant_id = ? AND canonical_id IN ({', '.join('?' for _ in wanted_ids)}) "
+                    "ORDER BY doc_id",
+                    [self.tenant_id, *wanted_ids],
+                ).fetchall()
+            else:
+                self._stage_ids(conn, wanted_ids)
+                rows = conn.execute(
+                    f"SELECT {selected} FROM canonical_objects "
+                    "WHERE tenant_id = ? AND canonical_id IN (SELECT canonical_id FROM scoped_ids) "
+                    "ORDER BY doc_id",
+                    (self.tenant_id,),
+                ).fetchall()
+        return [CanonicalRecord(row) for row in rows]
+
+    def fetch_canonical_objects(self) -> List[CanonicalObject]:
+        return [record.to_canonical_object() for record in self.iter_canonical_objects()]
+
+    def replace_relations(self, relations: Iterable[Dict[str, Any]]) -> None:
+        relation_rows = [(*_relation_row(relation), self.tenant_id) for relation in relations]
+
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM relations WHERE tenant_id = ?", (self.tenant_id,))
             if relation_rows:
                 conn.executemany(
                     """
@@ -201,9 +829,10 @@ class SQLiteStore:
                         to_canonical_id,
                         relation_type,
                         reason,
-                        confidence
-                    ) VALUES (?, ?, ?, ?, ?, ?)
-                    ON CONFLICT(from_canonical_id, to_canonical_id, relation_type) DO UPDATE SET
+                        confidence,
+                        tenant_id
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(tenant_id, from_canonical_id, to_canonical_id, relation_type) DO UPDATE SET
                         relation_id = excluded.relation_id,
                         reason = excluded.reason,
                         confidence = excluded.confidence
@@ -211,6 +840,99 @@ class SQLiteStore:
                     relation_rows,
                 )
 
+    def replace_relations_for(
+        self,
+        canonical_ids: Iterable[str],
+        relations: Iterable[Dict[str, Any]],
+    ) -> RelationDiff:
+        """Make ``relations`` the complete edge set touching ``canonical_ids``.
+
+        Only the difference against the stored edges is written: edges that are no
+        longer produced are deleted, new or changed edges are upserted, and edges not
+        touching ``canonical_ids`` are left alone. Everything runs in one transaction.
+        """
+        wanted: Dict[RelationKey, Tuple[str, str, str, str, str, float]] = {}
+        for relation in relations:
+            row = _relation_row(relation)
+            wanted[(row[1], row[2], row[3])] = row
+
+        with self.transaction() as conn:
+            self._stage_ids(conn, canonical_ids)
+            existing = {
+                (row["from_canonical_id"], row["to_canonical_id"], row["relation_type"]): (
+                    row["relation_id"],
+                    float(row["confidence"]),
+                )
+                for row in conn.execute(
+                    """
+                    SELECT relation_id, from_canonical_id, to_canonical_id, relation_type, confidence
+                    FROM relations
+                    WHERE tenant_id = :tenant_id AND from_canonical_id IN (SELECT canonical_id FROM scoped_ids)
+                    UNION
+                    SELECT relation_id, from_canonical_id, to_canonical_id, relation_type, confidence
+                    FROM relations
+                    WHERE tenant_id = :tenant_id AND to_canonical_id IN (SELECT canonical_id FROM scoped_ids)
+                    """,
+                    {"tenant_id": self.tenant_id},
+                )
+            }
+            removed = [key for key in existing if key not in wanted]
+            added = [row for key, row in wanted.items() if key not in existing]
+            updated = [
+                row
+                for key, row in wanted.items()
+                if key in existing and existing[key] != (row[0], row[5])
+            ]
+
+            if removed:
+                conn.executemany(
+                    """
+                    DELETE FROM relations
+                    WHERE tenant_id = ? AND from_canonical_id = ? AND to_canonical_id = ? AND relation_type = ?
+                    """,
+                    [(self.tenant_id, *key) for key in removed],
+                )
+            if added or updated:
+                conn.executemany(
+                    """
+                    INSERT INTO relations (
+                        relation_id,
+                        from_canonical_id,
+                        to_canonical_id,
+                        relation_type,
+                        reason,
+                        confidence,
+                        tenant_id
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(tenant_id, from_canonical_id, to_canonical_id, relation_type) DO UPDATE SET
+                        relation_id = excluded.relation_id,
+                        reason = excluded.reason,
+                        confidence = excluded.confidence
+                    """,
+                    [(*row, self.tenant_id) for row in (*added, *updated)],
+                )
+        return RelationDiff(added=len(added), updated=len(updated), removed=len(removed))
+
+    def touch_relations(self) -> int:
+        """Stamp every edge of the tenant with the current time, as a full rewrite would.
+
+        Keeps ``created_at`` meaning "present in the latest relation build" when edges
+        are maintained with ``replace_relations_for``. Returns the number of rows changed.
+        """
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE relations SET created_at = CURRENT_TIMESTAMP "
+                "WHERE tenant_id = ? AND created_at <> CURRENT_TIMESTAMP",
+                (self.tenant_id,),
+            )
+            return cursor.rowcount
+
+    def count_relations(self) -> int:
+        with self._connect() as conn:
+            return int(
+                conn.execute("SELECT COUNT(*) FROM relations WHERE tenant_id = ?", (self.tenant_id,)).fetchone()[0]
+            )
+
     def fetch_relations(self) -> List[Dict[str, Any]]:
         with self._connect() as conn:
             rows = conn.execute(
@@ -224,7 +946,62 @@ class SQLiteStore:
                     confidence,
                     created_at
                 FROM relations
+                WHERE tenant_id = ?
                 ORDER BY from_canonical_id, to_canonical_id, relation_type
-                """
+                """,
+                (self.tenant_id,),
             ).fetchall()
         return [dict(row) for row in rows]
+
+    def fetch_relations_for(
+        self,
+        canonical_ids: Iterable[str],
+        types: Optional[Sequence[str]] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Return edges touching ``canonical_ids``, in ``fetch_relations`` order.
+
+        Each side is looked up through its ``(canonical_id, relation_type)`` index, so
+        the cost follows the degree of the requested ids rather than the size of the
+        relations table. Long id lists go through a temp table instead of bound
+        parameters.
+        """
+        wanted_ids = list(dict.fromkeys(canonical_ids))
+        if not wanted_ids or limit == 0:
+            return []
+
+        type_sql = ""
+        type_params: List[str] = []
+        if types is not None:
+            if not types:
+                return []
+            type_sql = f" AND relation_type IN ({', '.join('?' for _ in types)})"
+            type_params = list(types)
+
+        with self._connect() as conn:
+            if len(wanted_ids) <= _INLINE_ID_LIMIT:
+                id_sql = f"({', '.join('?' for _ in wanted_ids)})"
+                id_params: List[str] = wanted_ids
+            else:
+                self._stage_ids(conn, wanted_ids)
+                id_sql = "(SELECT canonical_id FROM scoped_ids)"
+                id_params = []
+
+            columns = (
+                "relation_id, from_canonical_id, to_canonical_id, relation_type, "
+                "reason, confidence, created_at"
+            )
+            sql = (
+                f"SELECT {columns} FROM relations "
+                f"WHERE tenant_id = ? AND from_canonical_id IN {id_sql}{type_sql} "
+                f"UNION SELECT {columns} FROM relations "
+                f"WHERE tenant_id = ? AND to_canonical_id IN {id_sql}{type_sql} "
+                "ORDER BY from_canonical_id, to_canonical_id, relation_type"
+            )
+            scoped = [self.tenant_id, *id_params, *type_params]
+            params: List[Any] = [*scoped, *scoped]
+            if limit is not None:
+                sql += " LIMIT ?"
+                params.append(limit)
+            rows = conn.execute(sql, params).fetchall()
+        return [dict(row) for row in rows]
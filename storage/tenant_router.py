@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence
+
+from core.canonical_schema import CanonicalObject
+from storage.connection_pool import SQLiteConnectionConfig, SQLiteConnectionPool
+from storage.sqlite_store import SQLiteStore, UpsertResult
+
+_MANIFEST = "shards.json"
+
+
+def shard_for_tenant(tenant_id: str, shard_count: int) -> int:
+    """Stable shard index: a tenant maps to the same shard in every process."""
+    digest = hashlib.blake2b(tenant_id.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % shard_count
+
+
+class TenantRouter:
+    """Routes tenants to a fixed set of shard databases under ``root_dir``.
+
+    Each tenant lives in one ``shard-NNN.db`` file picked by a hash of its id, and each
+    shard holds many tenants whose rows are told apart by ``tenant_id``. All tenants of
+    a shard share its connection pool, so open handles are bounded by
+    ``shard_count * pool_size`` whatever the number of tenants. The shard count is
+    recorded in ``shards.json``; reopening the directory with another count raises
+    instead of silently moving tenants to other files.
+    """
+
+    def __init__(
+        self,
+        root_dir: str,
+        *,
+        shard_count: int = 16,
+        connection_config: Optional[SQLiteConnectionConfig] = None,
+    ) -> None:
+        if shard_count < 1:
+            raise ValueError("shard_count must be at least 1")
+        self.root_dir = Path(root_dir)
+        self.shard_count = shard_count
+        self.connection_config = connection_config
+        self._lock = threading.Lock()
+        self._pools: Dict[int, SQLiteConnectionPool] = {}
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+        self._check_manifest()
+
+    def _check_manifest(self) -> None:
+        manifest = self.root_dir / _MANIFEST
+        try:
+            with manifest.open("x", encoding="utf-8") as handle:
+                json.dump({"shard_count": self.shard_count}, handle)
+            return
+        except FileExistsError:
+            recorded = int(json.loads(manifest.read_text(encoding="utf-8"))["shard_count"])
+        if recorded != self.shard_count:
+            raise ValueError(f"{self.root_dir} holds {recorded} shards, not {self.shard_count}")
+
+    def shard_index(self, tenant_id: str) -> int:
+        if not tenant_id:
+            raise ValueError("tenant_id must be a non-empty string")
+        return shard_for_tenant(tenant_id, self.shard_count)
+
+    def shard_path(self, index: int) -> str:
+        return str(self.root_dir / f"shard-{index:03d}.db")
+
+    def _pool(self, index: int) -> SQLiteConnectionPool:
+        with self._lock:
+            pool = self._pools.get(index)
+            if pool is None:
+                pool = SQLiteConnectionPool(self.shard_path(index), self.connection_config)
+                SQLiteStore(self.shard_path(index), pool=pool).initialize_schema()
+                self._pools[index] = pool
+            return pool
+
+    def store_for(self, tenant_id: str) -> SQLiteStore:
+        """A store scoped to ``tenant_id`` on its shard; the shard schema is already set up."""
+        index = self.shard_index(tenant_id)
+        return SQLiteStore(self.shard_path(index), pool=self._pool(index), tenant_id=tenant_id)
+
+    def group_by_shard(self, tenant_ids: Iterable[str]) -> Dict[int, List[str]]:
+        """Tenants bucketed by shard index, keeping their order within each bucket."""
+        groups: Dict[int, List[str]] = {}
+        for tenant_id in dict.fromkeys(tenant_ids):
+            groups.setdefault(self.shard_index(tenant_id), []).append(tenant_id)
+        return groups
+
+    @contextmanager
+    def shard_transaction(self, index: int) -> Iterator[sqlite3.Connection]:
+        """One write transaction on a shard; tenant store calls on this thread join it."""
+        with self._pool(index).transaction() as conn:
+            yield conn
+
+    def upsert_many(self, objects_by_tenant: Mapping[str, Sequence[CanonicalObject]]) -> Dict[str, UpsertResult]:
+        """Upsert several tenants' objects with one transaction (and one commit) per shard."""
+        results: Dict[str, UpsertResult] = {}
+        for index, tenant_ids in sorted(self.group_by_shard(objects_by_tenant).items()):
+            with self.shard_transaction(index):
+                for tenant_id in tenant_ids:
+                    store = self.store_for(tenant_id)
+                    results[tenant_id] = store.upsert_canonical_objects(objects_by_tenant[tenant_id])
+        return results
+
+    def close(self) -> None:
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            pool.close()
+
+
+def open_store(db_path: str = "", *, router: Optional[TenantRouter] = None, tenant_id: str = "") -> SQLiteStore:
+    """``tenant_id``'s store from ``router``, or the store for ``tenant_id`` in ``db_path``."""
+    if router is not None:
+        return router.store_for(tenant_id)
+    if not db_path:
+        raise ValueError("db_path is required without a tenant router")
+    return SQLiteStore(db_path, tenant_id=tenant_id)
@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from agents.builtin_agents import FollowUpPlannerAgent, MemoryContextAgent
+from agents.mesh import AgentMesh
+from agents.providers import (
+    CachingStateProvider,
+    NullVectorMemoryProvider,
+    SQLiteGraphMemoryProvider,
+)
+from core.canonical_schema import CanonicalObject
+from state.models import StateFeatures, UserStateSnapshot
+from storage.sqlite_store import SQLiteStore
+from tools.registry import ToolRegistry
+
+
+class CountingStateProvider:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def get_state(self) -> UserStateSnapshot:
+        self.calls += 1
+        return UserStateSnapshot(
+            energy_level=float(self.calls),
+            stress_probability=0.2,
+            focus_index=60.0,
+            execution_velocity=50.0,
+            domain_context="work",
+            computed_at=datetime(2026, 2, 27, 12, 0, tzinfo=timezone.utc),
+            features=StateFeatures(
+                recent_object_count=0,
+                upcoming_24h_count=0,
+                overdue_reminder_count=0,
+                follow_up_relation_count=0,
+                active_domain_count=0,
+            ),
+        )
+
+
+class FakeClock:
+    def __init__(self, now: datetime) -> None:
+        self.now = now
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+def _store(tmp_path) -> SQLiteStore:
+    store = SQLiteStore(str(tmp_path / "memory.db"))
+    store.initialize_schema()
+    return store
+
+
+def test_caching_state_provider_invalidates_on_writes_buckets_and_ttl(tmp_path) -> None:
+    store = _store(tmp_path)
+    inner = CountingStateProvider()
+    clock = FakeClock(datetime(2026, 2, 27, 12, 0, 5, tzinfo=timezone.utc))
+    provider = CachingStateProvider(
+        store, inner, bucket=timedelta(minutes=1), ttl=timedelta(seconds=30), clock=clock
+    )
+
+    first = provider.get_state()
+    assert provider.get_state() is first
+    clock.now += timedelta(seconds=20)
+    assert provider.get_state() is first
+    assert inner.calls == 1
+
+    # Same bucket but older than the TTL.
+    clock.now += timedelta(seconds=15)
+    assert provider.get_state().energy_level == 2.0
+
+    # A store write bumps the generation.
+    store.upsert_canonical_objects(
+        [CanonicalObject(canonical_id="co_1", source_system="test", source_record_type="note", title="x")]
+    )
+    assert provider.get_state().energy_level == 3.0
+
+    # Crossing into the next time bucket.
+    clock.now += timedelta(seconds=25)
+    assert provider.get_state().energy_level == 4.0
+
+    provider.invalidate()
+    assert provider.get_state().energy_level == 5.0
+    stats = provider.stats()
+    assert (stats.hits, stats.misses, stats.invalidations) == (2, 5, 1)
+
+    with pytest.raises(ValueError):
+        CachingStateProvider(store, inner, ttl=timedelta(0))
+
+
+def test_mesh_run_computes_state_once_for_repeated_dispatches(tmp_path) -> None:
+    store = _store(tmp_path)
+    inner = CountingStateProvider()
+    provider = CachingStateProvider(store, inner, bucket=timedelta(hours=1), ttl=timedelta(hours=1))
+    mesh = AgentMesh(
+        agents=[FollowUpPlannerAgent(), MemoryContextAgent()],
+        graph_memory=SQLiteGraphMemoryProvider(store),
+        vector_memory=NullVectorMemoryProvider(),
+        state_provider=provider,
+        tool_registry=ToolRegistry(),
+    )
+    events = [
+        AgentMesh.make_event("RELATION_GRAPH_UPDATED", {"canonical_ids": [f"co_{idx}"]}) for idx in range(10)
+    ]
+
+    outcomes = mesh.run(events)
+
+    assert outcomes
+    # At most one extra miss if the run straddles an hour boundary.
+    assert inner.calls <= 2
+    assert provider.stats().hits >= 8
@@ -1,15 +1,15 @@
 import json
+from pathlib import Path
+from typing import List, Tuple
 
 from api.cycle_runner import run_cognitive_cycle_from_files
+from storage.connection_pool import SQLiteConnectionPool
 
 
-def test_run_cognitive_cycle_from_files_without_embeddings(tmp_path) -> None:
+def _write_exports(tmp_path: Path) -> Tuple[Path, Path, Path]:
     notes_path = tmp_path / "notes.json"
     calendar_path = tmp_path / "calendar.json"
     reminders_path = tmp_path / "reminders.json"
-    db_path = tmp_path / "cortona.db"
-    metrics_path = tmp_path / "metrics.jsonl"
-
     notes_path.write_text(
         json.dumps(
             {
@@ -62,6 +62,13 @@ def test_run_cognitive_cycle_from_files_without_embeddings(tmp_path) -> None:
         ),
         encoding="utf-8",
     )
+    return notes_path, calendar_path, reminders_path
+
+
+def test_run_cognitive_cycle_from_files_without_embeddings(tmp_path) -> None:
+    notes_path, calendar_path, reminders_path = _write_exports(tmp_path)
+    db_path = tmp_path / "cortona.db"
+    metrics_path = tmp_path / "metrics.jsonl"
 
     report = run_cognitive_cycle_from_files(
         notes_path=str(notes_path),
@@ -90,3 +97,29 @@ def test_run_cognitive_cycle_from_files_without_embeddings(tmp_path) -> None:
     assert "pipeline" in layers
     assert "state" in layers
     assert "agents" in layers
+
+
+def test_cognitive_cycle_shares_one_store_and_closes_it(tmp_path, monkeypatch) -> None:
+    notes_path, calendar_path, reminders_path = _write_exports(tmp_path)
+    pools: List[SQLiteConnectionPool] = []
+    original_init = SQLiteConnectionPool.__init__
+
+    def tracking_init(self: SQLiteConnectionPool, *args, **kwargs) -> None:
+        original_init(self, *args, **kwargs)
+        pools.append(self)
+
+    monkeypatch.setattr(SQLiteConnectionPool, "__init__", tracking_init)
+    report = run_cognitive_cycle_from_files(
+        notes_path=str(notes_path),
+        calendar_path=str(calendar_path),
+        reminders_path=str(reminders_path),
+        db_path=str(tmp_path / "cortona.db"),
+        index_path=str(tmp_path / "memory.faiss"),
+        metadata_path=str(tmp_path / "memory.meta.json"),
+        metrics_path=str(tmp_path / "metrics.jsonl"),
+        rebuild_embeddings=False,
+    )
+
+    assert report.pipeline.canonical_count == 3
+    assert len(pools) == 1
+    assert pools[0]._closed
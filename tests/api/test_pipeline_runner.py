@@ -1,5 +1,10 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
 from api.pipeline_runner import DeterministicNormalizationPipeline
+from graph.relation_builder import build_relations, rebuild_and_store_relations
 from ingestion.common import parse_datetime
+from state.engine import DeterministicStateEngine
 from storage.sqlite_store import SQLiteStore
 
 
@@ -69,3 +74,75 @@ def test_pipeline_runs_end_to_end_and_persists(tmp_path) -> None:
     stored_relations = store.fetch_relations()
     assert len(stored_objects) == 3
     assert len(stored_relations) == report.relation_count
+
+
+def _payloads(
+    notes: List[Dict[str, Any]],
+    events: List[Dict[str, Any]],
+    reminders: List[Dict[str, Any]],
+) -> Dict[str, Any]:
+    return {
+        "notes_payload": {"notes": notes},
+        "calendar_payload": {"events": events},
+        "reminders_payload": {"reminders": reminders},
+    }
+
+
+def _relation_keys(relations: List[Dict[str, Any]]) -> List[tuple]:
+    return sorted(
+        (rel["from_canonical_id"], rel["to_canonical_id"], rel["relation_type"], rel["reason"]) for rel in relations
+    )
+
+
+def test_incremental_relations_match_a_full_rebuild(tmp_path) -> None:
+    notes = [
+        {
+            "id": f"n-{idx}",
+            "title": f"Note {idx}",
+            "created_at": f"2026-03-0{idx}T09:00:00Z",
+            "people": ["sam@example.com"],
+            "folder": "work",
+        }
+        for idx in range(1, 6)
+    ]
+    events = [
+        {
+            "id": f"e-{idx}",
+            "summary": f"Sync {idx}",
+            "start": {"dateTime": f"2026-03-0{idx}T11:00:00Z"},
+            "attendees": [{"email": "sam@example.com"}],
+            "calendar": "work",
+        }
+        for idx in range(1, 5)
+    ]
+    reminders = [{"id": "r-1", "title": "Send recap", "dueDate": "2026-03-02T10:00:00Z", "list": "personal"}]
+    store = SQLiteStore(str(tmp_path / "memory.db"))
+    pipeline = DeterministicNormalizationPipeline(store)
+    pipeline.run(**_payloads(notes, events, reminders))
+    with store.transaction() as conn:
+        conn.execute("UPDATE relations SET created_at = '2026-03-01 00:00:00'")
+
+    # Second export: one note edited, one event missing, one reminder added.
+    notes[0] = {**notes[0], "folder": "personal"}
+    reminders.append({"id": "r-2", "title": "Book flight", "dueDate": "2026-03-04T10:00:00Z", "list": "work"})
+    pipeline.run(**_payloads(notes, events[:-1], reminders))
+    incremental = store.fetch_relations()
+
+    # A partial export never deletes what is already stored.
+    assert len(store.fetch_canonical_objects()) == 11
+    assert _relation_keys(incremental) == _relation_keys(
+        [relation.to_record() for relation in build_relations(store.fetch_canonical_objects())]
+    )
+    # Every edge carries the latest run's time, as when each run rebuilt all edges.
+    assert all(rel["created_at"] > "2026-03-01 00:00:00" for rel in incremental)
+
+    engine = DeterministicStateEngine()
+    now = datetime(2026, 3, 5, tzinfo=timezone.utc)
+    incremental_state = engine.calculate_from_store(store, now=now)
+    rebuild_and_store_relations(store)
+    assert _relation_keys(store.fetch_relations()) == _relation_keys(incremental)
+    assert engine.calculate_from_store(store, now=now) == incremental_state
+
+    pipeline.run(**_payloads([], [], []))
+    assert len(store.fetch_canonical_objects()) == 11
+    assert store.count_relations() == len(incremental)
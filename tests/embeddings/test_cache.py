@@ -0,0 +1,34 @@
+from embeddings.cache import EmbeddingCache
+
+
+def test_embedding_cache_round_trip_and_counters(tmp_path) -> None:
+    cache = EmbeddingCache(str(tmp_path / "cache.db"))
+    cache.put_many("model-a", [("h1", [1.0, 0.5]), ("h2", [0.0, 0.25])])
+
+    found = cache.get_many("model-a", ["h1", "h2", "h3"])
+    assert found == {"h1": [1.0, 0.5], "h2": [0.0, 0.25]}
+    assert cache.get_many("model-b", ["h1"]) == {}
+
+    stats = cache.stats()
+    assert stats.hits == 2
+    assert stats.misses == 2
+    assert stats.entries == 2
+    cache.close()
+
+    reopened = EmbeddingCache(str(tmp_path / "cache.db"))
+    assert reopened.get_many("model-a", ["h2"]) == {"h2": [0.0, 0.25]}
+    reopened.close()
+
+
+def test_embedding_cache_evicts_least_recently_used(tmp_path) -> None:
+    cache = EmbeddingCache(str(tmp_path / "cache.db"), max_entries=2)
+    cache.put_many("model", [("old", [1.0])])
+    cache.put_many("model", [("kept", [2.0])])
+    cache.get_many("model", ["old"])
+
+    cache.put_many("model", [("new", [3.0])])
+
+    assert set(cache.get_many("model", ["old", "kept", "new"])) == {"old", "new"}
+    assert cache.stats().evictions == 1
+    assert cache.count() == 2
+    cache.close()
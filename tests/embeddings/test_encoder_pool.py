@@ -0,0 +1,71 @@
+from typing import Any, List, Sequence
+
+import pytest
+
+from embeddings.encoder_pool import MultiProcessEmbeddingModel
+from embeddings.models import SentenceTransformerEmbeddingModel, plan_token_batches
+
+TEXTS = [
+    "short",
+    "a much longer structured text " * 5,
+    "",
+    "mid length text",
+    "x" * 40,
+    "tail",
+    "standup with the team at ten",
+    "pay rent",
+]
+
+
+class PaddedBatchModel:
+    """Vectors depend on the padded length of the batch, like a real transformer's."""
+
+    def plan_batches(self, texts: Sequence[str]) -> List[List[int]]:
+        return plan_token_batches([len(text) for text in texts], max_tokens_per_batch=60, max_batch_size=3)
+
+    def encode_batch(self, texts: Sequence[str]) -> Any:
+        import numpy as np
+
+        padded = max(len(text) for text in texts)
+        return np.array([[float(len(text)), float(padded), float(len(texts))] for text in texts], dtype=np.float32)
+
+    def embed_texts(self, texts: Sequence[str]) -> List[List[float]]:
+        output: List[List[float]] = [[] for _ in texts]
+        for batch in self.plan_batches(texts):
+            for idx, vector in zip(batch, self.encode_batch([texts[idx] for idx in batch]).tolist()):
+                output[idx] = vector
+        return output
+
+
+def make_model() -> PaddedBatchModel:
+    return PaddedBatchModel()
+
+
+def test_multiprocess_model_reproduces_single_process_batches() -> None:
+    pytest.importorskip("numpy")
+    expected = PaddedBatchModel().embed_texts(TEXTS)
+
+    with MultiProcessEmbeddingModel(workers=2, model_factory=make_model) as model:
+        assert model.embed_texts(TEXTS) == expected
+        assert model.embed_array(TEXTS).dtype == "float32"
+        assert model.embed_texts([]) == []
+
+
+def test_multiprocess_model_matches_sentence_transformer_exactly() -> None:
+    np = pytest.importorskip("numpy")
+    pytest.importorskip("sentence_transformers")
+    torch = pytest.importorskip("torch")
+    model_name = "sentence-transformers/all-MiniLM-L6-v2"
+    try:
+        single = SentenceTransformerEmbeddingModel(model_name, local_files_only=True, max_tokens_per_batch=64)
+    except (OSError, RuntimeError, ValueError):
+        pytest.skip(f"{model_name} is not available locally")
+
+    with MultiProcessEmbeddingModel(
+        model_name,
+        workers=2,
+        torch_threads=torch.get_num_threads(),
+        max_tokens_per_batch=64,
+        local_files_only=True,
+    ) as pooled:
+        assert np.array_equal(pooled.embed_array(TEXTS), single.embed_array(TEXTS))
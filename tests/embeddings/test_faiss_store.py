@@ -1,6 +1,9 @@
+from datetime import datetime, timedelta, timezone
+
 import pytest
 
-from embeddings.faiss_store import LocalFaissStore
+from embeddings.faiss_store import FaissIndexConfig, LocalFaissStore
+from embeddings.vector_store import VectorAttributes, VectorFilter
 
 
 def test_faiss_store_rebuild_and_search_if_installed(tmp_path) -> None:
@@ -24,3 +27,210 @@ def test_faiss_store_rebuild_and_search_if_installed(tmp_path) -> None:
     assert store.count() == 3
     assert len(results) == 2
     assert results[0][0] == "co_1"
+
+
+def test_faiss_store_keeps_index_resident_and_reloads_on_change(tmp_path) -> None:
+    pytest.importorskip("numpy")
+    pytest.importorskip("faiss")
+
+    index_path = str(tmp_path / "memory.faiss")
+    metadata_path = str(tmp_path / "memory.meta.json")
+    writer = LocalFaissStore(index_path=index_path, metadata_path=metadata_path)
+    reader = LocalFaissStore(index_path=index_path, metadata_path=metadata_path)
+
+    writer.rebuild(["co_1", "co_2"], [[1.0, 0.0], [0.0, 1.0]])
+    assert reader.search([1.0, 0.0], top_k=1)[0][0] == "co_1"
+    resident = reader._resident
+    assert reader.search([0.0, 1.0], top_k=1)[0][0] == "co_2"
+    assert reader._resident is resident
+
+    writer.rebuild(["co_3", "co_4", "co_5"], [[1.0, 0.0], [0.0, 1.0], [0.6, 0.8]])
+    assert reader.count() == 3
+    assert reader.search([1.0, 0.0], top_k=1)[0][0] == "co_3"
+    assert reader._resident is not resident
+
+
+def test_faiss_store_writes_after_search_on_the_same_instance(tmp_path, monkeypatch) -> None:
+    pytest.importorskip("numpy")
+    pytest.importorskip("faiss")
+    import os
+    from pathlib import Path
+
+    maps = Path("/proc/self/maps")
+    replace = os.replace
+    replaced = []
+
+    def windows_replace(source, target) -> None:
+        # Windows refuses to replace a file that is still mapped into the process.
+        if maps.exists():
+            mapped = {line.split(maxsplit=5)[-1] for line in maps.read_text().splitlines() if "/" in line}
+            assert str(target) not in mapped
+        replaced.append(Path(target).name)
+        replace(source, target)
+
+    monkeypatch.setattr("embeddings.faiss_store.os.replace", windows_replace)
+    store = LocalFaissStore(
+        index_path=str(tmp_path / "memory.faiss"),
+        metadata_path=str(tmp_path / "memory.meta"),
+        memory_map=True,
+    )
+    store.rebuild(["co_1", "co_2"], [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]])
+
+    assert store.search([1.0, 0.0, 0.0], top_k=1)[0][0] == "co_1"
+    store.upsert(["co_3"], [[0.0, 0.0, 1.0]])
+    assert store.search([0.0, 0.0, 1.0], top_k=1)[0][0] == "co_3"
+    assert store.delete(["co_1"]) == 1
+    assert store.search([1.0, 0.0, 0.0], top_k=1)[0][0] != "co_1"
+    store.rebuild(["co_4"], [[1.0, 0.0, 0.0]])
+    assert store.search([1.0, 0.0, 0.0], top_k=1) == [("co_4", pytest.approx(1.0))]
+    assert replaced.count("memory.meta") == 4
+
+
+def test_faiss_store_search_many_matches_single_searches(tmp_path) -> None:
+    pytest.importorskip("numpy")
+    pytest.importorskip("faiss")
+
+    store = LocalFaissStore(
+        index_path=str(tmp_path / "memory.faiss"),
+        metadata_path=str(tmp_path / "memory.meta.json"),
+    )
+    store.rebuild(["co_1", "co_2", "co_3"], [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.7, 0.7, 0.0]])
+    queries = [[1.0, 0.0, 0.0], [0.0, 1.0, 0.1], [0.5, 0.5, 0.0]]
+
+    batched = store.search_many(queries, top_k=2)
+
+    assert batched == [store.search(query, top_k=2) for query in queries]
+    assert store.search_many([], top_k=2) == []
+
+
+def test_faiss_store_upsert_and_delete_by_canonical_id(tmp_path) -> None:
+    pytest.importorskip("numpy")
+    pytest.importorskip("faiss")
+
+    index_path = str(tmp_path / "memory.faiss")
+    metadata_path = str(tmp_path / "memory.meta.json")
+    store = LocalFaissStore(index_path=index_path, metadata_path=metadata_path)
+    store.rebuild(["co_1", "co_2"], [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]], fingerprints=["h1", "h2"])
+
+    store.upsert(["co_2", "co_3"], [[0.0, 0.0, 1.0], [0.0, 1.0, 0.0]], fingerprints=["h2b", "h3"])
+    assert store.count() == 3
+    assert store.search([0.0, 0.0, 1.0], top_k=1)[0][0] == "co_2"
+    assert store.search([0.0, 1.0, 0.0], top_k=1)[0][0] == "co_3"
+    assert store.fingerprints() == {"co_1": "h1", "co_2": "h2b", "co_3": "h3"}
+
+    assert store.delete(["co_1", "missing"]) == 1
+    assert {hit[0] for hit in store.search([1.0, 0.0, 0.0], top_k=5)} == {"co_2", "co_3"}
+
+    reopened = LocalFaissStore(index_path=index_path, metadata_path=metadata_path)
+    assert reopened.count() == 2
+    assert reopened.fingerprints() == {"co_2": "h2b", "co_3": "h3"}
+    assert "co_1" not in {hit[0] for hit in reopened.search([1.0, 0.0, 0.0], top_k=5)}
+
+
+@pytest.mark.parametrize("index_type", ["ivf_flat", "ivf_pq", "hnsw"])
+def test_faiss_store_approximate_index_types(tmp_path, index_type: str) -> None:
+    np = pytest.importorskip("numpy")
+    pytest.importorskip("faiss")
+
+    rng = np.random.default_rng(3)
+    vectors = rng.standard_normal((3_000, 16)).astype(np.float32)
+    canonical_ids = [f"co_{idx}" for idx in range(len(vectors))]
+    config = FaissIndexConfig(index_type=index_type, nlist=32, nprobe=32, pq_m=8, pq_bits=4)
+    index_path = str(tmp_path / "memory.faiss")
+    metadata_path = str(tmp_path / "memory.meta.json")
+    store = LocalFaissStore(index_path=index_path, metadata_path=metadata_path, index_config=config)
+
+    store.rebuild(canonical_ids, vectors)
+    store.delete(["co_0"])
+    store.upsert(["co_1"], [vectors[2]])
+
+    reopened = LocalFaissStore(index_path=index_path, metadata_path=metadata_path, index_config=config)
+    assert reopened._current().layout.index_type == index_type
+    assert reopened.count() == len(vectors) - 1
+    assert "co_0" not in {hit[0] for hit in reopened.search(vectors[0], top_k=5)}
+    assert reopened.search(vectors[10], top_k=1)[0][0] == "co_10"
+    assert {hit[0] for hit in reopened.search(vectors[2], top_k=2)} == {"co_1", "co_2"}
+
+
+def test_faiss_index_config_falls_back_to_flat_for_small_corpora() -> None:
+    assert FaissIndexConfig(index_type="ivf_flat").factory_string(16, 20) == ("flat", "IDMap2,Flat")
+    assert FaissIndexConfig(index_type="ivf_flat", nlist=8).factory_string(16, 1_000)[1] == "IVF8,Flat"
+    with pytest.raises(ValueError):
+        FaissIndexConfig(index_type="annoy")
+
+
+@pytest.mark.parametrize("index_type", ["flat", "ivf_flat", "hnsw"])
+@pytest.mark.parametrize("vector_encoding", ["fp16", "int8"])
+def test_faiss_store_scalar_quantized_encodings(tmp_path, index_type: str, vector_encoding: str) -> None:
+    np = pytest.importorskip("numpy")
+    pytest.importorskip("faiss")
+
+    rng = np.random.default_rng(5)
+    vectors = rng.standard_normal((2_000, 16)).astype(np.float32)
+    canonical_ids = [f"co_{idx}" for idx in range(len(vectors))]
+    config = FaissIndexConfig(index_type=index_type, nlist=16, nprobe=16, vector_encoding=vector_encoding)
+    index_path = str(tmp_path / "memory.faiss")
+    metadata_path = str(tmp_path / "memory.meta.json")
+    store = LocalFaissStore(index_path=index_path, metadata_path=metadata_path, index_config=config)
+
+    store.rebuild(canonical_ids, vectors)
+    store.delete(["co_0"])
+    store.upsert(["co_1"], [vectors[2]])
+
+    reopened = LocalFaissStore(index_path=index_path, metadata_path=metadata_path, index_config=config)
+    assert reopened._current().layout.index_factory.endswith("SQfp16" if vector_encoding == "fp16" else "SQ8")
+    assert reopened.count() == len(vectors) - 1
+    assert reopened.search(vectors[10], top_k=1)[0][0] == "co_10"
+    assert {hit[0] for hit in reopened.search(vectors[2], top_k=2)} == {"co_1", "co_2"}
+
+
+def test_faiss_index_config_vector_encodings() -> None:
+    assert FaissIndexConfig(vector_encoding="fp16").factory_string(16, 20) == ("flat", "IDMap2,SQfp16")
+    assert FaissIndexConfig(vector_encoding="int8").factory_string(16, 20) == ("flat", "IDMap2,SQfp16")
+    assert FaissIndexConfig(vector_encoding="int8").factory_string(16, 5_000) == ("flat", "IDMap2,SQ8")
+    assert FaissIndexConfig(index_type="hnsw", vector_encoding="int8").factory_string(16, 5_000)[1] == (
+        "IDMap2,HNSW32_SQ8"
+    )
+    with pytest.raises(ValueError):
+        FaissIndexConfig(index_type="ivf_pq", vector_encoding="fp16")
+    with pytest.raises(ValueError):
+        FaissIndexConfig(vector_encoding="bf16")
+
+
+@pytest.mark.parametrize("index_type", ["flat", "ivf_flat", "hnsw"])
+def test_faiss_store_filtered_search(tmp_path, index_type: str) -> None:
+    np = pytest.importorskip("numpy")
+    pytest.importorskip("faiss")
+
+    rng = np.random.default_rng(11)
+    vectors = rng.standard_normal((2_000, 16)).astype(np.float32)
+    canonical_ids = [f"co_{idx}" for idx in range(len(vectors))]
+    start = datetime(2026, 3, 2, tzinfo=timezone.utc)
+    attributes = [
+        VectorAttributes(
+            domain=("work", "home")[idx % 2],
+            source_record_type=("event", "note")[idx // 2 % 2],
+            anchor_at=start + timedelta(hours=idx),
+        )
+        for idx in range(len(vectors))
+    ]
+    config = FaissIndexConfig(index_type=index_type, nlist=16, nprobe=16)
+    index_path = str(tmp_path / "memory.faiss")
+    metadata_path = str(tmp_path / "memory.meta.json")
+    store = LocalFaissStore(index_path=index_path, metadata_path=metadata_path, index_config=config)
+    store.rebuild(canonical_ids, vectors, attributes=attributes)
+
+    where = VectorFilter(
+        domains=["Work"], source_record_types=["event"], anchor_from=start, anchor_to=start + timedelta(days=7)
+    )
+    allowed = {f"co_{idx}" for idx in range(0, 7 * 24, 4)}
+    hits = store.search(vectors[8], top_k=10, where=where)
+    assert len(hits) == 10
+    assert hits[0][0] == "co_8"
+    assert {hit[0] for hit in hits} <= allowed
+    assert store.search(vectors[8], top_k=5, where=VectorFilter(domains=["travel"])) == []
+
+    store.upsert(["co_9"], [vectors[8]], attributes=[attributes[8]])
+    reopened = LocalFaissStore(index_path=index_path, metadata_path=metadata_path, index_config=config)
+    assert {hit[0] for hit in reopened.search(vectors[8], top_k=2, where=where)} == {"co_8", "co_9"}
+    assert reopened.search(vectors[9], top_k=1, where=VectorFilter(domains=["home"]))[0][0] != "co_9"
@@ -0,0 +1,60 @@
+from typing import List, Optional, Tuple
+
+from core.canonical_schema import CanonicalObject
+from embeddings.hybrid import HybridRetriever, reciprocal_rank_fusion
+from embeddings.vector_store import VectorFilter
+from storage.sqlite_store import SQLiteStore
+
+
+class StubIndexer:
+    def __init__(self, hits: List[Tuple[str, float]], *, fail: bool = False) -> None:
+        self.hits = hits
+        self.fail = fail
+        self.wheres: List[Optional[VectorFilter]] = []
+
+    def query(self, text: str, top_k: int = 5, *, where: Optional[VectorFilter] = None) -> List[Tuple[str, float]]:
+        if self.fail:
+            raise RuntimeError("faiss is required for vector indexing")
+        self.wheres.append(where)
+        return self.hits[:top_k]
+
+
+def test_reciprocal_rank_fusion_rewards_agreement() -> None:
+    lexical = [("co_a", 9.0), ("co_b", 4.0), ("co_c", 1.0)]
+    dense = [("co_b", 0.9), ("co_d", 0.8), ("co_a", 0.1)]
+
+    fused = reciprocal_rank_fusion([lexical, dense], k=60)
+
+    assert [canonical_id for canonical_id, _ in fused] == ["co_b", "co_a", "co_d", "co_c"]
+    assert fused[0][1] == 1 / 62 + 1 / 61
+    assert reciprocal_rank_fusion([lexical, dense], top_k=1) == fused[:1]
+
+
+def test_hybrid_retriever_fuses_lexical_and_vector_hits(tmp_path) -> None:
+    store = SQLiteStore(str(tmp_path / "memory.db"))
+    store.initialize_schema()
+    store.upsert_canonical_objects(
+        [
+            CanonicalObject(
+                canonical_id=f"co_{name}",
+                source_system="apple_notes",
+                source_record_type="note",
+                title=title,
+                domain="work",
+            )
+            for name, title in (("roadmap", "Roadmap review"), ("sync", "Weekly sync"), ("other", "Groceries"))
+        ]
+    )
+
+    lexical_only = HybridRetriever(store)
+    assert [hit[0] for hit in lexical_only.search("roadmap", top_k=3)] == ["co_roadmap"]
+
+    indexer = StubIndexer([("co_sync", 0.9), ("co_roadmap", 0.8)])
+    hybrid = HybridRetriever(store, indexer)  # type: ignore[arg-type]
+    where = VectorFilter(domains=["work"])
+    assert [hit[0] for hit in hybrid.search("roadmap", top_k=2, where=where)] == ["co_roadmap", "co_sync"]
+    assert indexer.wheres == [where]
+
+    broken = HybridRetriever(store, StubIndexer([], fail=True))  # type: ignore[arg-type]
+    assert [hit[0] for hit in broken.search("roadmap")] == ["co_roadmap"]
+    assert hybrid.search("   ") == []
@@ -0,0 +1,73 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from embeddings.id_table import MAGIC, IdTable, write_id_table
+from embeddings.vector_store import VectorAttributes, VectorFilter
+
+
+def test_id_table_round_trip_with_sparse_labels(tmp_path) -> None:
+    pytest.importorskip("numpy")
+
+    path = tmp_path / "memory.ids"
+    write_id_table(
+        path,
+        labels=[7, 2, 40],
+        canonical_ids=["co_b", "co_a", "co_ü"],
+        fingerprints=["h7", "", "h40"],
+        header={"dimension": 3, "index_type": "flat"},
+    )
+
+    assert path.read_bytes().startswith(MAGIC)
+    table = IdTable.open(path)
+    assert len(table) == 3
+    assert table.header["dimension"] == 3
+    assert table.canonical_id(2) == "co_a"
+    assert table.canonical_id(40) == "co_ü"
+    assert table.canonical_id(3) is None
+    assert table.canonical_ids() == ["co_a", "co_b", "co_ü"]
+    assert table.fingerprints() == {"co_b": "h7", "co_ü": "h40"}
+
+
+def test_id_table_reads_legacy_json_metadata(tmp_path) -> None:
+    pytest.importorskip("numpy")
+
+    path = tmp_path / "memory.meta.json"
+    path.write_text(json.dumps({"dimension": 2, "canonical_ids": ["co_1", "co_2"]}, indent=2), encoding="utf-8")
+
+    table = IdTable.open(path)
+
+    assert table.header == {"dimension": 2, "count": 2}
+    assert table.id_by_label() == {0: "co_1", 1: "co_2"}
+    assert table.canonical_id(1) == "co_2"
+    assert table.fingerprints() == {}
+
+
+def test_id_table_attribute_columns_select_labels(tmp_path) -> None:
+    pytest.importorskip("numpy")
+
+    morning = datetime(2026, 3, 2, 9, tzinfo=timezone.utc)
+    path = tmp_path / "memory.ids"
+    write_id_table(
+        path,
+        labels=[0, 1, 2, 5],
+        canonical_ids=["co_event", "co_note", "co_home", "co_plain"],
+        fingerprints=["", "", "", ""],
+        header={"dimension": 3},
+        attributes=[
+            VectorAttributes(domain=" Work ", source_record_type="event", anchor_at=morning),
+            VectorAttributes(domain="work", source_record_type="note", anchor_at=datetime(2026, 2, 1)),
+            VectorAttributes(domain="home", source_record_type="event", anchor_at=morning),
+            VectorAttributes(),
+        ],
+    )
+
+    table = IdTable.open(path)
+    assert table.attributes()["co_event"] == VectorAttributes(domain="work", source_record_type="event", anchor_at=morning)
+    assert "co_plain" not in table.attributes()
+    assert table.select_labels(VectorFilter(domains=["WORK"])).tolist() == [0, 1]
+    assert table.select_labels(VectorFilter(source_record_types=["event"])).tolist() == [0, 2]
+    assert table.select_labels(VectorFilter(anchor_from=datetime(2026, 3, 1, tzinfo=timezone.utc))).tolist() == [0, 2]
+    assert table.select_labels(VectorFilter(anchor_to=morning)).tolist() == [1]
+    assert table.select_labels(VectorFilter()).tolist() == [0, 1, 2, 5]
@@ -1,11 +1,24 @@
-from typing import List, Sequence, Tuple
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pytest
 
 from core.canonical_schema import CanonicalObject
+from embeddings.cache import EmbeddingCache
+from embeddings.faiss_store import LocalFaissStore
 from embeddings.indexer import EmbeddingIndexer, build_embedding_documents
+from embeddings.vector_store import VectorAttributes, VectorBatch, VectorFilter
+from storage.sqlite_store import SQLiteStore
 
 
 class FakeEmbeddingModel:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.embedded_texts: List[str] = []
+
     def embed_texts(self, texts: Sequence[str]) -> List[List[float]]:
+        self.calls += 1
+        self.embedded_texts.extend(texts)
         vectors: List[List[float]] = []
         for text in texts:
             length_component = float(len(text))
@@ -18,14 +31,84 @@ class FakeVectorStore:
     def __init__(self) -> None:
         self.canonical_ids: List[str] = []
         self.vectors: List[List[float]] = []
+        self.search_many_calls = 0
+        self.hashes: Dict[str, str] = {}
+        self.attributes: Dict[str, VectorAttributes] = {}
 
-    def rebuild(self, canonical_ids: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+    def rebuild(
+        self,
+        canonical_ids: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+        *,
+        fingerprints: Optional[Sequence[str]] = None,
+        attributes: Optional[Sequence[VectorAttributes]] = None,
+    ) -> None:
         self.canonical_ids = list(canonical_ids)
         self.vectors = [list(vector) for vector in vectors]
+        self.hashes = dict(zip(canonical_ids, fingerprints or []))
+        self.attributes = dict(zip(canonical_ids, attributes or []))
+
+    def rebuild_from_batches(self, batches: Iterable[VectorBatch], *, expected_count: int = 0) -> int:
+        self.rebuild([], [])
+        for batch in batches:
+            self.upsert(
+                batch.canonical_ids, batch.vectors, fingerprints=batch.fingerprints, attributes=batch.attributes
+            )
+        return len(self.canonical_ids)
+
+    def upsert(
+        self,
+        canonical_ids: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+        *,
+        fingerprints: Optional[Sequence[str]] = None,
+        attributes: Optional[Sequence[VectorAttributes]] = None,
+    ) -> None:
+        for canonical_id, vector in zip(canonical_ids, vectors):
+            if canonical_id in self.canonical_ids:
+                self.vectors[self.canonical_ids.index(canonical_id)] = list(vector)
+            else:
+                self.canonical_ids.append(canonical_id)
+                self.vectors.append(list(vector))
+        self.hashes.update(zip(canonical_ids, fingerprints or []))
+        self.attributes.update(zip(canonical_ids, attributes or []))
+
+    def delete(self, canonical_ids: Iterable[str]) -> int:
+        targets = set(canonical_ids)
+        keep = [idx for idx, canonical_id in enumerate(self.canonical_ids) if canonical_id not in targets]
+        removed = len(self.canonical_ids) - len(keep)
+        self.canonical_ids = [self.canonical_ids[idx] for idx in keep]
+        self.vectors = [self.vectors[idx] for idx in keep]
+        for canonical_id in targets:
+            self.hashes.pop(canonical_id, None)
+        return removed
 
-    def search(self, query_vector: Sequence[float], top_k: int = 5) -> List[Tuple[str, float]]:
+    def fingerprints(self) -> Dict[str, str]:
+        return dict(self.hashes)
+
+    def matches_build(self, dimension: int = 0) -> bool:
+        return dimension == 0 or not self.vectors or len(self.vectors[0]) == dimension
+
+    def search(
+        self, query_vector: Sequence[float], top_k: int = 5, *, where: Optional[VectorFilter] = None
+    ) -> List[Tuple[str, float]]:
         del query_vector
-        return [(canonical_id, 1.0) for canonical_id in self.canonical_ids[:top_k]]
+        candidates = [
+            canonical_id
+            for canonical_id in self.canonical_ids
+            if where is None or self.attributes[canonical_id].source_record_type in where.source_record_types
+        ]
+        return [(canonical_id, 1.0) for canonical_id in candidates[:top_k]]
+
+    def search_many(
+        self,
+        query_vectors: Sequence[Sequence[float]],
+        top_k: int = 5,
+        *,
+        where: Optional[VectorFilter] = None,
+    ) -> List[List[Tuple[str, float]]]:
+        self.search_many_calls += 1
+        return [self.search(vector, top_k=top_k, where=where) for vector in query_vectors]
 
 
 def test_build_embedding_documents_sorted_by_canonical_id() -> None:
@@ -83,3 +166,232 @@ def test_indexer_rebuild_and_query_with_fake_components() -> None:
     results = indexer.query("roadmap planning", top_k=1)
     assert len(results) == 1
     assert results[0][0] == "co_1"
+
+
+def test_indexer_query_many_batches_model_and_store_calls() -> None:
+    objects = [
+        CanonicalObject(
+            canonical_id=f"co_{idx}",
+            source_system="apple_notes",
+            source_record_type="note",
+            title=f"Note {idx}",
+            content="...",
+            domain="work",
+        )
+        for idx in range(3)
+    ]
+    model = FakeEmbeddingModel()
+    store = FakeVectorStore()
+    indexer = EmbeddingIndexer(model=model, vector_store=store)
+    indexer.rebuild(objects)
+    model.calls = 0
+
+    results = indexer.query_many(["alpha", "beta", "gamma"], top_k=2)
+
+    assert len(results) == 3
+    assert all(len(hits) == 2 for hits in results)
+    assert model.calls == 1
+    assert store.search_many_calls == 1
+    assert indexer.query_many([], top_k=2) == []
+
+
+def test_indexer_upsert_reembeds_only_changed_documents() -> None:
+    def note(canonical_id: str, content: str) -> CanonicalObject:
+        return CanonicalObject(
+            canonical_id=canonical_id,
+            source_system="apple_notes",
+            source_record_type="note",
+            title=canonical_id,
+            content=content,
+            domain="work",
+        )
+
+    model = FakeEmbeddingModel()
+    store = FakeVectorStore()
+    indexer = EmbeddingIndexer(model=model, vector_store=store)
+    indexer.rebuild([note("co_1", "a"), note("co_2", "b"), note("co_3", "c")])
+    model.embedded_texts = []
+
+    report = indexer.upsert([note("co_1", "a"), note("co_2", "changed"), note("co_4", "new")], prune_missing=True)
+
+    assert report.embedded_count == 2
+    assert report.unchanged_count == 1
+    assert report.deleted_count == 1
+    assert len(model.embedded_texts) == 2
+    assert sorted(store.canonical_ids) == ["co_1", "co_2", "co_4"]
+
+    model.embedded_texts = []
+    report = indexer.upsert([note("co_1", "a"), note("co_2", "changed")])
+    assert report.embedded_count == 0
+    assert report.deleted_count == 0
+    assert model.embedded_texts == []
+
+
+def test_indexer_consults_embedding_cache_before_model(tmp_path) -> None:
+    objects = [
+        CanonicalObject(
+            canonical_id=f"co_{idx}",
+            source_system="apple_notes",
+            source_record_type="note",
+            title=f"Note {idx}",
+            content="...",
+            domain="work",
+        )
+        for idx in range(3)
+    ]
+    cache = EmbeddingCache(str(tmp_path / "cache.db"))
+    model = FakeEmbeddingModel()
+    EmbeddingIndexer(model=model, vector_store=FakeVectorStore(), cache=cache, model_name="fake").rebuild(objects)
+    assert len(model.embedded_texts) == 3
+
+    model.embedded_texts = []
+    store = FakeVectorStore()
+    report = EmbeddingIndexer(model=model, vector_store=store, cache=cache, model_name="fake").rebuild(objects)
+
+    assert report.indexed_count == 3
+    assert model.embedded_texts == []
+    assert len(store.vectors) == 3
+    assert cache.stats().hits == 3
+    cache.close()
+
+
+def test_indexer_streams_store_in_batches(tmp_path) -> None:
+    pytest.importorskip("numpy")
+    pytest.importorskip("faiss")
+
+    def note(idx: int, content: str = "...") -> CanonicalObject:
+        return CanonicalObject(
+            canonical_id=f"co_{idx}",
+            source_system="apple_notes",
+            source_record_type="note",
+            title=f"Note {idx}",
+            content=content,
+            people=[f"p{idx}@example.com"],
+            domain="work",
+        )
+
+    store = SQLiteStore(str(tmp_path / "cortona.db"))
+    store.initialize_schema()
+    store.upsert_canonical_objects([note(idx) for idx in range(5)])
+    model = FakeEmbeddingModel()
+    vector_store = LocalFaissStore(str(tmp_path / "memory.faiss"), str(tmp_path / "memory.meta.json"))
+    indexer = EmbeddingIndexer(model=model, vector_store=vector_store)
+
+    report = indexer.rebuild_from_store(store, batch_size=2)
+    assert report.indexed_count == 5
+    assert report.vector_dimension == 3
+    assert model.calls == 3
+    assert vector_store.count() == 5
+
+    store.upsert_canonical_objects([note(idx, "edited" if idx == 1 else "...") for idx in range(1, 5)], prune_missing=True)
+    model.embedded_texts = []
+    update = indexer.upsert_from_store(store, batch_size=2)
+
+    assert update.embedded_count == 1
+    assert update.unchanged_count == 3
+    assert update.deleted_count == 1
+    assert len(model.embedded_texts) == 1
+    assert vector_store.count() == 4
+
+
+def test_indexer_rebuilds_when_model_or_index_config_changes(tmp_path) -> None:
+    pytest.importorskip("numpy")
+    pytest.importorskip("faiss")
+    from embeddings.faiss_store import FaissIndexConfig
+
+    store = SQLiteStore(str(tmp_path / "cortona.db"))
+    store.initialize_schema()
+    store.upsert_canonical_objects(
+        [
+            CanonicalObject(
+                canonical_id=f"co_{idx}",
+                source_system="apple_notes",
+                source_record_type="note",
+                title=f"Note {idx}",
+                domain="work",
+            )
+            for idx in range(4)
+        ]
+    )
+
+    def update(model_name: str, config: FaissIndexConfig) -> int:
+        vector_store = LocalFaissStore(
+            str(tmp_path / "memory.faiss"),
+            str(tmp_path / "memory.meta"),
+            index_config=config,
+            model_name=model_name,
+        )
+        indexer = EmbeddingIndexer(model=FakeEmbeddingModel(), vector_store=vector_store, model_name=model_name)
+        return indexer.upsert_from_store(store).embedded_count
+
+    assert update("model-a", FaissIndexConfig()) == 4
+    assert update("model-a", FaissIndexConfig()) == 0
+    assert update("model-b", FaissIndexConfig()) == 4
+    assert update("model-b", FaissIndexConfig(index_type="hnsw")) == 4
+    assert update("model-b", FaissIndexConfig(index_type="hnsw", vector_encoding="fp16")) == 4
+    # Search-time knobs do not require a rebuild.
+    assert update("model-b", FaissIndexConfig(index_type="hnsw", vector_encoding="fp16", ef_search=8)) == 0
+
+
+def test_indexer_upsert_rebuilds_when_vector_dimension_changes() -> None:
+    class WideEmbeddingModel(FakeEmbeddingModel):
+        def embed_texts(self, texts: Sequence[str]) -> List[List[float]]:
+            return [vector + [0.0] for vector in super().embed_texts(texts)]
+
+    def note(canonical_id: str, content: str) -> CanonicalObject:
+        return CanonicalObject(
+            canonical_id=canonical_id,
+            source_system="apple_notes",
+            source_record_type="note",
+            title=canonical_id,
+            content=content,
+            domain="work",
+        )
+
+    store = FakeVectorStore()
+    EmbeddingIndexer(model=FakeEmbeddingModel(), vector_store=store).rebuild([note("co_1", "a"), note("co_2", "b")])
+    indexer = EmbeddingIndexer(model=WideEmbeddingModel(), vector_store=store)
+
+    with pytest.raises(ValueError, match="another model"):
+        indexer.upsert([note("co_2", "changed")])
+    assert all(len(vector) == 3 for vector in store.vectors)
+
+    report = indexer.upsert([note("co_1", "a"), note("co_2", "changed")], prune_missing=True)
+    assert report.embedded_count == 2
+    assert report.unchanged_count == 0
+    assert all(len(vector) == 4 for vector in store.vectors)
+
+
+def test_indexer_stores_filter_attributes_and_refreshes_them_on_upsert() -> None:
+    def event(start_hour: int) -> CanonicalObject:
+        return CanonicalObject(
+            canonical_id="co_event",
+            source_system="google_calendar",
+            source_record_type="event",
+            title="Planning",
+            content="Quarterly planning.",
+            start_at=datetime(2026, 3, 2, start_hour, tzinfo=timezone.utc),
+            domain="work",
+        )
+
+    note = CanonicalObject(
+        canonical_id="co_note",
+        source_system="apple_notes",
+        source_record_type="note",
+        title="Planning notes",
+        created_at=datetime(2026, 3, 1, tzinfo=timezone.utc),
+        domain="work",
+    )
+    model = FakeEmbeddingModel()
+    store = FakeVectorStore()
+    indexer = EmbeddingIndexer(model=model, vector_store=store)
+    indexer.rebuild([event(9), note])
+
+    assert store.attributes["co_event"] == VectorAttributes(
+        domain="work", source_record_type="event", anchor_at=datetime(2026, 3, 2, 9, tzinfo=timezone.utc)
+    )
+    assert indexer.query("planning", where=VectorFilter(source_record_types=["event"])) == [("co_event", 1.0)]
+
+    report = indexer.upsert([event(11), note])
+    assert report.embedded_count == 1
+    assert store.attributes["co_event"].anchor_at == datetime(2026, 3, 2, 11, tzinfo=timezone.utc)
@@ -0,0 +1,58 @@
+import sys
+import types
+from typing import Any, Dict, List, Sequence
+
+import pytest
+
+from embeddings.models import SentenceTransformerEmbeddingModel, plan_token_batches
+
+
+class FakeTokenizer:
+    def __call__(self, texts: Sequence[str], **kwargs: Any) -> Dict[str, List[List[int]]]:
+        max_length = kwargs.get("max_length") or 10_000
+        return {"input_ids": [[0] * min(len(text.split()) + 2, max_length) for text in texts]}
+
+
+class FakeSentenceTransformer:
+    instances: List["FakeSentenceTransformer"] = []
+
+    def __init__(self, model_name: str, **kwargs: Any) -> None:
+        self.tokenizer = FakeTokenizer()
+        self.max_seq_length = 64
+        self.batch_sizes: List[int] = []
+        FakeSentenceTransformer.instances.append(self)
+
+    def encode(self, texts: Sequence[str], *, batch_size: int, **kwargs: Any) -> Any:
+        import numpy as np
+
+        self.batch_sizes.append(batch_size)
+        return np.array([[float(len(text)), 1.0] for text in texts])
+
+
+def test_plan_token_batches_respects_budget_and_covers_every_text() -> None:
+    lengths = [3, 120, 4, 40, 3, 3, 500, 41]
+    batches = plan_token_batches(lengths, max_tokens_per_batch=128, max_batch_size=3)
+
+    assert sorted(idx for batch in batches for idx in batch) == list(range(len(lengths)))
+    assert batches[0] == [6]
+    for batch in batches:
+        assert len(batch) <= 3
+        if len(batch) > 1:
+            assert len(batch) * max(lengths[idx] for idx in batch) <= 128
+
+
+def test_sentence_transformer_model_buckets_by_tokens_and_keeps_input_order(monkeypatch: pytest.MonkeyPatch) -> None:
+    pytest.importorskip("numpy")
+    monkeypatch.setitem(
+        sys.modules,
+        "sentence_transformers",
+        types.SimpleNamespace(SentenceTransformer=FakeSentenceTransformer),
+    )
+    texts = ["buy milk", "long note " * 50, "call mom", "standup with the team at ten", "pay rent"]
+
+    model = SentenceTransformerEmbeddingModel("fake", max_tokens_per_batch=64)
+    vectors = model.embed_texts(texts)
+
+    assert [row[0] for row in vectors] == [float(len(text)) for text in texts]
+    assert model.token_lengths(texts)[1] == 64
+    assert FakeSentenceTransformer.instances[-1].batch_sizes == [1, 4]
@@ -0,0 +1,68 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Tuple
+
+import pytest
+
+from embeddings.registry import EmbeddingModelRegistry
+
+
+class CountingLoader:
+    def __init__(self, delay: float = 0.0) -> None:
+        self.calls: List[Tuple[str, str, bool]] = []
+        self.delay = delay
+        self._lock = threading.Lock()
+
+    def __call__(self, model_name: str, *, device: str, local_files_only: bool) -> Any:
+        time.sleep(self.delay)
+        with self._lock:
+            self.calls.append((model_name, device, local_files_only))
+        return object()
+
+
+def test_registry_loads_each_key_once_and_reloads_after_unload() -> None:
+    loader = CountingLoader()
+    registry = EmbeddingModelRegistry(loader)
+
+    first = registry.get("mini")
+    assert registry.get("mini") is first
+    other = registry.get("mini", local_files_only=True)
+    assert other is not first
+    assert loader.calls == [("mini", "cpu", False), ("mini", "cpu", True)]
+    assert registry.loaded() == [("mini", "cpu", False), ("mini", "cpu", True)]
+
+    assert registry.unload("mini") is True
+    assert registry.unload("mini") is False
+    assert registry.get("mini") is not first
+    assert len(loader.calls) == 3
+
+    registry.unload_all()
+    assert registry.loaded() == []
+
+
+def test_registry_concurrent_gets_share_a_single_load() -> None:
+    loader = CountingLoader(delay=0.05)
+    registry = EmbeddingModelRegistry(loader)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        models = list(executor.map(lambda _: registry.get("mini"), range(8)))
+
+    assert len(loader.calls) == 1
+    assert all(model is models[0] for model in models)
+
+
+def test_registry_does_not_cache_failed_loads() -> None:
+    attempts: List[str] = []
+
+    def loader(model_name: str, *, device: str, local_files_only: bool) -> Any:
+        attempts.append(model_name)
+        if len(attempts) == 1:
+            raise RuntimeError("model unavailable")
+        return object()
+
+    registry = EmbeddingModelRegistry(loader)
+    with pytest.raises(RuntimeError):
+        registry.get("mini")
+    assert registry.get("mini") is not None
+    assert attempts == ["mini", "mini"]
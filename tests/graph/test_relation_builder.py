@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from core.canonical_schema import CanonicalObject
 from graph.relation_builder import (
@@ -7,7 +7,9 @@ from graph.relation_builder import (
     SAME_DOMAIN,
     SAME_PERSON,
     build_relations,
+    build_relations_all_pairs,
     rebuild_and_store_relations,
+    update_and_store_relations,
 )
 from storage.sqlite_store import SQLiteStore
 
@@ -53,6 +55,35 @@ def test_build_relations_generates_expected_types() -> None:
     assert FOLLOW_UP in relation_types
 
 
+def test_build_relations_matches_all_pairs_reference() -> None:
+    base = datetime.fromisoformat("2026-02-01T08:00:00")
+    people_pool = [["sam@example.com"], ["Lee@example.com", "sam@example.com"], [], [" lee@example.com "]]
+    domains = ["work", "home", "", "Work"]
+    objects = [
+        CanonicalObject(
+            canonical_id=f"co_{idx:02d}",
+            source_system="apple_notes",
+            source_record_type="note",
+            title=f"Item {idx}",
+            created_at=base + timedelta(hours=17 * idx) if idx % 5 else None,
+            due_at=base + timedelta(days=idx % 3) if idx % 4 == 0 else None,
+            people=people_pool[idx % len(people_pool)],
+            domain=domains[idx % len(domains)],
+        )
+        for idx in range(24)
+    ]
+
+    relations = build_relations(objects)
+
+    assert relations == build_relations_all_pairs(objects)
+    assert {relation.relation_type for relation in relations} == {
+        SAME_DAY,
+        SAME_PERSON,
+        SAME_DOMAIN,
+        FOLLOW_UP,
+    }
+
+
 def test_rebuild_and_store_relations_writes_to_sqlite(tmp_path) -> None:
     db_path = tmp_path / "memory.db"
     store = SQLiteStore(str(db_path))
@@ -88,3 +119,47 @@ def test_rebuild_and_store_relations_writes_to_sqlite(tmp_path) -> None:
 
     assert relation_count > 0
     assert len(persisted) == relation_count
+
+
+def test_update_and_store_relations_matches_full_rebuild(tmp_path) -> None:
+    store = SQLiteStore(str(tmp_path / "memory.db"))
+    store.initialize_schema()
+    base = datetime.fromisoformat("2026-02-20T09:00:00")
+    objects = [
+        CanonicalObject(
+            canonical_id=f"co_{idx}",
+            source_system="apple_notes",
+            source_record_type="note",
+            title=f"Note {idx}",
+            created_at=base + timedelta(hours=20 * idx),
+            people=["lee@example.com"] if idx % 2 else [],
+            domain="management" if idx < 4 else "home",
+        )
+        for idx in range(6)
+    ]
+    update_and_store_relations(store, store.upsert_canonical_objects(objects))
+
+    changed = objects[1].model_copy(update={"domain": "home", "people": []})
+    added = CanonicalObject(
+        canonical_id="co_new",
+        source_system="apple_reminders",
+        source_record_type="reminder",
+        title="Book review",
+        due_at=base + timedelta(days=1),
+        people=["lee@example.com"],
+        domain="management",
+    )
+    current = [objects[0], changed, *objects[2:5], added]
+    changes = store.upsert_canonical_objects(current, prune_missing=True)
+
+    assert changes.inserted_ids == ("co_new",)
+    assert changes.deleted_ids == ("co_5",)
+
+    relation_count = update_and_store_relations(store, changes)
+    persisted = [
+        {key: value for key, value in relation.items() if key != "created_at"}
+        for relation in store.fetch_relations()
+    ]
+
+    assert persisted == [relation.to_record() for relation in build_relations(current)]
+    assert relation_count == len(persisted)
@@ -0,0 +1,131 @@
+import random
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+import pytest
+
+from agents.providers import AccumulatedStateProvider
+from core.canonical_schema import CanonicalObject
+from graph.relation_builder import update_and_store_relations
+from state.accumulator import StateAccumulator
+from state.engine import DeterministicStateEngine
+from storage.connection_pool import SQLiteConnectionConfig
+from storage.sqlite_store import SQLiteStore
+
+BASE = datetime(2026, 2, 20, tzinfo=timezone.utc)
+
+
+def _objects(rng: random.Random, count: int, prefix: str = "co") -> List[CanonicalObject]:
+    objects = []
+    for idx in range(count):
+        record_type = rng.choice(["note", "event", "reminder"])
+        when = BASE + timedelta(minutes=rng.randrange(-15_000, 15_000))
+        objects.append(
+            CanonicalObject(
+                canonical_id=f"{prefix}_{idx}",
+                source_system="test",
+                source_record_type=record_type,
+                title=f"item {idx}",
+                start_at=when if record_type == "event" else None,
+                due_at=when if record_type == "reminder" else None,
+                created_at=when if record_type == "note" else None,
+                people=[rng.choice(["sam@example.com", "ana@example.com", "lee@example.com"])],
+                domain=rng.choice(["work", "Work ", "personal", ""]),
+            )
+        )
+    return objects
+
+
+def _store(tmp_path, objects: List[CanonicalObject]) -> SQLiteStore:
+    store = SQLiteStore(str(tmp_path / "memory.db"))
+    store.initialize_schema()
+    changes = store.upsert_canonical_objects(objects)
+    update_and_store_relations(store, changes)
+    # Spread edge times so the follow-up window matters.
+    with store.transaction() as conn:
+        for idx, row in enumerate(conn.execute("SELECT relation_id FROM relations").fetchall()):
+            created = BASE + timedelta(hours=(idx * 7) % 400 - 200)
+            conn.execute(
+                "UPDATE relations SET created_at = ? WHERE relation_id = ?",
+                (created.isoformat(), row[0]),
+            )
+    return store
+
+
+def test_accumulator_matches_engine_while_time_advances(tmp_path) -> None:
+    store = _store(tmp_path, _objects(random.Random(5), 150))
+    engine = DeterministicStateEngine()
+    assert store.count_relations() > 0
+
+    start = BASE - timedelta(days=6)
+    accumulator = StateAccumulator.from_store(store, now=start)
+    for hours in range(0, 24 * 20, 13):
+        now = start + timedelta(hours=hours, microseconds=hours)
+        assert accumulator.snapshot(now) == engine.calculate_from_store(store, now=now)
+
+    with pytest.raises(ValueError):
+        accumulator.advance(start)
+
+
+def test_accumulator_applies_change_sets_and_resumes_from_saved_snapshot(tmp_path) -> None:
+    rng = random.Random(9)
+    objects = _objects(rng, 120)
+    store = _store(tmp_path, objects)
+    engine = DeterministicStateEngine()
+    now = BASE - timedelta(days=2)
+    accumulator = StateAccumulator.open(store, now=now)
+
+    changed = [obj.model_copy(update={"domain": "health"}) for obj in objects[:30]]
+    moved = [
+        obj.model_copy(update={"created_at": BASE + timedelta(days=1), "start_at": None, "due_at": None})
+        for obj in objects[30:40]
+    ]
+    survivors = changed + moved + objects[40:110] + _objects(rng, 20, prefix="new")
+    changes = store.upsert_canonical_objects(survivors, prune_missing=True)
+    update_and_store_relations(store, changes)
+    assert changes.deleted_ids
+
+    later = now + timedelta(hours=5)
+    accumulator.apply_changes(store, changes.changed_ids, now=later)
+    assert accumulator.generation == store.generation()
+    assert accumulator.snapshot(later) == engine.calculate_from_store(store, now=later)
+
+    accumulator.save(store)
+    resumed_at = later + timedelta(days=3)
+    resumed = StateAccumulator.open(store, now=resumed_at)
+    assert resumed.as_of == resumed_at
+    assert resumed.snapshot(resumed_at) == engine.calculate_from_store(store, now=resumed_at)
+    # Resuming only reads, so it does not wait for another connection's write lock.
+    reader = SQLiteStore(store.db_path, connection_config=SQLiteConnectionConfig(busy_timeout_ms=0))
+    with store.transaction():
+        assert StateAccumulator.open(reader, now=resumed_at).snapshot(resumed_at) == resumed.snapshot(resumed_at)
+
+    # A write the accumulator never saw invalidates the saved snapshot.
+    store.upsert_canonical_objects([objects[0].model_copy(update={"title": "edited elsewhere"})])
+    rebuilt = StateAccumulator.open(store, now=resumed_at)
+    assert rebuilt.generation == store.generation() != resumed.generation
+    assert rebuilt.snapshot(resumed_at) == engine.calculate_from_store(store, now=resumed_at)
+
+
+def test_accumulated_state_provider_rebuilds_after_unseen_writes(tmp_path) -> None:
+    store = SQLiteStore(str(tmp_path / "memory.db"))
+    store.initialize_schema()
+    provider = AccumulatedStateProvider(store, StateAccumulator.open(store))
+    assert provider.get_state().features.recent_object_count == 0
+
+    store.upsert_canonical_objects(
+        [
+            CanonicalObject(
+                canonical_id="co_now",
+                source_system="test",
+                source_record_type="note",
+                title="fresh",
+                created_at=datetime.now(timezone.utc),
+                domain="work",
+            )
+        ]
+    )
+    state = provider.get_state()
+    assert state.features.recent_object_count == 1
+    assert state.domain_context == "work"
+    assert provider.accumulator.generation == store.generation()
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta, timezone
+
+from api.state_runner import backfill_state_history, compute_user_state
+from core.canonical_schema import CanonicalObject
+from graph.relation_builder import update_and_store_relations
+from state.engine import DeterministicStateEngine, StateEngineConfig
+from state.history import StateHistory, iter_timestamps
+from storage.connection_pool import SQLiteConnectionConfig
+from storage.sqlite_store import SQLiteStore
+
+BASE = datetime(2026, 2, 1, tzinfo=timezone.utc)
+
+
+def _seed(store: SQLiteStore) -> None:
+    store.initialize_schema()
+    objects = [
+        CanonicalObject(
+            canonical_id=f"co_{idx}",
+            source_system="test",
+            source_record_type=("note", "event", "reminder")[idx % 3],
+            title=f"item {idx}",
+            start_at=BASE + timedelta(hours=idx * 5) if idx % 3 == 1 else None,
+            due_at=BASE + timedelta(hours=idx * 5) if idx % 3 == 2 else None,
+            created_at=BASE + timedelta(hours=idx * 5) if idx % 3 == 0 else None,
+            people=["sam@example.com"],
+            domain=("work", "personal")[idx % 2],
+        )
+        for idx in range(80)
+    ]
+    update_and_store_relations(store, store.upsert_canonical_objects(objects))
+
+
+def test_backfill_matches_engine_and_serves_ranges_from_table(tmp_path) -> None:
+    store = SQLiteStore(str(tmp_path / "memory.db"))
+    _seed(store)
+    history = StateHistory(store)
+    timestamps = list(iter_timestamps(BASE, BASE + timedelta(days=20), timedelta(hours=7)))
+
+    # Unsorted input with duplicates is swept once in time order.
+    assert history.backfill([*reversed(timestamps), timestamps[3]]) == len(timestamps)
+
+    engine = DeterministicStateEngine()
+    recorded = history.fetch_range()
+    assert [snapshot.computed_at for snapshot in recorded] == timestamps
+    for snapshot in recorded:
+        assert snapshot == engine.calculate_from_store(store, now=snapshot.computed_at)
+    assert len({snapshot.features for snapshot in recorded}) > 10
+
+    window = history.fetch_range(timestamps[5], timestamps[9])
+    assert [snapshot.computed_at for snapshot in window] == timestamps[5:9]
+    assert history.fetch_range(timestamps[5], limit=2) == recorded[5:7]
+
+    # Re-recording a timestamp replaces it; other window configs keep separate series.
+    assert history.backfill(timestamps[:2]) == 2
+    assert len(history.fetch_range()) == len(timestamps)
+    assert StateHistory(store, StateEngineConfig(recent_window_days=3)).fetch_range() == []
+
+
+def test_state_runner_records_history(tmp_path) -> None:
+    db_path = tmp_path / "memory.db"
+    _seed(SQLiteStore(str(db_path)))
+
+    compute_user_state(db_path=str(db_path))
+    assert StateHistory(SQLiteStore(str(db_path))).fetch_range() == []
+
+    snapshot = compute_user_state(db_path=str(db_path), record_history=True)
+    count = backfill_state_history(
+        db_path=str(db_path),
+        start=BASE,
+        end=BASE + timedelta(days=2),
+        step=timedelta(hours=12),
+    )
+
+    assert count == 4
+    recorded = StateHistory(SQLiteStore(str(db_path))).fetch_range()
+    assert recorded[-1] == snapshot
+    assert len(recorded) == 5
+
+
+def test_history_reads_while_another_connection_writes(tmp_path) -> None:
+    db_path = str(tmp_path / "memory.db")
+    writer = SQLiteStore(db_path)
+    _seed(writer)
+    StateHistory(writer).backfill([BASE, BASE + timedelta(days=1)])
+    reader = SQLiteStore(db_path, connection_config=SQLiteConnectionConfig(busy_timeout_ms=0))
+
+    with writer.transaction():
+        history = StateHistory(reader)
+        assert [snapshot.computed_at for snapshot in history.fetch_range()] == [BASE, BASE + timedelta(days=1)]
@@ -1,6 +1,9 @@
-from datetime import datetime, timezone
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
 
 from core.canonical_schema import CanonicalObject
+from state.columnar import StateColumns
 from state.engine import DeterministicStateEngine
 from storage.sqlite_store import SQLiteStore
 
@@ -69,16 +72,26 @@ def test_state_engine_reads_from_store(tmp_path) -> None:
     db_path = tmp_path / "memory.db"
     store = SQLiteStore(str(db_path))
     store.initialize_schema()
-    store.upsert_canonical_object(
-        CanonicalObject(
-            canonical_id="co_1",
-            source_system="apple_notes",
-            source_record_type="note",
-            title="Prep brief",
-            content="Draft narrative.",
-            created_at=datetime(2026, 2, 27, 10, 0, tzinfo=timezone.utc),
-            domain="strategy",
-        )
+    store.upsert_canonical_objects(
+        [
+            CanonicalObject(
+                canonical_id="co_1",
+                source_system="apple_notes",
+                source_record_type="note",
+                title="Prep brief",
+                content="Draft narrative.",
+                created_at=datetime(2026, 2, 27, 10, 0, tzinfo=timezone.utc),
+                domain="strategy",
+            ),
+            CanonicalObject(
+                canonical_id="co_2",
+                source_system="apple_notes",
+                source_record_type="note",
+                title="Old plan",
+                created_at=datetime(2026, 1, 2, 10, 0, tzinfo=timezone.utc),
+                domain="archive",
+            ),
+        ]
     )
     store.replace_relations([])
 
@@ -86,3 +99,51 @@ def test_state_engine_reads_from_store(tmp_path) -> None:
     snapshot = engine.calculate_from_store(store, now=datetime(2026, 2, 27, 12, 0, tzinfo=timezone.utc))
     assert snapshot.features.recent_object_count == 1
     assert snapshot.domain_context == "strategy"
+    assert snapshot == engine.calculate(
+        store.fetch_canonical_objects(),
+        store.fetch_relations(),
+        now=datetime(2026, 2, 27, 12, 0, tzinfo=timezone.utc),
+    )
+
+
+def test_columnar_state_matches_object_path_exactly() -> None:
+    rng = random.Random(3)
+    base = datetime(2026, 2, 20, tzinfo=timezone.utc)
+    domains = ["work", " Work ", "personal", "", "general", "health"]
+    objects = []
+    for idx in range(400):
+        record_type = rng.choice(["note", "event", "reminder"])
+        when = base + timedelta(minutes=rng.randrange(-20_000, 20_000))
+        naive = rng.random() < 0.2
+        objects.append(
+            CanonicalObject(
+                canonical_id=f"co_{idx % 380}",
+                source_system="test",
+                source_record_type=record_type,
+                title=f"item {idx}",
+                start_at=when if record_type == "event" else None,
+                due_at=(when.replace(tzinfo=None) if naive else when) if record_type == "reminder" else None,
+                created_at=when if record_type == "note" and rng.random() < 0.9 else None,
+                domain=rng.choice(domains),
+            )
+        )
+    relations: List[Dict[str, object]] = [
+        {
+            "from_canonical_id": f"co_{rng.randrange(420)}",
+            "to_canonical_id": f"co_{rng.randrange(420)}",
+            "relation_type": rng.choice(["FOLLOW_UP", "FOLLOW_UP", "SAME_PERSON"]),
+            "created_at": rng.choice(
+                ["", "not-a-date", "2026-02-01T00:00:00Z", "2026-02-19T12:00:00+00:00", "2026-02-25T08:00:00"]
+            ),
+        }
+        for _ in range(300)
+    ]
+
+    engine = DeterministicStateEngine()
+    columns = StateColumns.build(objects, relations)
+    for offset_hours in range(-200, 400, 37):
+        now = base + timedelta(hours=offset_hours)
+        assert engine.calculate_columnar(columns, now=now) == engine.calculate(objects, relations, now=now)
+
+    empty = StateColumns.build([], [])
+    assert engine.calculate_columnar(empty, now=base) == engine.calculate([], [], now=base)
@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+
+from core.canonical_schema import CanonicalObject
+from storage.connection_pool import SQLiteConnectionConfig, SQLiteConnectionPool
+from storage.sqlite_store import SQLiteStore
+
+
+def test_pool_reuses_connection_and_applies_pragmas(tmp_path) -> None:
+    pool = SQLiteConnectionPool(str(tmp_path / "memory.db"))
+
+    with pool.connection() as first:
+        journal_mode = first.execute("PRAGMA journal_mode").fetchone()[0]
+        synchronous = first.execute("PRAGMA synchronous").fetchone()[0]
+        with pool.connection() as nested:
+            assert nested is first
+    with pool.connection() as second:
+        assert second is first
+
+    assert journal_mode == "wal"
+    assert synchronous == 1
+    pool.close()
+
+
+def test_pool_hands_each_thread_its_own_connection(tmp_path) -> None:
+    pool = SQLiteConnectionPool(
+        str(tmp_path / "memory.db"),
+        SQLiteConnectionConfig(pool_size=2, acquire_timeout_seconds=0.1),
+    )
+    held = threading.Event()
+    release = threading.Event()
+    seen = []
+
+    def worker() -> None:
+        with pool.connection() as conn:
+            seen.append(conn)
+            held.set()
+            release.wait(timeout=5)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    held.wait(timeout=5)
+    errors = []
+
+    def starved() -> None:
+        try:
+            with pool.connection():
+                pass
+        except TimeoutError as exc:
+            errors.append(exc)
+
+    with pool.connection() as conn:
+        assert conn is not seen[0]
+        third = threading.Thread(target=starved)
+        third.start()
+        third.join()
+    assert len(errors) == 1
+    release.set()
+    thread.join()
+
+
+def test_store_transaction_rolls_back_grouped_writes(tmp_path) -> None:
+    store = SQLiteStore(str(tmp_path / "memory.db"))
+    store.initialize_schema()
+
+    with pytest.raises(RuntimeError):
+        with store.transaction():
+            store.upsert_canonical_object(
+                CanonicalObject(canonical_id="co_a", source_system="apple_notes", source_record_type="note")
+            )
+            store.replace_relations([])
+            raise RuntimeError("abort")
+
+    assert store.fetch_canonical_objects() == []
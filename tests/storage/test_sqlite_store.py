@@ -1,5 +1,11 @@
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
 from core.canonical_schema import CanonicalObject
-from storage.sqlite_store import SQLiteStore
+from storage.connection_pool import SQLiteConnectionConfig
+from storage.sqlite_store import CanonicalQuery, SQLiteStore
 
 
 def test_initialize_schema_creates_tables(tmp_path) -> None:
@@ -42,3 +48,413 @@ def test_upsert_and_fetch_canonical_objects(tmp_path) -> None:
     assert len(fetched) == 1
     assert fetched[0].canonical_id == "co_a"
     assert fetched[0].people == ["alex@example.com"]
+
+
+def test_upsert_reports_inserted_and_updated_ids(tmp_path) -> None:
+    store = SQLiteStore(str(tmp_path / "memory.db"))
+    store.initialize_schema()
+    first = CanonicalObject(canonical_id="co_a", source_system="apple_notes", source_record_type="note")
+    second = CanonicalObject(canonical_id="co_b", source_system="apple_notes", source_record_type="note")
+
+    assert store.upsert_canonical_objects([first]).inserted_ids == ("co_a",)
+
+    result = store.upsert_canonical_objects([first.model_copy(update={"title": "Edited"}), second])
+    assert result.inserted_ids == ("co_b",)
+    assert result.updated_ids == ("co_a",)
+
+    pruned = store.upsert_canonical_objects([second], prune_missing=True)
+    assert pruned.deleted_ids == ("co_a",)
+    assert [obj.canonical_id for obj in store.fetch_canonical_objects()] == ["co_b"]
+
+
+def test_upsert_skips_unchanged_rows_by_content_hash(tmp_path) -> None:
+    store = SQLiteStore(str(tmp_path / "memory.db"))
+    store.initialize_schema()
+    obj = CanonicalObject(
+        canonical_id="co_a",
+        source_system="apple_notes",
+        source_record_type="note",
+        title="Plan",
+        people=["alex@example.com"],
+    )
+    store.upsert_canonical_object(obj)
+
+    unchanged = store.upsert_canonical_objects([obj])
+    assert unchanged.unchanged_ids == ("co_a",)
+    assert unchanged.changed_ids == ()
+
+    edited = store.upsert_canonical_objects([obj.model_copy(update={"title": "Plan v2"})])
+    assert edited.updated_ids == ("co_a",)
+    assert store.fetch_canonical_objects()[0].title == "Plan v2"
+
+
+def test_initialize_schema_adds_content_hash_to_existing_database(tmp_path) -> None:
+    store = SQLiteStore(str(tmp_path / "memory.db"))
+    with store._connect() as conn:
+        conn.execute(
+            """
+            CREATE TABLE canonical_objects (
+                canonical_id TEXT PRIMARY KEY,
+                source_system TEXT NOT NULL,
+                source_record_type TEXT NOT NULL,
+                title TEXT NOT NULL DEFAULT '',
+                content TEXT NOT NULL DEFAULT '',
+                start_at TEXT,
+                end_at TEXT,
+                due_at TEXT,
+                created_at TEXT,
+                updated_at TEXT,
+                people_json TEXT NOT NULL,
+                labels_json TEXT NOT NULL,
+                domain TEXT NOT NULL,
+                ingested_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        conn.execute(
+            "INSERT INTO canonical_objects (canonical_id, source_system, source_record_type, "
+            "people_json, labels_json, domain) VALUES ('co_a', 'apple_notes', 'note', '[]', '[]', 'general')"
+        )
+
+    with pytest.raises(RuntimeError), store.transaction():
+        store.initialize_schema()
+        raise RuntimeError("caller aborts")
+    with store._connect() as conn:
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(canonical_objects)")}
+    assert "tenant_id" not in columns
+
+    with store.transaction():
+        store.initialize_schema()
+        result = store.upsert_canonical_objects(
+            [CanonicalObject(canonical_id="co_a", source_system="apple_notes", source_record_type="note")]
+        )
+
+    assert result.updated_ids == ("co_a",)
+    assert store.upsert_canonical_objects(store.fetch_canonical_objects()).unchanged_ids == ("co_a",)
+    assert [hit[0] for hit in store.search_text("general")] == ["co_a"]
+
+
+def test_initialize_schema_backfills_anchor_at_in_existing_database(tmp_path) -> None:
+    store = SQLiteStore(str(tmp_path / "memory.db"))
+    with store._connect() as conn:
+        conn.execute(
+            """
+            CREATE TABLE canonical_objects (
+                canonical_id TEXT PRIMARY KEY,
+                source_system TEXT NOT NULL,
+                source_record_type TEXT NOT NULL,
+                title TEXT NOT NULL DEFAULT '',
+                content TEXT NOT NULL DEFAULT '',
+                start_at TEXT,
+                end_at TEXT,
+                due_at TEXT,
+                created_at TEXT,
+                updated_at TEXT,
+                people_json TEXT NOT NULL,
+                labels_json TEXT NOT NULL,
+                domain TEXT NOT NULL,
+                ingested_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        conn.execute(
+            "INSERT INTO canonical_objects (canonical_id, source_system, source_record_type, created_at, "
+            "people_json, labels_json, domain) "
+            "VALUES ('co_a', 'apple_notes', 'note', '2026-03-02T09:00:00+00:00', '[]', '[]', 'work')"
+        )
+
+    store.initialize_schema()
+    window = CanonicalQuery(
+        anchor_from=datetime(2026, 3, 1, tzinfo=timezone.utc),
+        anchor_to=datetime(2026, 3, 3, tzinfo=timezone.utc),
+    )
+
+    assert [record.canonical_id for record in store.query_canonical_objects(window)] == ["co_a"]
+
+
+def test_replace_relations_for_only_rewrites_touched_edges(tmp_path) -> None:
+    store = SQLiteStore(str(tmp_path / "memory.db"))
+    store.initialize_schema()
+    store.upsert_canonical_objects(
+        [
+            CanonicalObject(canonical_id=cid, source_system="apple_notes", source_record_type="note")
+            for cid in ("co_a", "co_b", "co_c")
+        ]
+    )
+
+    def edge(from_id: str, to_id: str, relation_id: str) -> dict:
+        return {
+            "relation_id": relation_id,
+            "from_canonical_id": from_id,
+            "to_canonical_id": to_id,
+            "relation_type": "SAME_DAY",
+            "reason": "",
+        }
+
+    store.replace_relations([edge("co_a", "co_b", "rel_ab"), edge("co_b", "co_c", "rel_bc")])
+
+    diff = store.replace_relations_for(["co_a"], [edge("co_a", "co_c", "rel_ac")])
+
+    assert (diff.added, diff.updated, diff.removed) == (1, 0, 1)
+    assert [relation["relation_id"] for relation in store.fetch_relations()] == ["rel_ac", "rel_bc"]
+    assert store.count_relations() == 2
+
+
+def test_iter_canonical_objects_streams_batches_with_selected_columns(tmp_path) -> None:
+    store = SQLiteStore(str(tmp_path / "memory.db"))
+    store.initialize_schema()
+    store.upsert_canonical_objects(
+        [
+            CanonicalObject(
+                canonical_id=f"co_{idx}",
+                source_system="apple_notes",
+                source_record_type="note",
+                title=f"Note {idx}",
+                people=[f"p{idx}@example.com"],
+            )
+            for idx in range(5)
+        ]
+    )
+
+    records = list(store.iter_canonical_objects(batch_size=2, columns=["people_json"]))
+
+    assert [record.canonical_id for record in records] == [f"co_{idx}" for idx in range(5)]
+    assert records[3].people == ["p3@example.com"]
+    with pytest.raises(AttributeError):
+        _ = records[0].title
+    assert list(store.iter_canonical_ids(batch_size=3)) == [f"co_{idx}" for idx in range(5)]
+    assert [obj.title for obj in store.fetch_canonical_objects()] == [f"Note {idx}" for idx in range(5)]
+
+
+def test_query_canonical_objects_filters_by_anchor_window_and_predicates(tmp_path) -> None:
+    store = SQLiteStore(str(tmp_path / "memory.db"))
+    store.initialize_schema()
+    base = datetime(2026, 2, 20, 9, 0, tzinfo=timezone.utc)
+    store.upsert_canonical_objects(
+        [
+            CanonicalObject(
+                canonical_id="co_old",
+                source_system="apple_notes",
+                source_record_type="note",
+                created_at=base - timedelta(days=30),
+                domain="work",
+            ),
+            CanonicalObject(
+                canonical_id="co_naive",
+                source_system="apple_notes",
+                source_record_type="note",
+                created_at=datetime(2026, 2, 20, 10, 0),
+                people=["Sam@example.com"],
+                domain="Work",
+            ),
+            CanonicalObject(
+                canonical_id="co_offset",
+                source_system="apple_reminders",
+                source_record_type="reminder",
+                due_at=datetime(2026, 2, 20, 6, 0, tzinfo=timezone(timedelta(hours=-5))),
+                updated_at=base - timedelta(days=60),
+                domain="home",
+            ),
+        ]
+    )
+
+    def ids(query: CanonicalQuery) -> list:
+        return [record.canonical_id for record in store.query_canonical_objects(query, columns=[])]
+
+    assert ids(CanonicalQuery(anchor_from=base)) == ["co_naive", "co_offset"]
+    assert ids(CanonicalQuery(anchor_from=base, anchor_to=base + timedelta(hours=2))) == ["co_naive"]
+    assert ids(CanonicalQuery(domains=["work"])) == ["co_old", "co_naive"]
+    assert ids(CanonicalQuery(source_record_types=["reminder"])) == ["co_offset"]
+    assert ids(CanonicalQuery(people=["sam@example.com"], anchor_from=base)) == ["co_naive"]
+
+
+def test_query_canonical_objects_holds_no_connection_between_batches(tmp_path) -> None:
+    store = SQLiteStore(
+        str(tmp_path / "memory.db"),
+        connection_config=SQLiteConnectionConfig(pool_size=1, acquire_timeout_seconds=0.2),
+    )
+    store.initialize_schema()
+    base = datetime(2026, 2, 20, 9, 0, tzinfo=timezone.utc)
+
+    def note(canonical_id: str, hours: int) -> CanonicalObject:
+        return CanonicalObject(
+            canonical_id=canonical_id,
+            source_system="apple_notes",
+            source_record_type="note",
+            created_at=base + timedelta(hours=hours),
+        )
+
+    store.upsert_canonical_objects([note(f"co_{hours}", hours) for hours in (4, 0, 3, 1, 2)])
+    recent = store.query_canonical_objects(CanonicalQuery(anchor_from=base + timedelta(hours=1)), batch_size=2)
+    everything = store.query_canonical_objects(CanonicalQuery(), batch_size=2, columns=[])
+    recent_ids = [next(recent).canonical_id]
+    all_ids = [next(everything).canonical_id]
+    errors = []
+
+    def write_from_another_thread() -> None:
+        try:
+            store.upsert_canonical_objects([note("co_5", 5)])
+        except TimeoutError as exc:
+            errors.append(exc)
+
+    # Both iterators are suspended; the pool's only connection must still be free.
+    writer = threading.Thread(target=write_from_another_thread)
+    writer.start()
+    writer.join()
+    for record in recent:
+        recent_ids.append(record.canonical_id)
+        all_ids.append(next(everything).canonical_id)
+    all_ids.extend(record.canonical_id for record in everything)
+
+    assert errors == []
+    assert recent_ids == ["co_1", "co_2", "co_3", "co_4", "co_5"]
+    assert all_ids == ["co_4", "co_0", "co_3", "co_1", "co_2", "co_5"]
+
+
+def test_initialize_schema_keys_existing_rows_by_their_rowid(tmp_path) -> None:
+    store = SQLiteStore(str(tmp_path / "memory.db"))
+    columns = (
+        "canonical_id TEXT NOT NULL, source_system TEXT NOT NULL, source_record_type TEXT NOT NULL, "
+        "title TEXT NOT NULL DEFAULT '', content TEXT NOT NULL DEFAULT '', start_at TEXT, end_at TEXT, "
+        "due_at TEXT, created_at TEXT, updated_at TEXT, people_json TEXT NOT NULL, "
+        "labels_json TEXT NOT NULL, domain TEXT NOT NULL, content_hash TEXT, anchor_at TEXT, "
+        "ingested_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP, tenant_id TEXT NOT NULL DEFAULT ''"
+    )
+    with store._connect() as conn:
+        conn.execute(f"CREATE TABLE canonical_objects ({columns}, PRIMARY KEY (tenant_id, canonical_id))")
+        for rowid, canonical_id in ((7, "co_a"), (9, "co_b")):
+            conn.execute(
+                "INSERT INTO canonical_objects (rowid, canonical_id, source_system, source_record_type, "
+                "title, people_json, labels_json, domain) VALUES (?, ?, 'apple_notes', 'note', ?, '[]', '[]', '')",
+                (rowid, canonical_id, f"Roadmap {canonical_id}"),
+            )
+        conn.execute(
+            "CREATE TABLE relations (relation_id TEXT NOT NULL, from_canonical_id TEXT NOT NULL, "
+            "to_canonical_id TEXT NOT NULL, relation_type TEXT NOT NULL, reason TEXT NOT NULL DEFAULT '', "
+            "confidence REAL NOT NULL DEFAULT 1.0, created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP, "
+            "tenant_id TEXT NOT NULL DEFAULT '', PRIMARY KEY (tenant_id, relation_id), "
+            "FOREIGN KEY(tenant_id, from_canonical_id) REFERENCES canonical_objects(tenant_id, canonical_id) "
+            "ON DELETE CASCADE)"
+        )
+        conn.execute(
+            "INSERT INTO relations (relation_id, from_canonical_id, to_canonical_id, relation_type, created_at) "
+            "VALUES ('rel_ab', 'co_a', 'co_b', 'SAME_DAY', '2026-03-01 00:00:00')"
+        )
+
+    store.initialize_schema()
+    with store._connect() as conn:
+        doc_ids = dict(conn.execute("SELECT canonical_id, doc_id FROM canonical_objects").fetchall())
+
+    assert doc_ids == {"co_a": 7, "co_b": 9}
+    assert [(relation["relation_id"], relation["created_at"]) for relation in store.fetch_relations()] == [
+        ("rel_ab", "2026-03-01 00:00:00")
+    ]
+    assert sorted(hit[0] for hit in store.search_text("roadmap")) == ["co_a", "co_b"]
+    # Deletes still cascade through the recreated foreign keys.
+    store.upsert_canonical_objects([], prune_missing=True)
+    assert store.count_relations() == 0
+
+
+def test_doc_ids_survive_vacuum(tmp_path) -> None:
+    store = SQLiteStore(str(tmp_path / "memory.db"))
+    store.initialize_schema()
+
+    def note(idx: int) -> CanonicalObject:
+        return CanonicalObject(
+            canonical_id=f"co_{idx}",
+            source_system="apple_notes",
+            source_record_type="note",
+            title=f"Note {idx} {'even' if idx % 2 == 0 else 'odd'}",
+        )
+
+    store.upsert_canonical_objects([note(idx) for idx in range(8)])
+    store.upsert_canonical_objects([note(idx) for idx in range(8) if idx % 3], prune_missing=True)
+    with store._connect() as conn:
+        before = conn.execute("SELECT canonical_id, doc_id FROM canonical_objects ORDER BY doc_id").fetchall()
+        conn.execute("VACUUM")
+        after = conn.execute("SELECT canonical_id, doc_id FROM canonical_objects ORDER BY doc_id").fetchall()
+
+    assert [tuple(row) for row in after] == [tuple(row) for row in before]
+    assert sorted(hit[0] for hit in store.search_text("even")) == ["co_2", "co_4"]
+    assert [record.canonical_id for record in store.iter_canonical_objects(batch_size=2)] == [
+        "co_1", "co_2", "co_4", "co_5", "co_7"
+    ]
+
+
+def test_search_text_ranks_with_bm25_and_tracks_upserts(tmp_path) -> None:
+    store = SQLiteStore(str(tmp_path / "memory.db"))
+    store.initialize_schema()
+
+    def obj(canonical_id: str, title: str, content: str, domain: str = "work") -> CanonicalObject:
+        return CanonicalObject(
+            canonical_id=canonical_id,
+            source_system="apple_notes",
+            source_record_type="note",
+            title=title,
+            content=content,
+            people=["Sam Lee"],
+            domain=domain,
+        )
+
+    store.upsert_canonical_objects(
+        [
+            obj("co_roadmap", "Roadmap review", "Quarterly roadmap and planning"),
+            obj("co_planning", "Weekly sync", "planning notes"),
+            obj("co_cafe", "Café", "Résumé draft", domain="personal"),
+        ]
+    )
+
+    assert [hit[0] for hit in store.search_text("roadmap planning")] == ["co_roadmap", "co_planning"]
+    assert [hit[0] for hit in store.search_text("cafe resume")] == ["co_cafe"]
+    assert [hit[0] for hit in store.search_text("sam", query=CanonicalQuery(domains=["Personal"]))] == ["co_cafe"]
+    assert store.search_text('NEAR(" OR') == []
+
+    store.upsert_canonical_objects(
+        [obj("co_roadmap", "Budget", "numbers"), obj("co_planning", "Weekly sync", "planning notes")],
+        prune_missing=True,
+    )
+    assert store.search_text("roadmap") == []
+    assert store.search_text("cafe") == []
+    assert [hit[0] for hit in store.search_text("budget")] == ["co_roadmap"]
+
+
+def test_fetch_relations_for_returns_edges_touching_ids(tmp_path) -> None:
+    store = SQLiteStore(str(tmp_path / "memory.db"))
+    store.initialize_schema()
+    store.upsert_canonical_objects(
+        [
+            CanonicalObject(canonical_id=cid, source_system="apple_notes", source_record_type="note")
+            for cid in ("co_a", "co_b", "co_c", "co_d")
+        ]
+    )
+    store.replace_relations(
+        [
+            {
+                "relation_id": f"rel_{from_id}_{to_id}_{relation_type}",
+                "from_canonical_id": from_id,
+                "to_canonical_id": to_id,
+                "relation_type": relation_type,
+            }
+            for from_id, to_id, relation_type in [
+                ("co_a", "co_b", "SAME_DAY"),
+                ("co_a", "co_b", "FOLLOW_UP"),
+                ("co_b", "co_c", "FOLLOW_UP"),
+                ("co_c", "co_d", "SAME_DOMAIN"),
+            ]
+        ]
+    )
+
+    def ids(relations: list) -> list:
+        return [relation["relation_id"] for relation in relations]
+
+    assert ids(store.fetch_relations_for(["co_b"])) == [
+        "rel_co_a_co_b_FOLLOW_UP",
+        "rel_co_a_co_b_SAME_DAY",
+        "rel_co_b_co_c_FOLLOW_UP",
+    ]
+    assert ids(store.fetch_relations_for(["co_b"], types=["FOLLOW_UP"], limit=1)) == [
+        "rel_co_a_co_b_FOLLOW_UP"
+    ]
+    many_ids = [f"co_missing_{idx}" for idx in range(600)] + ["co_d"]
+    assert ids(store.fetch_relations_for(many_ids)) == ["rel_co_c_co_d_SAME_DOMAIN"]
+    assert store.fetch_relations_for([]) == []
@@ -0,0 +1,122 @@
+import sqlite3
+from datetime import datetime, timezone
+
+import pytest
+
+from api.pipeline_runner import run_pipeline_from_files
+from api.state_runner import compute_user_state
+from core.canonical_schema import CanonicalObject
+from storage.sqlite_store import CanonicalQuery, SQLiteStore
+from storage.tenant_router import TenantRouter, open_store, shard_for_tenant
+
+WHEN = datetime(2026, 3, 2, 9, 0, tzinfo=timezone.utc)
+
+
+def _note(canonical_id: str, title: str, domain: str = "work") -> CanonicalObject:
+    return CanonicalObject(
+        canonical_id=canonical_id,
+        source_system="apple_notes",
+        source_record_type="note",
+        title=title,
+        created_at=WHEN,
+        domain=domain,
+    )
+
+
+def _edge(from_id: str, to_id: str) -> dict:
+    return {
+        "relation_id": f"r_{from_id}_{to_id}",
+        "from_canonical_id": from_id,
+        "to_canonical_id": to_id,
+        "relation_type": "FOLLOW_UP",
+    }
+
+
+def test_tenants_sharing_a_database_never_see_each_others_rows(tmp_path) -> None:
+    db_path = str(tmp_path / "shared.db")
+    alice = SQLiteStore(db_path, tenant_id="alice")
+    bob = SQLiteStore(db_path, tenant_id="bob", pool=alice.pool)
+    alice.initialize_schema()
+
+    alice.upsert_canonical_objects([_note("co_a", "alpha roadmap"), _note("co_b", "alpha budget")])
+    bob_generation = bob.generation()
+    bob.upsert_canonical_objects([_note("co_a", "beta roadmap", domain="personal")])
+    alice.replace_relations([_edge("co_a", "co_b")])
+    assert bob.generation() == bob_generation + 1
+
+    assert [obj.title for obj in alice.fetch_canonical_objects()] == ["alpha roadmap", "alpha budget"]
+    assert [obj.title for obj in bob.fetch_canonical_objects()] == ["beta roadmap"]
+    assert [hit[0] for hit in bob.search_text("roadmap")] == ["co_a"]
+    assert bob.search_text("budget") == []
+    assert [record.title for record in bob.query_canonical_objects(CanonicalQuery(anchor_from=WHEN))] == [
+        "beta roadmap"
+    ]
+    assert alice.count_relations() == 1 and bob.count_relations() == 0
+    assert bob.fetch_relations_for(["co_a"]) == []
+
+    # Pruning and relation rewrites stay inside the calling tenant.
+    bob.upsert_canonical_objects([], prune_missing=True)
+    bob.replace_relations([])
+    assert len(alice.fetch_canonical_objects()) == 2
+    assert alice.count_relations() == 1
+    assert bob.fetch_canonical_objects() == []
+
+    # Relations must point at objects of their own tenant.
+    with pytest.raises(sqlite3.IntegrityError):
+        bob.replace_relations([_edge("co_a", "co_b")])
+
+
+def test_router_maps_tenants_to_fixed_shards(tmp_path) -> None:
+    router = TenantRouter(str(tmp_path / "tenants"), shard_count=4)
+    tenants = [f"user-{idx}" for idx in range(40)]
+    results = router.upsert_many({tenant: [_note("co_a", f"note of {tenant}")] for tenant in tenants})
+
+    assert all(result.inserted_ids == ("co_a",) for result in results.values())
+    assert {router.shard_index(tenant) for tenant in tenants} == {0, 1, 2, 3}
+    assert sorted(path.name for path in (tmp_path / "tenants").glob("shard-*.db")) == [
+        "shard-000.db",
+        "shard-001.db",
+        "shard-002.db",
+        "shard-003.db",
+    ]
+    for tenant in tenants:
+        store = router.store_for(tenant)
+        assert router.shard_index(tenant) == shard_for_tenant(tenant, 4)
+        assert [obj.title for obj in store.fetch_canonical_objects()] == [f"note of {tenant}"]
+    router.close()
+
+    with pytest.raises(ValueError):
+        TenantRouter(str(tmp_path / "tenants"), shard_count=8)
+    with pytest.raises(ValueError):
+        TenantRouter(str(tmp_path / "tenants"), shard_count=4).store_for("")
+    with pytest.raises(ValueError):
+        open_store()
+
+
+def test_runners_read_and_write_through_the_router(tmp_path) -> None:
+    exports = tmp_path / "exports"
+    exports.mkdir()
+    (exports / "notes.json").write_text(
+        '{"notes": [{"id": "n-1", "title": "Plan", "created_at": "2026-03-02T09:00:00Z", "folder": "work"}]}'
+    )
+    (exports / "calendar.json").write_text('{"events": []}')
+    (exports / "reminders.json").write_text('{"reminders": []}')
+    router = TenantRouter(str(tmp_path / "tenants"), shard_count=1)
+
+    report = run_pipeline_from_files(
+        notes_path=str(exports / "notes.json"),
+        calendar_path=str(exports / "calendar.json"),
+        reminders_path=str(exports / "reminders.json"),
+        router=router,
+        tenant_id="alice",
+    )
+    assert report.canonical_count == 1
+    assert report.db_path == router.shard_path(0)
+    assert len(router.store_for("alice").fetch_canonical_objects()) == 1
+    assert router.store_for("bob").fetch_canonical_objects() == []
+
+    compute_user_state(router=router, tenant_id="alice", record_history=True)
+    compute_user_state(router=router, tenant_id="bob", record_history=True)
+    with router.shard_transaction(0) as conn:
+        recorded = dict(conn.execute("SELECT tenant_id, COUNT(*) FROM state_history GROUP BY tenant_id").fetchall())
+    assert recorded == {"alice": 1, "bob": 1}